@@ -0,0 +1,556 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta, timezone
+import gc
+import json
+from pathlib import Path
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+import uuid
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from workout_history_mcp.exporters import (  # noqa: E402
+    exercise_history_markdown,
+    list_exercises_data,
+    session_list,
+    session_markdown,
+    summary_markdown,
+)
+from workout_history_mcp.loader import WorkoutHistoryStore, load_store  # noqa: E402
+from workout_history_mcp.store_cache import StoreCache  # noqa: E402
+from workout_history_mcp.streaming import load_compact_store  # noqa: E402
+
+
+DEFAULT_TOLERANCE = 0.25
+EXPORTER_NAMES = (
+    "session_list",
+    "session_list_filtered",
+    "list_exercises_data",
+    "session_markdown",
+    "exercise_history_markdown",
+    "summary_markdown",
+)
+LOAD_NAMES = (
+    "load_store",
+    "load_compact_store",
+    "store_cache_get",
+    "sqlite_cache_ingest",
+    "sqlite_cache_reopen",
+)
+SERVED_STORE_PREFIXES = ("compact:", "sqlite:")
+BENCHMARK_NAMES = (
+    *LOAD_NAMES,
+    *EXPORTER_NAMES,
+    *(prefix + name for prefix in SERVED_STORE_PREFIXES for name in EXPORTER_NAMES),
+)
+MUSCLE_GROUPS = (
+    "FRONT_CHEST",
+    "BACK_LATS",
+    "FRONT_QUADRICEPS",
+    "BACK_HAMSTRINGS",
+    "FRONT_DELTOIDS",
+    "BACK_TRICEPS",
+    "FRONT_BICEPS",
+    "BACK_GLUTES",
+)
+WEIGHT_EXERCISE_NAMES = (
+    "Bench Press",
+    "Back Squat",
+    "Deadlift",
+    "Overhead Press",
+    "Barbell Row",
+    "Romanian Deadlift",
+    "Incline Bench Press",
+    "Front Squat",
+    "Hip Thrust",
+    "Close-Grip Bench Press",
+)
+BODY_WEIGHT_EXERCISE_NAMES = ("Pull-Ups", "Dips", "Push-Ups", "Chin-Ups")
+
+
+def utc_run_stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def read_json(path: Path) -> dict[str, Any]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(payload, dict):
+        raise ValueError(f"Expected JSON object: {path}")
+    return payload
+
+
+def write_json(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+
+
+class _IdFactory:
+    def __init__(self, rng: random.Random) -> None:
+        self._rng = rng
+
+    def __call__(self) -> str:
+        return str(uuid.UUID(int=self._rng.getrandbits(128), version=4))
+
+
+def _exercise_definition(
+    rng: random.Random,
+    new_id: _IdFactory,
+    name: str,
+    *,
+    body_weight: bool,
+    equipment_id: str,
+    accessory_id: str,
+) -> dict[str, Any]:
+    base_weight = round(rng.uniform(30, 140) / 2.5) * 2.5
+    planned_set = (
+        {"id": new_id(), "type": "BodyWeightSet", "reps": rng.randint(6, 12), "additionalWeight": 0.0, "subCategory": "WorkSet"}
+        if body_weight
+        else {"id": new_id(), "type": "WeightSet", "reps": rng.randint(5, 10), "weight": base_weight, "subCategory": "WorkSet"}
+    )
+    return {
+        "id": new_id(),
+        "type": "Exercise",
+        "enabled": True,
+        "name": name,
+        "notes": "",
+        "sets": [
+            planned_set,
+            {"id": new_id(), "type": "RestSet", "timeInSeconds": rng.choice((60, 90, 120, 180)), "subCategory": "WorkSet"},
+        ],
+        "exerciseType": "BODY_WEIGHT" if body_weight else "WEIGHT",
+        "equipmentId": accessory_id if body_weight else equipment_id,
+        "bodyWeightPercentage": 100.0 if body_weight else 0.0,
+        "progressionMode": "DOUBLE_PROGRESSION" if body_weight else "AUTO_REGULATION",
+        "minReps": 5,
+        "maxReps": 12,
+        "muscleGroups": rng.sample(MUSCLE_GROUPS, 2),
+        "_baseWeight": base_weight,
+    }
+
+
+def _heart_rate_samples(rng: random.Random, count: int, resting: int, maximum: int) -> list[int]:
+    samples = []
+    value = float(resting + 30)
+    for _ in range(count):
+        value += rng.uniform(-4, 4.5)
+        value = min(max(value, resting + 10), maximum - 5)
+        samples.append(int(value))
+    if samples and rng.random() < 0.05:
+        samples[rng.randrange(len(samples))] = 0
+    return samples
+
+
+def generate_backup(
+    sessions: int,
+    *,
+    seed: int = 0,
+    workouts: int = 4,
+    exercises_per_workout: int = 5,
+    workout_versions: int = 3,
+    work_sets: int = 3,
+    heart_rate_samples: int = 900,
+    start: date = date(2018, 1, 1),
+) -> dict[str, Any]:
+    """Seeded synthetic AppBackup with versioned workouts and realistic per-session histories."""
+    rng = random.Random(seed)
+    new_id = _IdFactory(rng)
+    equipment_id = new_id()
+    accessory_id = new_id()
+    resting_hr, max_hr = 55, 190
+    body_weight = 80.0
+
+    exercise_pool = [
+        _exercise_definition(rng, new_id, name, body_weight=False, equipment_id=equipment_id, accessory_id=accessory_id)
+        for name in WEIGHT_EXERCISE_NAMES
+    ] + [
+        _exercise_definition(rng, new_id, name, body_weight=True, equipment_id=equipment_id, accessory_id=accessory_id)
+        for name in BODY_WEIGHT_EXERCISE_NAMES
+    ]
+    base_weights = {exercise["id"]: exercise.pop("_baseWeight") for exercise in exercise_pool}
+
+    workout_defs: list[dict[str, Any]] = []
+    versions_by_workout: list[list[dict[str, Any]]] = []
+    for workout_index in range(workouts):
+        exercises = rng.sample(exercise_pool, min(exercises_per_workout, len(exercise_pool)))
+        chain: list[dict[str, Any]] = []
+        for version in range(workout_versions):
+            chain.append({
+                "id": new_id(),
+                "name": f"Workout {chr(ord('A') + workout_index)}",
+                "description": f"Synthetic workout version {version + 1}",
+                "order": workout_index,
+                "enabled": True,
+                "isActive": version == workout_versions - 1,
+                "workoutComponents": [dict(exercise) for exercise in exercises],
+            })
+        for previous, following in zip(chain, chain[1:]):
+            previous["nextVersionId"] = following["id"]
+            following["previousVersionId"] = previous["id"]
+        workout_defs.extend(chain)
+        versions_by_workout.append(chain)
+
+    workout_histories: list[dict[str, Any]] = []
+    set_histories: list[dict[str, Any]] = []
+    rest_histories: list[dict[str, Any]] = []
+    progressions: list[dict[str, Any]] = []
+    sessions_per_day = max(1, -(-sessions // 3650))
+    for index in range(sessions):
+        day = start + timedelta(days=index // sessions_per_day)
+        started = datetime(day.year, day.month, day.day, 6 + (index % sessions_per_day) % 16, rng.randrange(60))
+        chain = versions_by_workout[index % workouts]
+        workout = chain[min(index * len(chain) // max(sessions, 1), len(chain) - 1)]
+        session_id = new_id()
+        duration = rng.randint(2400, 5400)
+        workout_histories.append({
+            "id": session_id,
+            "workoutId": workout["id"],
+            "date": day.isoformat(),
+            "time": started.strftime("%H:%M"),
+            "startTime": started.isoformat(),
+            "duration": duration,
+            "heartBeatRecords": _heart_rate_samples(rng, heart_rate_samples, resting_hr, max_hr),
+            "isDone": rng.random() > 0.02,
+        })
+        progress = index / max(sessions, 1)
+        sequence = 0
+        cursor = started
+        for order, exercise in enumerate(workout["workoutComponents"]):
+            exercise_id = exercise["id"]
+            is_body_weight = exercise["exerciseType"] == "BODY_WEIGHT"
+            weight = round(base_weights[exercise_id] * (1 + 0.3 * progress) * rng.uniform(0.95, 1.05) / 2.5) * 2.5
+            planned_reps = exercise["sets"][0]["reps"]
+            planned_rest = exercise["sets"][1]["timeInSeconds"]
+            executed_volume = 0.0
+            for set_index in range(work_sets + (0 if is_body_weight else 1)):
+                warmup = not is_body_weight and set_index == 0
+                reps = planned_reps + rng.randint(-2, 2) if not warmup else 5
+                set_weight = round(weight * 0.5 / 2.5) * 2.5 if warmup else weight
+                if is_body_weight:
+                    additional = float(rng.choice((0.0, 0.0, 5.0, 10.0)))
+                    volume = (body_weight + additional) * reps
+                    set_data = {
+                        "type": "BodyWeightSetData",
+                        "actualReps": reps,
+                        "additionalWeight": additional,
+                        "relativeBodyWeightInKg": body_weight,
+                        "bodyWeightPercentageSnapshot": 100.0,
+                        "volume": volume,
+                        "subCategory": "WorkSet",
+                    }
+                else:
+                    volume = set_weight * reps
+                    set_data = {
+                        "type": "WeightSetData",
+                        "actualReps": reps,
+                        "actualWeight": set_weight,
+                        "volume": volume,
+                        "subCategory": "WarmupSet" if warmup else "WorkSet",
+                    }
+                if not warmup:
+                    executed_volume += volume
+                set_end = cursor + timedelta(seconds=rng.randint(20, 60))
+                set_histories.append({
+                    "id": new_id(),
+                    "workoutHistoryId": session_id,
+                    "exerciseId": exercise_id,
+                    "setId": exercise["sets"][0]["id"],
+                    "order": sequence,
+                    "executionSequence": sequence,
+                    "skipped": rng.random() < 0.01,
+                    "startTime": cursor.isoformat(),
+                    "endTime": set_end.isoformat(),
+                    "equipmentIdSnapshot": exercise["equipmentId"],
+                    "setData": set_data,
+                })
+                sequence += 1
+                elapsed = rng.randint(planned_rest - 20, planned_rest + 40)
+                rest_end = set_end + timedelta(seconds=elapsed)
+                set_histories.append({
+                    "id": new_id(),
+                    "workoutHistoryId": session_id,
+                    "exerciseId": exercise_id,
+                    "setId": exercise["sets"][1]["id"],
+                    "order": sequence,
+                    "executionSequence": sequence,
+                    "skipped": False,
+                    "startTime": set_end.isoformat(),
+                    "endTime": rest_end.isoformat(),
+                    "setData": {"type": "RestSetData", "startTimer": planned_rest, "endTimer": 0, "subCategory": "WorkSet"},
+                })
+                sequence += 1
+                cursor = rest_end
+            rest_histories.append({
+                "id": new_id(),
+                "workoutHistoryId": session_id,
+                "exerciseId": exercise_id,
+                "order": order,
+                "elapsedSeconds": rng.randint(90, 240),
+                "plannedSeconds": 180,
+            })
+            expected_volume = weight * planned_reps * work_sets if not is_body_weight else body_weight * planned_reps * work_sets
+            progressions.append({
+                "id": new_id(),
+                "workoutHistoryId": session_id,
+                "exerciseId": exercise_id,
+                "expectedSets": [{"weight": weight, "reps": planned_reps} for _ in range(work_sets)],
+                "progressionState": rng.choice(("PROGRESS", "DELOAD", "RETRY")),
+                "vsExpected": rng.choice(("ABOVE", "EQUAL", "BELOW")),
+                "vsPrevious": rng.choice(("ABOVE", "EQUAL", "BELOW")),
+                "previousSessionVolume": round(expected_volume * rng.uniform(0.9, 1.0), 2),
+                "expectedVolume": round(expected_volume, 2),
+                "executedVolume": round(executed_volume, 2),
+            })
+
+    return {
+        "WorkoutStore": {
+            "birthDateYear": 1990,
+            "weightKg": body_weight,
+            "measuredMaxHeartRate": max_hr,
+            "restingHeartRate": resting_hr,
+            "progressionPercentageAmount": 2.5,
+            "equipments": [
+                {
+                    "id": equipment_id,
+                    "type": "BARBELL",
+                    "name": "Synthetic Barbell",
+                    "barWeight": 20.0,
+                    "availablePlates": [{"weight": weight} for weight in (25.0, 20.0, 15.0, 10.0, 5.0, 2.5, 1.25)],
+                }
+            ],
+            "accessoryEquipments": [{"id": accessory_id, "type": "ACCESSORY", "name": "Pull-Up Bar"}],
+            "workouts": workout_defs,
+        },
+        "WorkoutHistories": workout_histories,
+        "SetHistories": set_histories,
+        "RestHistories": rest_histories,
+        "ExerciseSessionProgressions": progressions,
+        "ExerciseInfos": [],
+        "WorkoutSchedules": [],
+        "WorkoutRecords": [],
+    }
+
+
+def write_backup(path: Path, backup: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(backup, handle, separators=(",", ":"))
+
+
+def _exporter_operations(store: WorkoutHistoryStore) -> dict[str, Callable[[WorkoutHistoryStore], Any]]:
+    """Exporter calls to time, aimed at the latest session and the most-recorded exercise."""
+    sessions = store.completed_sessions()
+    latest = sessions[-1] if sessions else {}
+    set_counts = {exercise_id: len(store.sets_for_exercise(exercise_id)) for exercise_id in store.exercises_by_id()}
+    busiest_exercise = max(set_counts, key=set_counts.__getitem__) if set_counts else ""
+    workout_name = (store.workout_by_id(latest.get("workoutId")) or {}).get("name")
+    return {
+        "session_list": lambda current: session_list(current),
+        "session_list_filtered": lambda current: session_list(current, workout_name=workout_name),
+        "list_exercises_data": lambda current: list_exercises_data(current),
+        "session_markdown": lambda current: session_markdown(current, str(latest.get("id"))),
+        "exercise_history_markdown": lambda current: exercise_history_markdown(current, busiest_exercise),
+        "summary_markdown": lambda current: summary_markdown(current),
+    }
+
+
+def _store_loads(
+    backup_path: Path, history_cache_path: Path
+) -> dict[str, tuple[Callable[[], WorkoutHistoryStore], bool, str | None]]:
+    """Each way a store gets loaded: (load, whether calling it again is a warm hit, exporter name prefix).
+
+    `store_cache_get` is the server's default path and the SQLite loads are its
+    MYWORKOUT_HISTORY_CACHE_PATH path; reopening is a restart against an already ingested cache.
+    """
+    compact_cache = StoreCache()
+    sqlite_cache = StoreCache(history_cache_path=history_cache_path)
+    return {
+        "load_store": (lambda: load_store(backup_path), False, ""),
+        "load_compact_store": (lambda: load_compact_store(backup_path), False, None),
+        "store_cache_get": (lambda: compact_cache.get(backup_path), True, "compact:"),
+        "sqlite_cache_ingest": (lambda: sqlite_cache.get(backup_path), True, None),
+        "sqlite_cache_reopen": (lambda: StoreCache(history_cache_path=history_cache_path).get(backup_path), False, "sqlite:"),
+    }
+
+
+def _timed(operation: Callable[[], Any]) -> tuple[float, Any]:
+    started = time.perf_counter()
+    result = operation()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def run_benchmarks(backup_path: Path, repeats: int = 3) -> dict[str, dict[str, float]]:
+    """Time each load and exporter cold (first call on a fresh store) and warm, then measure peak memory once.
+
+    Exporters run on the plain `load_store` store and, prefixed `compact:` and `sqlite:`, on
+    the stores the server serves through StoreCache.
+    """
+    cold: dict[str, list[float]] = {name: [] for name in BENCHMARK_NAMES}
+    warm: dict[str, list[float]] = {name: [] for name in BENCHMARK_NAMES}
+    operations: dict[str, Callable[[WorkoutHistoryStore], Any]] = {}
+    peaks: dict[str, float] = {}
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as scratch:
+        for repeat in range(max(repeats, 1)):
+            loads = _store_loads(backup_path, Path(scratch) / f"history_{repeat}.sqlite3")
+            for load_name, (load, reloads_warm, prefix) in loads.items():
+                gc.collect()
+                elapsed, store = _timed(load)
+                cold[load_name].append(elapsed)
+                if reloads_warm:
+                    warm[load_name].append(_timed(load)[0])
+                if prefix is None:
+                    continue
+                operations = operations or _exporter_operations(store)
+                for name, operation in operations.items():
+                    cold[prefix + name].append(_timed(lambda: operation(store))[0])
+                    warm[prefix + name].append(_timed(lambda: operation(store))[0])
+                del store
+            del loads
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            loads = _store_loads(backup_path, Path(scratch) / "history_peak.sqlite3")
+            for load_name, (load, _, prefix) in loads.items():
+                resident_bytes = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                store = load()
+                peaks[load_name] = (tracemalloc.get_traced_memory()[1] - resident_bytes) / 1024
+                for name, operation in operations.items() if prefix is not None else ():
+                    resident_bytes = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    operation(store)
+                    peaks[prefix + name] = (tracemalloc.get_traced_memory()[1] - resident_bytes) / 1024
+                del store
+            del loads
+        finally:
+            tracemalloc.stop()
+
+    results: dict[str, dict[str, float]] = {}
+    for name in BENCHMARK_NAMES:
+        results[name] = {"cold_ms": round(statistics.median(cold[name]), 3), "peak_kib": round(peaks[name], 1)}
+        if warm[name]:
+            results[name]["warm_ms"] = round(statistics.median(warm[name]), 3)
+    return results
+
+
+def compare_to_baseline(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[dict[str, Any]]:
+    """Return one entry per metric that grew more than `tolerance` over the baseline."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = (baseline.get(name) or {}).get(metric)
+            if not isinstance(previous, (int, float)) or previous <= 0:
+                continue
+            ratio = value / previous
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": previous,
+                    "current": value,
+                    "ratio": round(ratio, 3),
+                })
+    return regressions
+
+
+def _print_results(results: dict[str, dict[str, float]], regressions: list[dict[str, Any]]) -> None:
+    print(f"{'benchmark':<36}{'cold ms':>12}{'warm ms':>12}{'peak KiB':>14}")
+    for name, metrics in results.items():
+        warm = metrics.get("warm_ms")
+        print(f"{name:<36}{metrics['cold_ms']:>12.3f}{'' if warm is None else f'{warm:.3f}':>12}{metrics['peak_kib']:>14.1f}")
+    for item in regressions:
+        print(
+            f"REGRESSION {item['benchmark']}.{item['metric']}: {item['baseline']} -> {item['current']} (x{item['ratio']})",
+            file=sys.stderr,
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark workout_history_mcp exporters against synthetic backups.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_generator_args(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("--sessions", type=int, default=1000)
+        subparser.add_argument("--seed", type=int, default=0)
+        subparser.add_argument("--workouts", type=int, default=4)
+        subparser.add_argument("--exercises-per-workout", type=int, default=5)
+        subparser.add_argument("--workout-versions", type=int, default=3)
+        subparser.add_argument("--heart-rate-samples", type=int, default=900)
+
+    generate = subparsers.add_parser("generate", help="Write a seeded synthetic AppBackup JSON.")
+    add_generator_args(generate)
+    generate.add_argument("--output", type=Path, required=True)
+
+    run = subparsers.add_parser("run", help="Time exporters and compare against a stored baseline.")
+    add_generator_args(run)
+    run.add_argument("--backup", type=Path, help="Existing backup to benchmark instead of generating one.")
+    run.add_argument("--work-dir", type=Path, default=Path("build") / "workout_history_mcp_bench")
+    run.add_argument("--repeats", type=int, default=3)
+    run.add_argument("--baseline", type=Path, help="Baseline JSON to compare against.")
+    run.add_argument("--write-baseline", type=Path, help="Write this run's results as a new baseline.")
+    run.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed growth before a metric regresses.")
+    run.add_argument("--output", type=Path, help="Write the full report JSON here.")
+    return parser
+
+
+def _generator_kwargs(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "seed": args.seed,
+        "workouts": args.workouts,
+        "exercises_per_workout": args.exercises_per_workout,
+        "workout_versions": args.workout_versions,
+        "heart_rate_samples": args.heart_rate_samples,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "generate":
+        write_backup(args.output, generate_backup(args.sessions, **_generator_kwargs(args)))
+        print(args.output)
+        return 0
+
+    backup_path = args.backup
+    generated = None
+    if backup_path is None:
+        generated = {"sessions": args.sessions, **_generator_kwargs(args)}
+        backup_path = args.work_dir / f"synthetic_{args.sessions}_seed{args.seed}.json"
+        if not backup_path.exists():
+            write_backup(backup_path, generate_backup(args.sessions, **_generator_kwargs(args)))
+    results = run_benchmarks(backup_path, repeats=args.repeats)
+    baseline = read_json(args.baseline).get("results", {}) if args.baseline else {}
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    report = {
+        "run": utc_run_stamp(),
+        "python": platform.python_version(),
+        "backup": str(backup_path),
+        "backup_bytes": backup_path.stat().st_size,
+        "generated": generated,
+        "repeats": args.repeats,
+        "results": results,
+        "regressions": regressions,
+    }
+    _print_results(results, regressions)
+    if args.output:
+        write_json(args.output, report)
+    if args.write_baseline:
+        write_json(args.write_baseline, report)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Merge MyWorkoutAssistant AppBackup JSON files into one unified backup.
 
-The script scans one or more files/directories, loads every valid AppBackup JSON,
-orders them from oldest to newest, and merges entities while preferring the latest
-revision of each record. It is intended for recovery scenarios where some workout
+The script scans one or more files/directories, orders every valid AppBackup JSON
+from oldest to newest, and streams each one into the merge record by record while
+preferring the latest revision of each record, so only the merged result is held in
+memory. It is intended for recovery scenarios where some workout
 histories were deleted in newer backups and need to be restored from older ones.
 """
 
@@ -16,11 +17,19 @@ import re
 import sys
 from copy import deepcopy
 from dataclasses import dataclass
+from collections.abc import Iterator
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from workout_history_mcp.streaming import iter_backup_members  # noqa: E402
+
+
 JSONDict = dict[str, Any]
 JSONList = list[Any]
 
@@ -30,11 +39,39 @@ BACKUP_TIMESTAMP_PATTERNS = (
 )
 
 
+RECORD_LIST_KEYS = (
+    "WorkoutHistories",
+    "SetHistories",
+    "ExerciseInfos",
+    "WorkoutSchedules",
+    "WorkoutRecords",
+    "ExerciseSessionProgressions",
+    "ErrorLogs",
+)
+
+
 @dataclass(frozen=True)
 class LoadedBackup:
     path: Path
     sort_key: tuple[float, str]
-    data: JSONDict
+    data: JSONDict | None = None
+
+    def iter_members(self) -> Iterator[tuple[str, Any]]:
+        """Yield top-level members, one `(key, record)` pair per record of the record lists.
+
+        Backups without in-memory `data` are streamed from `path`.
+        """
+        if self.data is None:
+            for key, value, is_item in iter_backup_members(self.path, stream_keys=RECORD_LIST_KEYS):
+                if is_item or key not in RECORD_LIST_KEYS:
+                    yield key, value
+            return
+        for key, value in self.data.items():
+            if key not in RECORD_LIST_KEYS:
+                yield key, value
+            elif isinstance(value, list):
+                for item in value:
+                    yield key, item
 
 
 def parse_args() -> argparse.Namespace:
@@ -126,6 +163,15 @@ def read_json_file(path: Path) -> Any:
         return json.load(handle)
 
 
+def classify_backup_file(path: Path) -> str:
+    """Classify a JSON file by streaming it; records are decoded and dropped one at a time."""
+    try:
+        keys = {key for key, _, _ in iter_backup_members(path, stream_keys=RECORD_LIST_KEYS)}
+    except json.JSONDecodeError:
+        return classify_backup(read_json_file(path))
+    return classify_backup(dict.fromkeys(keys))
+
+
 def classify_backup(document: Any) -> str:
     if not isinstance(document, dict):
         return "unknown"
@@ -236,30 +282,23 @@ def merge_workout_store(current: JSONDict | None, candidate: JSONDict) -> JSONDi
 
 def merge_top_level_records(backups: list[LoadedBackup]) -> JSONDict:
     workout_store: JSONDict | None = None
-    workout_histories: dict[str, JSONDict] = {}
-    set_histories: dict[str, JSONDict] = {}
-    exercise_infos: dict[str, JSONDict] = {}
-    workout_schedules: dict[str, JSONDict] = {}
-    workout_records: dict[str, JSONDict] = {}
-    exercise_session_progressions: dict[str, JSONDict] = {}
-    error_logs: dict[str, JSONDict] = {}
+    record_maps: dict[str, dict[str, JSONDict]] = {key: {} for key in RECORD_LIST_KEYS}
 
     for loaded in backups:
-        backup = loaded.data
-        workout_store_data = backup.get("WorkoutStore")
-        if isinstance(workout_store_data, dict):
-            workout_store = merge_workout_store(workout_store, workout_store_data)
-
-        merge_record_map(workout_histories, backup.get("WorkoutHistories", []) or [])
-        merge_record_map(set_histories, backup.get("SetHistories", []) or [])
-        merge_record_map(exercise_infos, backup.get("ExerciseInfos", []) or [])
-        merge_record_map(workout_schedules, backup.get("WorkoutSchedules", []) or [])
-        merge_record_map(workout_records, backup.get("WorkoutRecords", []) or [])
-        merge_record_map(
-            exercise_session_progressions,
-            backup.get("ExerciseSessionProgressions", []) or [],
-        )
-        merge_record_map(error_logs, backup.get("ErrorLogs", []) or [])
+        for key, value in loaded.iter_members():
+            if key == "WorkoutStore":
+                if isinstance(value, dict):
+                    workout_store = merge_workout_store(workout_store, value)
+            elif key in record_maps:
+                merge_record(record_maps[key], value)
+
+    workout_histories = record_maps["WorkoutHistories"]
+    set_histories = record_maps["SetHistories"]
+    exercise_infos = record_maps["ExerciseInfos"]
+    workout_schedules = record_maps["WorkoutSchedules"]
+    workout_records = record_maps["WorkoutRecords"]
+    exercise_session_progressions = record_maps["ExerciseSessionProgressions"]
+    error_logs = record_maps["ErrorLogs"]
 
     if workout_store is None:
         raise ValueError("No AppBackup WorkoutStore content was found in the provided files.")
@@ -299,20 +338,17 @@ def merge_top_level_records(backups: list[LoadedBackup]) -> JSONDict:
     }
 
 
-def merge_record_map(target: dict[str, JSONDict], items: Any) -> None:
-    if not isinstance(items, list):
+def merge_record(target: dict[str, JSONDict], item: Any) -> None:
+    if not isinstance(item, dict):
         return
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        item_id = item.get("id")
-        if item_id is None:
-            continue
-        item_id_text = str(item_id)
-        if item_id_text in target:
-            target[item_id_text] = deepcopy(choose_latest_record(target[item_id_text], item))
-        else:
-            target[item_id_text] = deepcopy(item)
+    item_id = item.get("id")
+    if item_id is None:
+        return
+    item_id_text = str(item_id)
+    if item_id_text in target:
+        target[item_id_text] = deepcopy(choose_latest_record(target[item_id_text], item))
+    else:
+        target[item_id_text] = deepcopy(item)
 
 
 def canonicalize_set_histories(set_histories: dict[str, JSONDict]) -> dict[str, JSONDict]:
@@ -421,19 +457,19 @@ def maybe_load_backup(
     verbose: bool,
 ) -> LoadedBackup | None:
     try:
-        document = read_json_file(path)
+        file_type = classify_backup_file(path)
     except Exception as exc:
         if verbose:
             print(f"Skipping unreadable JSON: {path} ({exc})", file=sys.stderr)
         return None
 
-    file_type = classify_backup(document)
     if file_type == "app_backup":
         if verbose:
-            print(f"Loaded AppBackup: {path}", file=sys.stderr)
-        return LoadedBackup(path=path, sort_key=build_sort_key(path), data=document)
+            print(f"Found AppBackup: {path}", file=sys.stderr)
+        return LoadedBackup(path=path, sort_key=build_sort_key(path))
 
     if file_type == "workout_store" and include_workout_store_only:
+        document = read_json_file(path)
         wrapped = {
             "WorkoutStore": document,
             "WorkoutHistories": [],
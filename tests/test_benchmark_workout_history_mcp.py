@@ -0,0 +1,38 @@
+import importlib.util
+from pathlib import Path
+
+from workout_history_mcp.exporters import session_list
+from workout_history_mcp.loader import load_store
+
+
+SCRIPT_PATH = Path(__file__).parents[1] / "scripts" / "benchmark_workout_history_mcp.py"
+SPEC = importlib.util.spec_from_file_location("benchmark_workout_history_mcp", SCRIPT_PATH)
+assert SPEC and SPEC.loader
+BENCHMARK = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(BENCHMARK)
+
+
+def test_synthetic_backup_is_seeded_and_benchmarks_report_regressions(tmp_path):
+    backup = BENCHMARK.generate_backup(12, seed=7, heart_rate_samples=30)
+    assert backup == BENCHMARK.generate_backup(12, seed=7, heart_rate_samples=30)
+    assert len(backup["WorkoutHistories"]) == 12
+    assert len(backup["WorkoutStore"]["workouts"]) == 12
+    assert sum(1 for workout in backup["WorkoutStore"]["workouts"] if workout["isActive"]) == 4
+    assert {item["setData"]["type"] for item in backup["SetHistories"]} >= {"WeightSetData", "BodyWeightSetData", "RestSetData"}
+
+    backup_path = tmp_path / "synthetic.json"
+    BENCHMARK.write_backup(backup_path, backup)
+    store = load_store(backup_path)
+    assert session_list(store)["total"] == len(store.completed_sessions())
+
+    results = BENCHMARK.run_benchmarks(backup_path, repeats=1)
+    assert set(results) == set(BENCHMARK.BENCHMARK_NAMES)
+    assert "warm_ms" not in results["load_store"]
+    assert {"store_cache_get", "sqlite_cache_ingest", "sqlite_cache_reopen", "sqlite:session_list"} <= set(results)
+    assert results["store_cache_get"]["warm_ms"] < results["store_cache_get"]["cold_ms"]
+    assert all(metrics["cold_ms"] >= 0 for metrics in results.values())
+
+    current = {"session_list": {"cold_ms": 12.0, "warm_ms": 1.05, "peak_kib": 300.0}}
+    baseline = {"session_list": {"cold_ms": 10.0, "warm_ms": 1.0, "peak_kib": 100.0}}
+    regressions = BENCHMARK.compare_to_baseline(current, baseline, tolerance=0.1)
+    assert [(item["metric"], item["ratio"]) for item in regressions] == [("cold_ms", 1.2), ("peak_kib", 3.0)]
@@ -417,6 +417,94 @@ def test_resume_progress_targets_generation_progress_not_archived_history(
     ]
 
 
+def test_generation_progress_checkpoints_append_deltas_and_list_from_index(tmp_path: Path) -> None:
+    from workout_generator_pkg.paths import get_progress_dir
+    from workout_generator_pkg.progress import (
+        delete_progress_file,
+        list_available_progress,
+        load_generation_progress,
+        save_generation_progress,
+    )
+
+    id_manager = SimpleNamespace(get_state=lambda: {"next_id": 7})
+    workouts = [{"id": f"w{i}", "name": f"Workout {i}", "exercises": list(range(40))} for i in range(5)]
+    step_data: dict[str, object] = {"step_1_workouts": workouts}
+    for step in range(1, 5):
+        step_data[f"step_{step}_summary"] = {"completed": step}
+        save_generation_progress(
+            "checkpoint-session-1234", step, step_data, "prompt", "hash", id_manager, script_dir=str(tmp_path)
+        )
+
+    progress_dir = Path(get_progress_dir(str(tmp_path)))
+    logs = list(progress_dir.glob("*.jsonl"))
+    assert len(logs) == 1
+    records = [json.loads(line) for line in logs[0].read_text(encoding="utf-8").splitlines()]
+    assert records[0]["kind"] == "base"
+    assert [record["kind"] for record in records[1:]] == ["delta"] * 3
+
+    loaded = load_generation_progress("checkpoint-session-1234", script_dir=str(tmp_path))
+    assert loaded is not None
+    assert loaded["current_step"] == 4
+    assert loaded["step_data"] == json.loads(json.dumps(step_data))
+
+    logs[0].write_text("not json\n", encoding="utf-8")
+    [listed] = list_available_progress(str(tmp_path))
+    assert listed["session_id"] == "checkpoint-session-1234"
+    assert listed["current_step"] == 4
+
+    assert delete_progress_file("checkpoint-session-1234", script_dir=str(tmp_path))
+    assert list_available_progress(str(tmp_path)) == []
+
+
+def test_generation_progress_checkpoint_recovers_from_torn_append(tmp_path: Path) -> None:
+    from workout_generator_pkg import progress
+    from workout_generator_pkg.paths import get_progress_dir
+
+    id_manager = SimpleNamespace(get_state=lambda: {"next_id": 7})
+    step_data: dict[str, object] = {"step_1_workouts": [{"id": f"w{i}", "exercises": list(range(40))} for i in range(5)]}
+
+    def save(step: int) -> None:
+        step_data[f"step_{step}_summary"] = {"completed": step}
+        progress.save_generation_progress(
+            "torn-session", step, step_data, "prompt", "hash", id_manager, script_dir=str(tmp_path)
+        )
+
+    save(1)
+    save(2)
+    log = Path(get_progress_dir(str(tmp_path))) / "checkpoint_torn-session.jsonl"
+    with log.open("a", encoding="utf-8") as f:
+        f.write('{"kind":"delta","step":3,"pat')
+    progress._last_checkpoint_states.clear()
+    save(4)
+    save(5)
+    progress._last_checkpoint_states.clear()
+
+    loaded = progress.load_generation_progress("torn-session", script_dir=str(tmp_path))
+    assert loaded is not None
+    assert loaded["current_step"] == 5
+    assert loaded["step_data"] == json.loads(json.dumps(step_data))
+    assert all(json.loads(line) for line in log.read_text(encoding="utf-8").splitlines())
+
+
+def test_generation_progress_resolves_only_its_own_checkpoint_log(tmp_path: Path) -> None:
+    from workout_generator_pkg import progress
+
+    id_manager = SimpleNamespace(get_state=lambda: {})
+    for session_id, step in (("abcdefgh-first", 2), ("abcdefgh-second", 5), ("other-session", 1)):
+        progress.save_generation_progress(
+            session_id, step, {"step_0_context_summary": session_id}, "prompt", "hash", id_manager, script_dir=str(tmp_path)
+        )
+
+    assert len(progress._last_checkpoint_states) == progress.MAX_CACHED_CHECKPOINT_STATES
+    first = progress.load_generation_progress("abcdefgh-first", script_dir=str(tmp_path))
+    assert (first["session_id"], first["current_step"]) == ("abcdefgh-first", 2)
+    assert progress.load_generation_progress("abcdefgh", script_dir=str(tmp_path)) is None
+    assert progress.load_generation_progress("other", script_dir=str(tmp_path))["session_id"] == "other-session"
+
+    assert progress.delete_progress_file("abcdefgh-first", script_dir=str(tmp_path))
+    assert progress.load_generation_progress("abcdefgh-second", script_dir=str(tmp_path))["current_step"] == 5
+
+
 def test_show_turns_hides_tool_and_emitter_payloads_but_keeps_placeholder(
     monkeypatch: pytest.MonkeyPatch,
     tmp_path: Path,
@@ -234,6 +234,293 @@ def test_barbell_totals_match_shared_logic_without_double_counting_bar_weight():
     assert 80.0 not in totals
 
 
+
+def test_plate_totals_match_recursive_subsets_and_scale_to_large_plate_sets():
+    from workout_generator_pkg.domain_ops import achievable_weight_totals
+    from workout_generator_pkg.domain_ops import generate_recursive_valid_subsets
+
+    plates = [
+        {"weight": weight, "thickness": thickness}
+        for weight, thickness in [(1.25, 10), (2.5, 15), (2.5, 15), (5.0, 20), (10.0, 25), (10.0, 25), (20.0, 30)]
+    ]
+    fits = lambda combination: sum(plate["thickness"] for plate in combination) <= 60
+    expected = {sum(plate["weight"] for plate in combo) for combo in generate_recursive_valid_subsets(plates, fits)}
+
+    assert achievable_weight_totals(plates, cost=lambda weight, thickness: thickness, max_cost=60) == expected
+    assert achievable_weight_totals(plates, cost=lambda weight, thickness: 1, max_cost=2) == {
+        sum(plate["weight"] for plate in combo) for combo in generate_recursive_valid_subsets(plates, max_extra_per_point=2)
+    }
+
+    barbell = {
+        "id": "EQUIPMENT_0",
+        "type": "BARBELL",
+        "name": "Competition Barbell",
+        "availablePlates": [
+            {"weight": weight, "thickness": 20.0} for weight in [0.5, 1.25, 2.5, 5.0, 10.0, 15.0, 20.0, 25.0] * 4
+        ],
+        "sleeveLength": 400,
+        "barWeight": 20.0,
+    }
+    totals = calculate_equipment_weight_combinations(barbell)
+
+    assert min(totals) == 20.0
+    # A 400mm sleeve holds 20 of the 32 plates: the heaviest five sizes, four of each.
+    assert max(totals) == 20.0 + 2 * (25.0 + 20.0 + 15.0 + 10.0 + 5.0) * 4
+    assert calculate_equipment_weight_combinations(dict(barbell)) == totals
+
+
+
+def test_emitter_response_cache_serves_identical_requests_from_disk(monkeypatch, tmp_path):
+    from workout_generator_pkg.response_cache import ResponseCache
+
+    calls = []
+
+    def fake_reasoner(client, messages, custom_prompt, show_loading=False, logger=None):
+        calls.append(messages)
+        return json.dumps({"id": "EQUIPMENT_0", "type": "WEIGHTVEST", "name": "Vest", "availableWeights": [{"weight": 5.0}]})
+
+    monkeypatch.setattr(cli, "json_call_reasoner_only_with_loading", fake_reasoner)
+    cache = ResponseCache(str(tmp_path), max_bytes=10_000)
+    plan_index = {"equipments": [{"id": "EQUIPMENT_0", "type": "WEIGHTVEST", "name": "Vest"}]}
+
+    first, _ = cli.emit_equipment_item("EQUIPMENT_0", None, "summary", plan_index, response_cache=cache)
+    second, _ = cli.emit_equipment_item("EQUIPMENT_0", None, "summary", plan_index, response_cache=cache)
+    plan_index["equipments"][0]["name"] = "Heavy Vest"
+    cli.emit_equipment_item("EQUIPMENT_0", None, "summary", plan_index, response_cache=cache)
+
+    assert first == second
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.max_bytes = 0
+    cache.put("newest", "{}")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_response_cache_tracks_size_and_scans_only_to_evict(tmp_path):
+    from workout_generator_pkg.response_cache import ResponseCache
+
+    ResponseCache(str(tmp_path), max_bytes=10_000).put("existing", "x" * 100)
+    cache = ResponseCache(str(tmp_path), max_bytes=1_000)
+    scans = []
+    scan_entries = cache._entries
+    cache._entries = lambda: scans.append(1) or scan_entries()
+
+    for index in range(5):
+        cache.put(f"key{index}", "{}")
+    assert scans == []
+    assert cache.total_bytes == sum(path.stat().st_size for path in tmp_path.iterdir())
+
+    cache.put("large", "x" * 600)
+    assert len(scans) == 1
+    assert cache.total_bytes == sum(path.stat().st_size for path in tmp_path.iterdir()) <= 900
+    assert (tmp_path / "large.json").exists()
+
+
+def test_emitter_response_cache_drops_replies_the_emitter_rejects(monkeypatch, tmp_path):
+    from workout_generator_pkg.response_cache import ResponseCache
+
+    replies = ['{"id": "EQUIPMENT_0", "name": "Bar', json.dumps({"id": "EQUIPMENT_0", "type": "WEIGHTVEST", "name": "Vest"})]
+    calls = []
+
+    def fake_reasoner(client, messages, custom_prompt, show_loading=False, logger=None):
+        calls.append(messages)
+        return replies[len(calls) - 1]
+
+    monkeypatch.setattr(cli, "json_call_reasoner_only_with_loading", fake_reasoner)
+    cache = ResponseCache(str(tmp_path), max_bytes=10_000)
+    plan_index = {"equipments": [{"id": "EQUIPMENT_0", "type": "WEIGHTVEST", "name": "Vest"}]}
+
+    with pytest.raises(ValueError, match="Failed to parse equipment JSON"):
+        cli.emit_equipment_item("EQUIPMENT_0", None, "summary", plan_index, response_cache=cache)
+    assert list(tmp_path.iterdir()) == []
+
+    item, _ = cli.emit_equipment_item("EQUIPMENT_0", None, "summary", plan_index, response_cache=cache)
+    assert item["name"] == "Vest"
+    assert len(calls) == 2
+
+
+
+def test_parallel_emit_items_backs_off_on_rate_limits_and_keeps_contract(monkeypatch):
+    from workout_generator_pkg import emission_engine
+
+    class FakeRateLimit(Exception):
+        status_code = 429
+
+    limits = emission_engine.EmissionLimits(requests_per_minute=600, max_concurrency=4)
+    monkeypatch.setattr(emission_engine, "_LIMITS", limits)
+    monkeypatch.setattr(emission_engine, "THROTTLE_BASE_DELAY", 0.0)
+    attempts = {}
+
+    def emitter(item_id, value):
+        attempts[item_id] = attempts.get(item_id, 0) + 1
+        if item_id == "EXERCISE_1" and attempts[item_id] == 1:
+            raise FakeRateLimit("rate limited")
+        if item_id == "EXERCISE_2":
+            raise ValueError("bad JSON")
+        return ({"id": item_id, "value": value}, {"item_id": item_id})
+
+    items = [(f"EXERCISE_{index}", {"value": index}) for index in range(4)]
+    results, conversations = cli.parallel_emit_items(items, emitter, "Emitting")
+
+    assert results == {
+        "EXERCISE_0": {"id": "EXERCISE_0", "value": 0},
+        "EXERCISE_1": {"id": "EXERCISE_1", "value": 1},
+        "EXERCISE_2": None,
+        "EXERCISE_3": {"id": "EXERCISE_3", "value": 3},
+    }
+    assert sorted(entry["item_id"] for entry in conversations) == ["EXERCISE_0", "EXERCISE_1", "EXERCISE_3"]
+    assert attempts == {"EXERCISE_0": 1, "EXERCISE_1": 2, "EXERCISE_2": 1, "EXERCISE_3": 1}
+    assert limits.concurrency.throttles == 1
+    assert limits.concurrency.limit < 4
+
+    with pytest.raises(RuntimeError, match="fail-fast"):
+        cli.parallel_emit_items(items, emitter, "Emitting", fail_fast=True)
+
+
+def test_emission_engine_is_the_only_retry_owner_for_connection_errors(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from workout_generator_pkg import api_client
+    from workout_generator_pkg import emission_engine
+
+    class APIConnectionError(Exception):
+        pass
+
+    requests = []
+
+    def create(**kwargs):
+        requests.append(kwargs["model"])
+        raise APIConnectionError("connection reset by peer")
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(api_client, "_log_connection_error", lambda *args: None)
+    monkeypatch.setattr(api_client.time, "sleep", lambda seconds: None)
+
+    async def no_sleep(seconds):
+        return None
+
+    limits = emission_engine.EmissionLimits(max_concurrency=2)
+    outcomes = emission_engine.run_emissions(
+        ["EXERCISE_0"], lambda item: api_client.json_call(client, []), limits=limits, sleep=no_sleep
+    )
+
+    assert isinstance(outcomes[0], APIConnectionError)
+    assert len(requests) == emission_engine.MAX_THROTTLE_RETRIES + 1
+    assert limits.concurrency.throttles == emission_engine.MAX_THROTTLE_RETRIES
+
+    requests.clear()
+    with pytest.raises(APIConnectionError):
+        api_client.json_call(client, [])
+    assert len(requests) == 5
+
+
+def test_stage_limits_share_rate_limit_backoff_with_the_process_limits():
+    from workout_generator_pkg import emission_engine
+
+    class FakeRateLimit(Exception):
+        status_code = 429
+
+    async def no_sleep(seconds):
+        return None
+
+    limits = emission_engine.EmissionLimits(max_concurrency=8)
+    stage_limits = limits.with_max_concurrency(2)
+    attempts = []
+
+    def call(item):
+        attempts.append(item)
+        if len(attempts) == 1:
+            raise FakeRateLimit("rate limited")
+        return item
+
+    outcomes = emission_engine.run_emissions(["EXERCISE_0"], call, limits=stage_limits, sleep=no_sleep)
+
+    assert outcomes == ["EXERCISE_0"]
+    assert stage_limits.concurrency is limits.concurrency
+    assert limits.concurrency.throttles == 1
+    assert limits.concurrency.limit < 8
+    assert stage_limits.in_flight_limit <= 2
+    assert limits.with_max_concurrency(64).max_in_flight == 8
+
+
+
+def test_pipelined_emit_items_starts_workouts_once_their_exercises_are_ready():
+    import threading
+
+    workout_1_done = threading.Event()
+    observed = {}
+    workout_calls = []
+
+    def exercise_emitter(item_id, value):
+        if item_id == "EXERCISE_2":
+            # Only finishes promptly if WORKOUT_1 did not wait for the whole exercise stage
+            observed["workout_1_ran_first"] = workout_1_done.wait(timeout=5)
+        if item_id == "EXERCISE_3":
+            raise ValueError("bad JSON")
+        return ({"id": item_id, "value": value}, None)
+
+    def workout_emitter(item_id, exercise_index):
+        workout_calls.append(item_id)
+        if item_id == "WORKOUT_1":
+            workout_1_done.set()
+        return ({"id": item_id, "exercises": sorted(exercise_index)}, {"item_id": item_id})
+
+    refs = {"WORKOUT_1": ["EXERCISE_1"], "WORKOUT_2": ["EXERCISE_1", "EXERCISE_2"], "WORKOUT_3": ["EXERCISE_3"]}
+    (exercises, _), (workouts, workout_convs) = cli.pipelined_emit_items(
+        [(f"EXERCISE_{index}", {"value": index}) for index in (1, 2, 3)],
+        exercise_emitter,
+        [(wo_id, lambda results, wo_id=wo_id: {"exercise_index": {ex: results[ex] for ex in refs[wo_id]}}) for wo_id in refs],
+        workout_emitter,
+        lambda wo_id: refs[wo_id],
+        "Emitting",
+    )
+
+    assert observed["workout_1_ran_first"] is True
+    assert exercises["EXERCISE_3"] is None
+    assert workouts["WORKOUT_3"] is None
+    assert sorted(workout_calls) == ["WORKOUT_1", "WORKOUT_2"]
+    assert workouts["WORKOUT_2"]["exercises"] == ["EXERCISE_1", "EXERCISE_2"]
+    assert [entry["item_id"] for entry in workout_convs] == workout_calls
+
+
+def test_workout_prompt_is_the_same_whether_emitted_early_or_in_step_4(monkeypatch):
+    from workout_generator_pkg.generation_pipeline import _workout_emitter_args_builder
+    from workout_generator_pkg.generation_pipeline import _workout_exercise_index
+
+    requests = []
+
+    def fake_reasoner(client, messages, custom_prompt, show_loading=False, logger=None):
+        requests.append(messages)
+        return json.dumps({"workoutMetadata": {"name": "Day A"}, "workoutComponents": []})
+
+    monkeypatch.setattr(cli, "json_call_reasoner_only_with_loading", fake_reasoner)
+    workout = {"id": "WORKOUT_0", "name": "Day A", "exerciseIds": ["EXERCISE_0"], "supersetGroups": [{"exerciseIds": ["EXERCISE_1"]}]}
+    plan_index = {"workouts": [workout]}
+    definitions = {
+        f"EXERCISE_{index}": {"id": f"EXERCISE_{index}", "name": f"Lift {index}", "exerciseType": "WEIGHT"}
+        for index in range(4)
+    }
+
+    early_args = _workout_emitter_args_builder(workout, None, "summary", plan_index, True, None)(definitions)
+    step_4_args = {
+        "client": None,
+        "context_summary": "summary",
+        "plan_index": plan_index,
+        "exercise_index": _workout_exercise_index(workout, definitions),
+        "use_reasoner": True,
+        "logger": None,
+    }
+    early, _ = cli.emit_workout_structure("WORKOUT_0", **early_args)
+    late, _ = cli.emit_workout_structure("WORKOUT_0", **step_4_args)
+
+    assert sorted(early_args["exercise_index"]) == ["EXERCISE_0", "EXERCISE_1"]
+    assert early_args["exercise_index"] == step_4_args["exercise_index"]
+    assert requests[0] == requests[1]
+    assert early == late
+
+
 def test_bodyweight_selectable_weights_include_zero_additional_load():
     equipment = {
         "id": "EQUIPMENT_0",
@@ -504,6 +791,140 @@ def test_placeholder_schema_accepts_alphanumeric_internal_placeholder_ids():
     validate(instance=workout_store, schema=placeholder_schema)
 
 
+
+def test_schema_validator_registry_compiles_once_and_validates_subtrees():
+    from workout_generator_pkg.schema_validation import PLACEHOLDER_SCHEMA, SCHEMA_VALIDATORS
+
+    workout = {
+        "id": "WORKOUT_D1",
+        "name": "Day 1",
+        "description": "",
+        "workoutComponents": [
+            {
+                "id": "EXERCISE_D1",
+                "type": "Exercise",
+                "enabled": True,
+                "name": "Triceps Pushdown",
+                "notes": "",
+                "sets": [{"id": "SET_A0", "type": "WeightSet", "reps": 12, "weight": 10.0, "subCategory": "WorkSet"}],
+                "exerciseType": "WEIGHT",
+                "minReps": 10,
+                "maxReps": 15,
+                "equipmentId": None,
+                "bodyWeightPercentage": None,
+                "generateWarmUpSets": False,
+                "progressionMode": "DOUBLE_PROGRESSION",
+                "keepScreenOn": False,
+                "showCountDownTimer": False,
+                "intraSetRestInSeconds": None,
+                "muscleGroups": ["FRONT_TRICEPS"],
+                "secondaryMuscleGroups": [],
+                "requiredAccessoryEquipmentIds": [],
+                "requiresLoadCalibration": True,
+                "exerciseCategory": "ISOLATION",
+            }
+        ],
+        "order": 0,
+        "enabled": True,
+        "usePolarDevice": False,
+        "creationDate": "2026-05-10",
+        "previousVersionId": None,
+        "nextVersionId": None,
+        "isActive": True,
+        "timesCompletedInAWeek": None,
+        "globalId": "WORKOUT_D1_GLOBAL",
+        "type": 0,
+        "workoutPlanId": None,
+    }
+    workout_store = {"name": "Test Plan", "equipments": [], "accessoryEquipments": [], "workouts": [workout]}
+
+    assert SCHEMA_VALIDATORS.validator(PLACEHOLDER_SCHEMA) is SCHEMA_VALIDATORS.validator(PLACEHOLDER_SCHEMA)
+    assert SCHEMA_VALIDATORS.iter_errors(workout_store, PLACEHOLDER_SCHEMA) == []
+    assert SCHEMA_VALIDATORS.iter_errors(workout["workoutComponents"][0], PLACEHOLDER_SCHEMA, "Exercise") == []
+    assert SCHEMA_VALIDATORS.iter_errors(workout_store, PLACEHOLDER_SCHEMA, "Exercise")
+
+    workout["workoutComponents"][0]["sets"][0]["reps"] = "twelve"
+    with pytest.raises(ValidationError) as full_error:
+        SCHEMA_VALIDATORS.validate(workout_store, PLACEHOLDER_SCHEMA)
+    with pytest.raises(ValidationError) as item_error:
+        SCHEMA_VALIDATORS.validate_item(workout_store, "workouts", 0, PLACEHOLDER_SCHEMA)
+
+    assert list(item_error.value.absolute_path)[:2] == ["workouts", 0]
+    assert list(item_error.value.absolute_path) == list(full_error.value.absolute_path)
+
+
+def test_validate_and_repair_placeholder_json_repairs_only_failing_workouts(monkeypatch):
+    from workout_generator_pkg import cli
+
+    def workout(index):
+        return {
+            "id": f"WORKOUT_D{index}",
+            "name": f"Day {index}",
+            "description": "",
+            "workoutComponents": [
+                {
+                    "id": f"EXERCISE_D{index}",
+                    "type": "Exercise",
+                    "enabled": True,
+                    "name": "Triceps Pushdown",
+                    "notes": "",
+                    "sets": [{"id": "SET_A0", "type": "WeightSet", "reps": 12, "weight": 10.0, "subCategory": "WorkSet"}],
+                    "exerciseType": "WEIGHT",
+                    "minReps": 10,
+                    "maxReps": 15,
+                    "equipmentId": None,
+                    "bodyWeightPercentage": None,
+                    "generateWarmUpSets": False,
+                    "progressionMode": "DOUBLE_PROGRESSION",
+                    "keepScreenOn": False,
+                    "showCountDownTimer": False,
+                    "intraSetRestInSeconds": None,
+                    "muscleGroups": ["FRONT_TRICEPS"],
+                    "secondaryMuscleGroups": [],
+                    "requiredAccessoryEquipmentIds": [],
+                    "requiresLoadCalibration": True,
+                    "exerciseCategory": "ISOLATION",
+                }
+            ],
+            "order": index,
+            "enabled": True,
+            "usePolarDevice": False,
+            "creationDate": "2026-05-10",
+            "previousVersionId": None,
+            "nextVersionId": None,
+            "isActive": True,
+            "timesCompletedInAWeek": None,
+            "globalId": f"WORKOUT_D{index}_GLOBAL",
+            "type": 0,
+            "workoutPlanId": None,
+        }
+
+    workouts = [workout(index) for index in range(4)]
+    del workouts[1]["name"]
+    workouts[3]["workoutComponents"][0]["sets"][0]["reps"] = "twelve"
+    workout_store = {"name": "Test Plan", "equipments": [], "accessoryEquipments": [], "workouts": workouts}
+
+    prompts = []
+
+    def fake(client, messages, custom_prompt, show_loading=False, logger=None):
+        prompt = messages[-1]["content"]
+        prompts.append(prompt)
+        if "/workouts/1/" in prompt:
+            return json.dumps([{"op": "add", "path": "/workouts/1/name", "value": "Day 1"}])
+        return json.dumps([{"op": "replace", "path": "/workouts/3/workoutComponents/0/sets/0/reps", "value": 12}])
+
+    monkeypatch.setattr(cli, "json_call_reasoner_only_with_loading", fake)
+    monkeypatch.setattr(cli, "analyze_and_log_validation_errors", lambda errors, attempt, script_dir: ({}, None))
+
+    repaired = cli.validate_and_repair_placeholder_json(None, "summary", workout_store, max_attempts=2)
+
+    assert len(prompts) == 2
+    assert all("WORKOUT_D0" not in prompt and "WORKOUT_D2" not in prompt for prompt in prompts)
+    assert repaired["workouts"][1]["name"] == "Day 1"
+    assert repaired["workouts"][3]["workoutComponents"][0]["sets"][0]["reps"] == 12
+    validate(instance=repaired, schema=create_placeholder_schema())
+
+
 class _FakeValidationError:
     def __init__(self, absolute_path, validator, message):
         self.absolute_path = absolute_path
@@ -511,6 +932,31 @@ class _FakeValidationError:
         self.message = message
 
 
+def test_json_patch_and_reassembly_copy_only_the_changed_path():
+    from workout_generator_pkg.domain_ops import parse_error_path, reassemble_item
+    from workout_generator_pkg.json_patching import apply_json_patch
+
+    store = {
+        "name": "Plan",
+        "workouts": [
+            {"id": f"WORKOUT_{index}", "workoutComponents": [{"id": f"EXERCISE_{index}", "sets": [{"reps": 8}]}]}
+            for index in range(3)
+        ],
+    }
+    snapshot = copy.deepcopy(store)
+
+    patched = apply_json_patch(store, [{"op": "replace", "path": "/workouts/1/workoutComponents/0/sets/0/reps", "value": 10}])
+    reassembled = reassemble_item(store, parse_error_path("workouts.2.workoutComponents.0"), {"id": "EXERCISE_X"})
+
+    assert store == snapshot
+    assert patched["workouts"][1]["workoutComponents"][0]["sets"][0]["reps"] == 10
+    assert patched["workouts"][0] is store["workouts"][0]
+    assert patched["workouts"][2] is store["workouts"][2]
+    assert patched["workouts"] is not store["workouts"]
+    assert reassembled["workouts"][2]["workoutComponents"] == [{"id": "EXERCISE_X"}]
+    assert reassembled["workouts"][1] is store["workouts"][1]
+
+
 def test_placeholder_schema_accepts_underscore_suffixes_in_set_ids():
     placeholder_schema = create_placeholder_schema()
     validate(
@@ -1896,3 +2342,73 @@ def test_sanitize_rep_range_removes_explicit_null_on_countdown():
     sanitize_rep_range_fields_on_exercise_dict(ex)
     assert "minReps" not in ex
     assert "maxReps" not in ex
+
+
+def test_emitters_share_prompt_prefix_and_meter_cached_tokens(monkeypatch):
+    from types import SimpleNamespace
+
+    from workout_generator_pkg import api_client
+    from workout_generator_pkg.prompt_prefix import EmitterPromptPrefix
+
+    requests = []
+
+    def fake_json_call(client, messages, custom_prompt, show_loading=False, logger=None):
+        requests.append(messages)
+        cached = 0 if len(requests) == 1 else 900
+        api_client._record_prompt_usage(
+            SimpleNamespace(prompt_cache_hit_tokens=cached, prompt_cache_miss_tokens=1000 - cached)
+        )
+        equipment_id = "EQUIPMENT_0" if len(requests) == 1 else "EQUIPMENT_1"
+        return json.dumps({"id": equipment_id, "type": "DUMBBELLS", "name": "Dumbbells"})
+
+    monkeypatch.setattr(cli, "json_call_reasoner_only_with_loading", fake_json_call)
+    meter = api_client.PromptUsageMeter()
+    prefix = EmitterPromptPrefix("User trains three days a week.", usage_meter=meter)
+    plan_index = {
+        "equipments": [
+            {"id": "EQUIPMENT_0", "type": "DUMBBELLS", "name": "Dumbbells"},
+            {"id": "EQUIPMENT_1", "type": "BARBELL", "name": "Barbell"},
+        ]
+    }
+
+    for equipment_id in ("EQUIPMENT_0", "EQUIPMENT_1"):
+        cli.emit_equipment_item(equipment_id, None, "unused", plan_index, prompt_prefix=prefix)
+
+    first, second = requests
+    assert first[:3] == second[:3]
+    assert first[0] == {"role": "system", "content": BASE_SYSTEM_PROMPT}
+    assert "User trains three days a week." in first[1]["content"]
+    assert first[2] == {"role": "system", "content": EQUIPMENT_SYSTEM_PROMPT}
+    assert first[3] != second[3]
+    assert meter.stages["equipment"] == {"requests": 2, "cached_tokens": 900, "uncached_tokens": 1100}
+
+    with_equipment = prefix.with_equipment("Available Equipment (MUST USE ONLY THESE):")
+    assert with_equipment.messages("stage", "item")[1]["content"].startswith(first[1]["content"])
+
+
+def test_equipment_context_is_shared_by_content_and_follows_edits():
+    from workout_generator_pkg.domain_ops import equipment_context
+    from workout_generator_pkg.domain_ops import format_equipment_for_llm
+
+    equipments = [
+        {
+            "id": "EQUIPMENT_0",
+            "type": "DUMBBELLS",
+            "name": "Dumbbells",
+            "dumbbells": [{"weight": 10.0}, {"weight": 12.5}],
+            "extraWeights": [],
+            "maxExtraWeightsPerLoadingPoint": 0,
+        }
+    ]
+    accessories = [{"id": "ACCESSORY_0", "type": "ACCESSORY", "name": "Bench"}]
+
+    context = equipment_context(equipments, accessories)
+    assert equipment_context(copy.deepcopy(equipments), copy.deepcopy(accessories)) is context
+    assert context.selectable_weights == [(20.0, 25.0)]
+    assert "Available Total Weights: 20.0kg, 25.0kg (total 2 combinations)" in context.llm_context
+    assert "ACCESSORY_0 (Bench, ACCESSORY):" in context.llm_context
+
+    equipments[0]["dumbbells"].append({"weight": 15.0})
+    text = format_equipment_for_llm(equipments, accessories)
+    assert "20.0kg, 25.0kg, 30.0kg (total 3 combinations)" in text
+    assert "total 2 combinations" in context.llm_context
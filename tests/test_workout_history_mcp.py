@@ -11,8 +11,20 @@ from workout_history_mcp.exporters import (
     session_list,
     session_markdown,
 )
+from workout_history_mcp.heart_rate import (
+    compact_heart_rate_samples,
+    heart_rate_zone_bounds_bpm,
+    zone_index_for_bpm,
+    zone_sample_counts,
+)
+from workout_history_mcp.instrumentation import CallMetrics
 from workout_history_mcp.loader import load_store
+from workout_history_mcp.records import estimated_one_rep_max, exercise_records
+from workout_history_mcp.rollups import training_rollup_data
 from workout_history_mcp.server import create_mcp
+from workout_history_mcp.sqlite_cache import HistoryDatabase
+from workout_history_mcp.store_cache import StoreCache
+from workout_history_mcp.streaming import iter_backup_members, load_compact_store
 
 
 def fixture_backup() -> dict:
@@ -333,6 +345,8 @@ def test_list_exercises_supports_query(tmp_path: Path) -> None:
     assert rows[0]["session_count"] == 2
     assert rows[0]["progression_mode"] == "AUTO_REGULATION"
     assert rows[0]["planned_sets"][0]["weight_kg"] == 82.5
+    assert rows[0]["workouts"] == ["Old Strength A", "Strength A"]
+    assert rows[0]["equipment_name"] == "Test Barbell"
 
 
 def test_current_training_plan_includes_exercise_config_and_equipment(tmp_path: Path) -> None:
@@ -348,6 +362,26 @@ def test_current_training_plan_includes_exercise_config_and_equipment(tmp_path:
     assert plan["equipment"]["equipment"][0]["bar_weight_kg"] == 20.0
 
 
+def test_store_indexes_workout_names_and_equipment_lookups(tmp_path: Path) -> None:
+    backup = fixture_backup()
+    workout_store = backup["WorkoutStore"]
+    equipment_id = workout_store["equipments"][0]["id"]
+    workout_store["accessoryEquipments"].append({"id": equipment_id, "type": "ACCESSORY", "name": "Colliding Accessory"})
+    backup_path = tmp_path / "backup.json"
+    backup_path.write_text(json.dumps(backup), encoding="utf-8")
+    store = load_store(backup_path)
+
+    assert store.workout_names_for_exercise("22222222-2222-2222-2222-222222222222") == ["Old Strength A", "Strength A"]
+    assert store.workout_names_for_exercise("33333333-3333-3333-3333-333333333333") == ["Strength A"]
+    assert store.workout_names_for_exercise("unknown") == []
+    assert store.equipment_or_accessory_by_id()["55555555-5555-5555-5555-555555555555"]["name"] == "Pull-Up Bar"
+
+    components = current_training_plan_data(store)["workouts"][0]["components"]
+    # Accessories win id collisions, as in the merged equipment/accessory lookup
+    assert components[0]["equipment_name"] == "Colliding Accessory"
+    assert components[1]["equipment_name"] == "Pull-Up Bar"
+
+
 def test_server_registers_resources_and_tools_without_auth(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
 
@@ -400,3 +434,363 @@ def test_server_dict_wrapper_returns_error_for_unconfigured_backup(monkeypatch)
     assert out["ok"] is False
     assert "MYWORKOUT_BACKUP_PATH is not set" in out["error"]
     assert "-BackupPath" in out["hint"]
+
+
+def test_store_cache_reuses_indexed_store_until_backup_changes(tmp_path: Path) -> None:
+    backup_path = write_fixture(tmp_path)
+    cache = StoreCache()
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    bench_id = "22222222-2222-2222-2222-222222222222"
+
+    first = cache.get(backup_path)
+    assert cache.get(backup_path) is first
+    assert cache.load_count == 1
+    assert [item["order"] for item in first.sets_for_session(session_2)] == [0, 1, 1, 2]
+    assert first.progression_for(session_2, bench_id)["progressionState"] == "PROGRESS"
+    assert len(first.rest_records_for_session(session_2, bench_id)) == 2
+
+    backup = fixture_backup()
+    backup["WorkoutHistories"][1]["isDone"] = False
+    backup_path.write_text(json.dumps(backup, indent=2), encoding="utf-8")
+
+    reloaded = cache.get(backup_path)
+    assert reloaded is not first
+    assert cache.load_count == 2
+    assert len(reloaded.completed_sessions()) == 1
+
+
+def test_session_list_filters_and_pages_from_session_aggregates(tmp_path: Path) -> None:
+    store = load_store(write_fixture(tmp_path))
+    session_1 = "66666666-6666-6666-6666-666666666666"
+    session_2 = "77777777-7777-7777-7777-777777777777"
+
+    pullup_page = session_list(store, exercise_name="pull")
+    second_page = session_list(store, limit=1, offset=1)
+
+    assert store.session_aggregate(session_2).recorded_set_count == 2
+    assert store.session_aggregate("missing").recorded_set_count == 0
+    assert pullup_page["total"] == 1
+    assert pullup_page["items"][0]["workout_history_id"] == session_2
+    assert pullup_page["items"][0]["recorded_set_count"] == 2
+    assert second_page["has_more"] is False
+    assert [item["workout_history_id"] for item in second_page["items"]] == [session_1]
+
+
+def test_zone_sample_counts_match_reverse_scan_and_summaries_are_memoized(tmp_path: Path) -> None:
+    samples = list(range(30, 240, 3))
+    for max_hr, resting_hr in ((190, 55), (150, 149), (120, 130)):
+        bounds = heart_rate_zone_bounds_bpm(max_hr, resting_hr)
+        expected = [0 for _ in bounds]
+        for sample in samples:
+            expected[zone_index_for_bpm(sample, bounds)] += 1
+        assert zone_sample_counts(samples, max_hr, resting_hr) == expected
+
+    store = load_store(write_fixture(tmp_path))
+    first = session_list(store)["items"][0]["heart_rate"]
+    assert session_list(store)["items"][0]["heart_rate"] is first
+
+
+def test_compact_heart_rate_samples_keep_every_positive_reading() -> None:
+    samples, invalid_count = compact_heart_rate_samples([120, 70000, 0, -5, "x", 1.5])
+
+    assert list(samples) == [120, 70000]
+    assert invalid_count == 2
+
+
+def test_sqlite_history_cache_upserts_changes_and_matches_in_memory_store(tmp_path: Path) -> None:
+    backup_path = write_fixture(tmp_path)
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    bench_id = "22222222-2222-2222-2222-222222222222"
+    cache = StoreCache(history_cache_path=tmp_path / "history.sqlite3")
+
+    sqlite_store = cache.get(backup_path)
+    memory_store = load_store(backup_path)
+
+    assert type(sqlite_store).__name__ == "SqliteWorkoutHistoryStore"
+    assert session_markdown(sqlite_store, session_2) == session_markdown(memory_store, session_2)
+    assert exercise_history_markdown(sqlite_store, bench_id) == exercise_history_markdown(memory_store, bench_id)
+    assert session_list(sqlite_store) == session_list(memory_store)
+    assert sqlite_store.athlete_profile() == memory_store.athlete_profile()
+
+    backup = fixture_backup()
+    backup["SetHistories"][2]["setData"]["actualReps"] = 7
+    backup["RestHistories"] = []
+    database = HistoryDatabase(tmp_path / "history.sqlite3")
+    stats = database.ingest(backup)
+    database.close()
+
+    assert stats.updated["set_histories"] == 1
+    assert stats.unchanged["set_histories"] == 4
+    assert stats.deleted["rest_histories"] == 1
+    assert stats.unchanged["workout_histories"] == 2
+
+    new_set = dict(backup["SetHistories"][0], id="88888888-8888-8888-8888-888888888888")
+    backup["SetHistories"].insert(0, new_set)
+    database = HistoryDatabase(tmp_path / "history.sqlite3")
+    stats = database.ingest(backup)
+    payloads = database.payloads("set_histories")
+    database.close()
+
+    assert (stats.inserted["set_histories"], stats.updated["set_histories"], stats.unchanged["set_histories"]) == (1, 0, 5)
+    assert payloads == backup["SetHistories"]
+
+
+def test_sqlite_history_cache_keeps_records_that_repeat_an_id(tmp_path: Path) -> None:
+    backup = fixture_backup()
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    duplicate = dict(backup["SetHistories"][-1])
+    duplicate["setData"] = dict(duplicate["setData"], actualReps=3)
+    backup["SetHistories"].append(duplicate)
+    backup_path = tmp_path / "backup.json"
+    backup_path.write_text(json.dumps(backup), encoding="utf-8")
+
+    sqlite_store = StoreCache(history_cache_path=tmp_path / "history.sqlite3").get(backup_path)
+    memory_store = load_store(backup_path)
+
+    assert len(sqlite_store.set_histories) == len(memory_store.set_histories)
+    assert sqlite_store.sets_for_session(session_2) == memory_store.sets_for_session(session_2)
+    assert session_markdown(sqlite_store, session_2) == session_markdown(memory_store, session_2)
+
+    database = HistoryDatabase(tmp_path / "history.sqlite3")
+    stats = database.ingest(backup)
+    database.close()
+    assert stats.changed == 0
+
+
+def test_streaming_loader_yields_records_across_chunk_boundaries_and_matches_full_load(tmp_path: Path) -> None:
+    backup_path = tmp_path / "backup.json"
+    backup_path.write_text(json.dumps(fixture_backup(), indent=2), encoding="utf-8")
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    bench_id = "22222222-2222-2222-2222-222222222222"
+
+    rebuilt: dict = {}
+    for key, value, is_item in iter_backup_members(backup_path, chunk_size=7):
+        if is_item:
+            rebuilt.setdefault(key, []).append(value)
+        else:
+            rebuilt[key] = value
+    compact = load_compact_store(backup_path)
+    full = load_store(backup_path)
+
+    assert rebuilt == fixture_backup()
+    assert type(compact.set_histories[0]).__name__ == "CompactSetHistory"
+    assert compact.set_histories[0].get("setData")["subCategory"] == "WarmupSet"
+    assert session_markdown(compact, session_2) == session_markdown(full, session_2)
+    assert exercise_history_markdown(compact, bench_id) == exercise_history_markdown(full, bench_id)
+    assert session_list(compact) == session_list(full)
+
+
+def test_compact_store_counts_and_classifies_heart_rate_samples_like_full_load(tmp_path: Path) -> None:
+    backup = fixture_backup()
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    session = next(item for item in backup["WorkoutHistories"] if item["id"] == session_2)
+    session["heartBeatRecords"] = [120, 0, 2 ** 40, -(2 ** 40), 3_000_000_000, None, 130.5, 140]
+    backup_path = tmp_path / "backup.json"
+    backup_path.write_text(json.dumps(backup), encoding="utf-8")
+
+    compact = load_compact_store(backup_path)
+    full = load_store(backup_path)
+
+    assert "- Heart rate samples: 8" in session_markdown(compact, session_2)
+    assert session_markdown(compact, session_2) == session_markdown(full, session_2)
+    assert compact.session_aggregate(session_2) == full.session_aggregate(session_2)
+
+
+def test_server_serves_repeated_resource_reads_from_response_cache(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
+    mcp = create_mcp()
+
+    first = asyncio.run(mcp.read_resource("workout-history://summary"))
+    second = asyncio.run(mcp.read_resource("workout-history://summary"))
+    asyncio.run(mcp.call_tool("list_workout_sessions", {"limit": 1}))
+    diagnostics = json.loads(list(asyncio.run(mcp.read_resource("workout-history://diagnostics")))[0].content)
+
+    assert list(first)[0].content == list(second)[0].content
+    assert diagnostics["response_cache"]["hits"] == 1
+    assert diagnostics["response_cache"]["misses"] == 2
+    assert diagnostics["response_cache"]["entries"] == 2
+
+
+def test_training_rollup_groups_volume_by_period_and_muscle_group(tmp_path: Path) -> None:
+    store = load_store(write_fixture(tmp_path))
+
+    by_muscle = training_rollup_data(store, period="month", group_by="muscle_group")
+    by_workout = training_rollup_data(store, period="week", group_by="workout", start_date="2026-01-05")
+
+    rows = [dict(zip(by_muscle["columns"], row)) for row in by_muscle["rows"]]
+    chest = next(row for row in rows if row["group"] == "FRONT_CHEST")
+    assert chest["period_start"] == "2026-01-01"
+    assert chest["sessions"] == 2
+    assert chest["sets"] == 2
+    assert chest["reps"] == 11
+    assert chest["volume_kg"] == 895.0
+    assert chest["top_set_load_kg"] == 82.5
+    assert [row[0] for row in by_workout["rows"]] == ["2026-01-05"]
+    workout_row = dict(zip(by_workout["columns"], by_workout["rows"][0]))
+    assert workout_row["sets"] == 2
+    assert workout_row["z1_seconds"] == 1
+
+
+def test_batch_session_tool_renders_each_id_and_reports_item_errors(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
+    session_1 = "66666666-6666-6666-6666-666666666666"
+    session_2 = "77777777-7777-7777-7777-777777777777"
+    mcp = create_mcp()
+
+    _, payload = asyncio.run(
+        mcp.call_tool("get_sessions_markdown", {"workout_history_ids": [session_2, "missing", session_1, session_2]})
+    )
+
+    assert payload["ok"] is False
+    assert list(payload["items"]) == [session_2, session_1]
+    assert "# Strength A" in payload["items"][session_2]
+    assert payload["errors"]["missing"]["error"] == "Workout session not found: missing"
+    assert "list_workout_sessions" in payload["errors"]["missing"]["hint"]
+
+
+def test_server_selects_backup_from_directory_and_reports_unknown_selector(monkeypatch, tmp_path: Path) -> None:
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    write_fixture(tmp_path).rename(backup_dir / "athlete_a.json")
+    backup = fixture_backup()
+    backup["WorkoutHistories"][1]["isDone"] = False
+    (backup_dir / "athlete_b.json").write_text(json.dumps(backup), encoding="utf-8")
+    monkeypatch.delenv("MYWORKOUT_BACKUP_PATH", raising=False)
+    monkeypatch.setenv("MYWORKOUT_BACKUP_DIR", str(backup_dir))
+    mcp = create_mcp()
+
+    _, first = asyncio.run(mcp.call_tool("list_workout_sessions", {"backup": "athlete_a"}))
+    _, second = asyncio.run(mcp.call_tool("list_workout_sessions", {"backup": "athlete_b.json"}))
+    _, listed = asyncio.run(mcp.call_tool("list_backups", {}))
+    _, unselected = asyncio.run(mcp.call_tool("get_athlete_profile", {}))
+    _, unknown = asyncio.run(mcp.call_tool("get_athlete_profile", {"backup": "athlete_c"}))
+
+    assert first["total"] == 2
+    assert second["total"] == 1
+    assert listed["mode"] == "directory"
+    assert [item["backup"] for item in listed["backups"]] == ["athlete_a", "athlete_b"]
+    assert all(item["loaded"] for item in listed["backups"])
+    assert unselected["ok"] is False
+    assert "pass `backup`" in unselected["error"]
+    assert unknown == {"ok": False, "error": "Backup not found: athlete_c", "hint": unknown["hint"]}
+    assert "list_backups" in unknown["hint"]
+
+
+def test_exercise_sessions_group_records_once_and_match_per_session_lookups(tmp_path: Path) -> None:
+    backup_path = write_fixture(tmp_path)
+    bench_id = "22222222-2222-2222-2222-222222222222"
+    memory_store = load_store(backup_path)
+    sqlite_store = StoreCache(history_cache_path=tmp_path / "history.sqlite3").get(backup_path)
+
+    for store in (memory_store, sqlite_store):
+        grouped = store.exercise_sessions(bench_id)
+        assert store.exercise_sessions(bench_id) is grouped
+        assert [item.session.get("date") for item in grouped] == ["2026-01-01", "2026-01-08"]
+        for item in grouped:
+            assert item.progression == store.progression_for(item.workout_history_id, bench_id)
+            assert item.rest_records == store.rest_records_for_session(item.workout_history_id, bench_id)
+            assert item.sets == [
+                set_history for set_history in store.sets_for_exercise(bench_id)
+                if set_history.get("workoutHistoryId") == item.workout_history_id
+            ]
+
+
+def test_personal_records_track_running_maxima_chronologically(monkeypatch, tmp_path: Path) -> None:
+    backup_path = write_fixture(tmp_path)
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(backup_path))
+    bench_id = "22222222-2222-2222-2222-222222222222"
+    store = load_store(backup_path)
+    mcp = create_mcp()
+
+    _, summary = asyncio.run(mcp.call_tool("get_personal_records", {}))
+    _, timeline = asyncio.run(mcp.call_tool("get_personal_records", {"exercise_id": bench_id}))
+    _, missing = asyncio.run(mcp.call_tool("get_personal_records", {"exercise_id": "missing"}))
+
+    bench = dict(zip(summary["columns"], next(row for row in summary["rows"] if row[0] == bench_id)))
+    assert bench["best_load_kg"] == 82.5
+    assert bench["best_load_date"] == "2026-01-08"
+    assert bench["best_e1rm_kg"] == round(estimated_one_rep_max(82.5, 6), 2)
+    assert bench["best_session_volume_kg"] == 495.0
+    assert [row[:3] for row in timeline["rows"]] == [
+        ["2026-01-01", "66666666-6666-6666-6666-666666666666", "load,reps,e1rm,volume"],
+        ["2026-01-08", "77777777-7777-7777-7777-777777777777", "load,reps,e1rm,volume"],
+    ]
+    assert timeline["reps_at_load"]["rows"] == [[82.5, 6, "2026-01-08"]]
+    assert missing["ok"] is False
+    assert "list_exercises" in missing["hint"]
+    assert exercise_records(store, bench_id) is exercise_records(store, bench_id)
+
+
+def test_server_records_per_tool_latency_size_and_jsonl_trace(monkeypatch, tmp_path: Path) -> None:
+    from workout_history_mcp import server as server_mod
+
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
+    trace_path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(server_mod, "_METRICS", CallMetrics(window=2, trace_path=trace_path))
+    mcp = create_mcp()
+
+    for _ in range(3):
+        asyncio.run(mcp.call_tool("get_workout_history_summary", {}))
+    asyncio.run(mcp.call_tool("get_exercise_history_markdown", {"exercise_id": "missing"}))
+    diagnostics = json.loads(list(asyncio.run(mcp.read_resource("workout-history://diagnostics")))[0].content)
+
+    summary = diagnostics["calls"]["tools"]["get_workout_history_summary"]
+    assert summary["calls"] == 3
+    assert summary["window"] == 2
+    assert summary["errors"] == 0
+    assert summary["output_bytes"]["p50"] > 0
+    assert summary["estimated_tokens"]["max"] == -(-summary["output_bytes"]["max"] // 4)
+    assert diagnostics["calls"]["tools"]["get_exercise_history_markdown"]["errors"] == 1
+    trace = [json.loads(line) for line in trace_path.read_text(encoding="utf-8").splitlines()]
+    assert [item["label"] for item in trace] == ["get_workout_history_summary"] * 3 + ["get_exercise_history_markdown"]
+    assert trace[-1]["ok"] is False
+    assert {"load_ms", "render_ms", "output_bytes", "estimated_tokens"} <= set(trace[0])
+
+
+def test_server_keeps_serving_when_trace_file_is_unwritable_and_counts_batch_errors(monkeypatch, tmp_path: Path) -> None:
+    from workout_history_mcp import server as server_mod
+
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("", encoding="utf-8")
+    metrics = CallMetrics(trace_path=blocker / "trace.jsonl")
+    monkeypatch.setattr(server_mod, "_METRICS", metrics)
+    mcp = create_mcp()
+
+    for _ in range(2):
+        asyncio.run(mcp.call_tool("get_workout_history_summary", {}))
+    asyncio.run(mcp.call_tool("get_sessions_markdown", {"workout_history_ids": ["missing"]}))
+
+    stats = metrics.stats()
+    assert stats["trace_error"]
+    assert stats["tools"]["get_workout_history_summary"]["calls"] == 2
+    assert stats["tools"]["get_sessions_markdown"]["errors"] == 1
+
+
+def test_budgeted_exercise_pages_collapse_older_sessions_and_continue_with_cursor(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("MYWORKOUT_BACKUP_PATH", str(write_fixture(tmp_path)))
+    bench_id = "22222222-2222-2222-2222-222222222222"
+    mcp = create_mcp()
+    full_markdown = exercise_history_markdown(load_store(write_fixture(tmp_path)), bench_id)
+
+    _, collapsed = asyncio.run(mcp.call_tool("get_exercise_history_page", {"exercise_id": bench_id, "max_chars": 1300}))
+    _, first = asyncio.run(mcp.call_tool("get_exercise_history_page", {"exercise_id": bench_id, "max_chars": 900}))
+    _, second = asyncio.run(
+        mcp.call_tool("get_exercise_history_page", {"exercise_id": bench_id, "max_chars": 900, "cursor": first["next_cursor"]})
+    )
+    _, roomy = asyncio.run(mcp.call_tool("get_exercise_history_page", {"exercise_id": bench_id}))
+    _, bad_cursor = asyncio.run(mcp.call_tool("get_exercise_history_page", {"exercise_id": bench_id, "cursor": "9"}))
+
+    assert (collapsed["full_sessions"], collapsed["collapsed_sessions"], collapsed["next_cursor"]) == (1, 1, None)
+    assert collapsed["markdown"].index("## S2 (2026-01-08)") < collapsed["markdown"].index("| S1 | 2026-01-01 | 80x5 | 1 | 5 | 400 |")
+    assert (first["full_sessions"], first["collapsed_sessions"], first["next_cursor"]) == (0, 1, "1")
+    assert "### Athlete Context" in first["markdown"]
+    assert "cursor `1`" in first["markdown"]
+    assert second["next_cursor"] is None
+    assert second["markdown"].startswith("# Bench Press (continued)")
+    assert "Athlete Context" not in second["markdown"]
+    assert roomy["full_sessions"] == 2
+    assert roomy["markdown"].index("## S2") < roomy["markdown"].index("## S1")
+    assert roomy["chars"] <= len(full_markdown) + 40
+    assert bad_cursor["ok"] is False
+    assert bad_cursor["error"].startswith("Invalid cursor: 9")
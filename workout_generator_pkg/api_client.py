@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import contextvars
 import json
+import os
 import random
 import threading
 import time
 import traceback
+from contextlib import contextmanager
 from .constants import (
     DEEPSEEK_CHAT_DEFAULT_TOKENS,
     DEEPSEEK_CHAT_MAX_TOKENS,
@@ -20,6 +23,11 @@ try:
 except ImportError:
     APIConnectionError = None
 
+try:
+    from openai import RateLimitError
+except ImportError:
+    RateLimitError = None
+
 try:
     from httpx import RemoteProtocolError
 except ImportError:
@@ -28,6 +36,85 @@ except ImportError:
     except ImportError:
         RemoteProtocolError = None
 
+# (PromptUsageMeter, stage) that responses on this context report their prompt usage to.
+# The *_with_loading wrappers run requests in a copy of the caller's context to carry it along.
+_PROMPT_USAGE_STAGE: contextvars.ContextVar = contextvars.ContextVar("prompt_usage_stage", default=None)
+# Set while a scheduler (run_emissions) owns retries: connection errors then surface on the
+# first failure instead of being retried here behind its back.
+_CALLER_RETRIES_CONNECTION_ERRORS: contextvars.ContextVar = contextvars.ContextVar(
+    "caller_retries_connection_errors", default=False
+)
+
+
+def prompt_cache_tokens(usage):
+    """
+    Split a response's prompt tokens into (cached, uncached).
+
+    Reads DeepSeek's prompt_cache_hit_tokens/prompt_cache_miss_tokens, falling back to the
+    OpenAI prompt_tokens_details.cached_tokens field. Returns None when usage has neither.
+    """
+    if usage is None:
+        return None
+    hit_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+    miss_tokens = getattr(usage, "prompt_cache_miss_tokens", None)
+    if hit_tokens is not None or miss_tokens is not None:
+        return int(hit_tokens or 0), int(miss_tokens or 0)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    if prompt_tokens is None:
+        return None
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None) or 0
+    return int(cached_tokens), int(prompt_tokens) - int(cached_tokens)
+
+
+class PromptUsageMeter:
+    """Cached versus uncached prompt tokens per emitter stage, summed over that stage's responses."""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, usage):
+        tokens = prompt_cache_tokens(usage)
+        if tokens is None:
+            return
+        cached_tokens, uncached_tokens = tokens
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"requests": 0, "cached_tokens": 0, "uncached_tokens": 0})
+            totals["requests"] += 1
+            totals["cached_tokens"] += cached_tokens
+            totals["uncached_tokens"] += uncached_tokens
+
+    def summary_lines(self):
+        with self._lock:
+            stages = {stage: dict(totals) for stage, totals in self.stages.items()}
+        lines = []
+        for stage, totals in stages.items():
+            prompt_tokens = totals["cached_tokens"] + totals["uncached_tokens"]
+            cached_share = 100.0 * totals["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0
+            lines.append(
+                f"{stage}: {totals['cached_tokens']} cached / {totals['uncached_tokens']} uncached prompt tokens "
+                f"({cached_share:.0f}% cached, {totals['requests']} request(s))"
+            )
+        return lines
+
+
+@contextmanager
+def metered_prompt_usage(meter, stage):
+    """Report the prompt usage of API calls made inside this block (and threads they start) to `meter`."""
+    token = _PROMPT_USAGE_STAGE.set((meter, stage))
+    try:
+        yield meter
+    finally:
+        _PROMPT_USAGE_STAGE.reset(token)
+
+
+def _record_prompt_usage(usage):
+    current = _PROMPT_USAGE_STAGE.get()
+    if current is not None and usage is not None:
+        meter, stage = current
+        meter.record(stage, usage)
+
+
 def chat_call(client, messages, tools=None):
     """
     Call deepseek-reasoner model for conversational responses with optional function calling.
@@ -213,6 +300,67 @@ def test_connection(client, show_message=True, logger=None):
         return False, error_msg
 
 
+def is_connection_error(e):
+    """
+    True if `e` is a dropped or reset connection (including wrapped httpx/httpcore errors).
+
+    Args:
+        e: Exception raised by an API call
+
+    Returns:
+        bool: Whether the call is worth retrying after a backoff
+    """
+    # Check the exception type and its chain (for wrapped exceptions)
+    error_type = type(e).__name__
+    error_str = str(e).lower()
+    error_type_str = str(type(e))
+    
+    # Check exception chain for underlying errors
+    cause = getattr(e, '__cause__', None)
+    context = getattr(e, 'context', None)
+    
+    # Build a comprehensive error message to check
+    full_error_str = error_str
+    if cause:
+        full_error_str += " " + str(cause).lower()
+        full_error_str += " " + str(type(cause)).lower()
+    if context:
+        full_error_str += " " + str(context).lower()
+        full_error_str += " " + str(type(context)).lower()
+    
+    # Check using imported exception types if available
+    detected = False
+    if APIConnectionError and isinstance(e, APIConnectionError):
+        detected = True
+    elif RemoteProtocolError and isinstance(e, RemoteProtocolError):
+        detected = True
+    elif cause and RemoteProtocolError and isinstance(cause, RemoteProtocolError):
+        detected = True
+    elif cause and APIConnectionError and isinstance(cause, APIConnectionError):
+        detected = True
+    else:
+        # Fallback to string matching
+        detected = (
+            "APIConnectionError" in error_type or
+            "ConnectionError" in error_type or
+            "RemoteProtocolError" in error_type_str or
+            "RemoteProtocolError" in full_error_str or
+            "httpx.RemoteProtocolError" in error_type_str or
+            "httpcore.RemoteProtocolError" in error_type_str or
+            "peer closed connection" in full_error_str or
+            "incomplete chunked read" in full_error_str or
+            (cause and ("RemoteProtocolError" in str(type(cause)) or "ConnectionError" in str(type(cause))))
+        )
+    return bool(detected)
+
+
+def is_rate_limit_error(e):
+    """True if the provider rejected the call for rate limiting (HTTP 429)."""
+    if RateLimitError and isinstance(e, RateLimitError):
+        return True
+    return getattr(e, "status_code", None) == 429 or "RateLimitError" in type(e).__name__
+
+
 def _retry_on_connection_error(func, max_retries=5, base_delay=2, show_message=False):
     """
     Helper function to retry a callable on connection errors with exponential backoff.
@@ -228,55 +376,16 @@ def _retry_on_connection_error(func, max_retries=5, base_delay=2, show_message=F
     
     Raises:
         Original exception if not a connection error or if retries exhausted
+
+    Inside `caller_retries_connection_errors`, the first connection error is raised as is.
     """
+    if _CALLER_RETRIES_CONNECTION_ERRORS.get():
+        max_retries = 1
     for attempt in range(max_retries):
         try:
             return func()
         except Exception as e:
-            # Check if it's a connection error that we should retry
-            # Check the exception type and its chain (for wrapped exceptions)
-            error_type = type(e).__name__
-            error_str = str(e).lower()
-            error_type_str = str(type(e))
-            
-            # Check exception chain for underlying errors
-            cause = getattr(e, '__cause__', None)
-            context = getattr(e, 'context', None)
-            
-            # Build a comprehensive error message to check
-            full_error_str = error_str
-            if cause:
-                full_error_str += " " + str(cause).lower()
-                full_error_str += " " + str(type(cause)).lower()
-            if context:
-                full_error_str += " " + str(context).lower()
-                full_error_str += " " + str(type(context)).lower()
-            
-            # Check using imported exception types if available
-            is_connection_error = False
-            if APIConnectionError and isinstance(e, APIConnectionError):
-                is_connection_error = True
-            elif RemoteProtocolError and isinstance(e, RemoteProtocolError):
-                is_connection_error = True
-            elif cause and RemoteProtocolError and isinstance(cause, RemoteProtocolError):
-                is_connection_error = True
-            elif cause and APIConnectionError and isinstance(cause, APIConnectionError):
-                is_connection_error = True
-            else:
-                # Fallback to string matching
-                is_connection_error = (
-                    "APIConnectionError" in error_type or
-                    "ConnectionError" in error_type or
-                    "RemoteProtocolError" in error_type_str or
-                    "RemoteProtocolError" in full_error_str or
-                    "httpx.RemoteProtocolError" in error_type_str or
-                    "httpcore.RemoteProtocolError" in error_type_str or
-                    "peer closed connection" in full_error_str or
-                    "incomplete chunked read" in full_error_str or
-                    (cause and ("RemoteProtocolError" in str(type(cause)) or "ConnectionError" in str(type(cause))))
-                )
-            
-            if is_connection_error:
+            if is_connection_error(e):
                 # Log the connection error to file
                 error_file = _log_connection_error(e, attempt + 1, max_retries)
                 if error_file and show_message:
@@ -302,6 +411,16 @@ def _retry_on_connection_error(func, max_retries=5, base_delay=2, show_message=F
                 raise
 
 
+@contextmanager
+def caller_retries_connection_errors():
+    """Turn off the connection-error retry of API calls made inside this block (and threads they start)."""
+    token = _CALLER_RETRIES_CONNECTION_ERRORS.set(True)
+    try:
+        yield
+    finally:
+        _CALLER_RETRIES_CONNECTION_ERRORS.reset(token)
+
+
 def _collect_streaming_response(stream, start_time=None):
     """
     Collect chunks from a streaming response and reconstruct the full content.
@@ -316,8 +435,12 @@ def _collect_streaming_response(stream, start_time=None):
     """
     content_parts = []
     finish_reason = None
+    usage = None
 
     for chunk in stream:
+        # With include_usage, the final chunk carries usage and no choices
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
         if chunk.choices and len(chunk.choices) > 0:
             choice = chunk.choices[0]
             # Check for finish_reason first (may be in choice, not delta)
@@ -331,6 +454,7 @@ def _collect_streaming_response(stream, start_time=None):
                     content_parts.append(delta.content)
     
     content = ''.join(content_parts)
+    _record_prompt_usage(usage)
     return content, finish_reason
 
 
@@ -349,7 +473,8 @@ def json_call(client, messages, max_tokens=DEEPSEEK_CHAT_DEFAULT_TOKENS):
             messages=messages,
             response_format={"type": "json_object"},
             max_tokens=max_tokens,
-            stream=True  # Enable streaming for better high-traffic handling
+            stream=True,  # Enable streaming for better high-traffic handling
+            stream_options={"include_usage": True},
         )
         return _collect_streaming_response(stream, start_time)
     
@@ -387,7 +512,7 @@ def chat_call_with_loading(client, messages, tools=None, logger=None):
     if logger:
         logger.log("Loading started: Thinking")
     loading.start()
-    api_thread = threading.Thread(target=api_call, daemon=False)
+    api_thread = threading.Thread(target=contextvars.copy_context().run, args=(api_call,), daemon=False)
     api_thread.start()
     
     try:
@@ -500,7 +625,7 @@ def json_call_with_loading(client, messages, max_tokens=None):
             exception[0] = e
     
     loading.start()
-    api_thread = threading.Thread(target=api_call, daemon=False)
+    api_thread = threading.Thread(target=contextvars.copy_context().run, args=(api_call,), daemon=False)
     api_thread.start()
     
     try:
@@ -564,7 +689,7 @@ def json_call_chat_max_with_loading(client, messages, loading_message="Generatin
         if logger:
             logger.log("Loading started: " + loading_message)
         loading.start()
-    api_thread = threading.Thread(target=api_call, daemon=False)
+    api_thread = threading.Thread(target=contextvars.copy_context().run, args=(api_call,), daemon=False)
     api_thread.start()
     
     try:
@@ -687,7 +812,8 @@ def json_call_reasoner_only(client, messages):
             messages=messages,
             response_format={"type": "json_object"},
             max_tokens=DEEPSEEK_REASONER_MAX_TOKENS,  # Always use max (64K)
-            stream=True  # Enable streaming for better high-traffic handling
+            stream=True,  # Enable streaming for better high-traffic handling
+            stream_options={"include_usage": True},
         )
         return _collect_streaming_response(stream, start_time)
     
@@ -754,7 +880,7 @@ def json_call_large_with_loading(client, messages, max_tokens=None):
             exception[0] = e
     
     loading.start()
-    api_thread = threading.Thread(target=api_call, daemon=False)
+    api_thread = threading.Thread(target=contextvars.copy_context().run, args=(api_call,), daemon=False)
     api_thread.start()
     
     try:
@@ -819,7 +945,7 @@ def json_call_reasoner_only_with_loading(client, messages, loading_message="Gene
             logger.log("Loading started: " + loading_message)
         loading.start()
     
-    api_thread = threading.Thread(target=api_call, daemon=False)
+    api_thread = threading.Thread(target=contextvars.copy_context().run, args=(api_call,), daemon=False)
     api_thread.start()
     
     try:
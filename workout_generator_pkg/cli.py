@@ -6,8 +6,8 @@ import time
 import uuid
 import copy
 import re
+from contextlib import nullcontext
 from datetime import date, datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from openai import OpenAI
 import httpx
 from workout_generator_pkg.constants import (
@@ -17,6 +17,8 @@ from workout_generator_pkg.constants import (
     SUMMARIZATION_SYSTEM_PROMPT,
     SELF_HEAL_SYSTEM_PROMPT,
     GENERATE_WORKOUT_TOOL,
+    DEEPSEEK_CHAT_MAX_TOKENS,
+    DEEPSEEK_REASONER_MAX_TOKENS,
 )
 from workout_generator_pkg.exercise_contracts import get_exercise_emission_profile
 from workout_generator_pkg.stage_prompts import (
@@ -26,6 +28,13 @@ from workout_generator_pkg.stage_prompts import (
     PLAN_INDEX_SYSTEM_PROMPT,
     WORKOUT_STRUCTURE_SYSTEM_PROMPT,
 )
+from workout_generator_pkg.emission_engine import (
+    get_emission_limits,
+    is_throttling_error,
+    run_emissions,
+)
+from workout_generator_pkg.response_cache import open_response_cache, response_cache_key
+from workout_generator_pkg.plan_document import DocumentWriter
 from workout_generator_pkg.plan_contract import (
     _load_field_for_exercise_type,
     validate_single_exercise_definition_contract,
@@ -50,11 +59,13 @@ except ImportError:
     except ImportError:
         RemoteProtocolError = None
                                                                                                                                                                                                                                                    
-# Optional validation (pip install jsonschema)                                                                                                                                                                                                   
-try:                                                                                                                                                                                                                                             
-    from jsonschema import validate                                                                                                                                                                                                              
-except Exception:                                                                                                                                                                                                                                
-    validate = None                                                                                                                                                                                                                              
+# Optional validation (pip install jsonschema)
+from workout_generator_pkg.schema_validation import (
+    PLACEHOLDER_SCHEMA,
+    SCHEMA_VALIDATORS,
+    STRICT_SCHEMA,
+    TOP_LEVEL_ITEM_DEFINITIONS,
+)
                                                                                                                                                                                                                                                    
                                                                                                                                                                                                                                                    
                                                                                                                                                                                                                                                    
@@ -752,7 +763,42 @@ class ParallelLoadingIndicator:
 
 
 # Chunked emitters for planner/emitter architecture
-def emit_equipment_item(equipment_id, client, context_summary, plan_index, use_reasoner=True, logger=None):
+EMIT_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def _emit_model(use_reasoner):
+    if use_reasoner:
+        return "deepseek-reasoner", DEEPSEEK_REASONER_MAX_TOKENS
+    return "deepseek-chat", DEEPSEEK_CHAT_MAX_TOKENS
+
+
+def _emit_json_call(client, messages, use_reasoner, logger=None, response_cache=None):
+    """
+    Run one emitter request on deepseek-reasoner @ 64K or deepseek-chat @ 8K.
+
+    With a response_cache, a request identical to an earlier one (model, messages,
+    max_tokens, response format) is answered from disk instead of the API. Emitters
+    that cannot accept the content must call `_reject_emitted_response`.
+    """
+    model, max_tokens = _emit_model(use_reasoner)
+    if use_reasoner:
+        fetch = lambda: json_call_reasoner_only_with_loading(client, messages, "", show_loading=False, logger=logger)
+    else:
+        fetch = lambda: json_call_chat_max_with_loading(client, messages, "", show_loading=False, logger=logger)
+    if response_cache is None:
+        return fetch()
+    return response_cache.call(fetch, model, messages, max_tokens, response_format=EMIT_RESPONSE_FORMAT)
+
+
+def _reject_emitted_response(response_cache, messages, use_reasoner):
+    """Drop the cached reply to this emitter request so the next identical request goes to the API."""
+    if response_cache is None:
+        return
+    model, max_tokens = _emit_model(use_reasoner)
+    response_cache.discard(response_cache_key(model, messages, max_tokens, response_format=EMIT_RESPONSE_FORMAT))
+
+
+def emit_equipment_item(equipment_id, client, context_summary, plan_index, use_reasoner=True, logger=None, response_cache=None, prompt_prefix=None):
     """
     Emit a single equipment item using either deepseek-reasoner @ 64K or deepseek-chat @ 8K.
     
@@ -764,6 +810,8 @@ def emit_equipment_item(equipment_id, client, context_summary, plan_index, use_r
         use_reasoner: If True, use reasoner model (slower, potentially higher quality).
                      If False, use chat model (faster, 8K max tokens).
         logger: Optional ConversationLogger for debug logging
+        response_cache: Optional ResponseCache; identical requests are served from disk
+        prompt_prefix: Optional EmitterPromptPrefix; requests then start with the shared generation context
     
     Returns:
         dict: Single EquipmentItem with placeholder ID, or None if cancelled
@@ -789,20 +837,21 @@ def emit_equipment_item(equipment_id, client, context_summary, plan_index, use_r
         f"Output only the equipment object JSON, not a wrapper."
     )
     
-    messages = [
-        {"role": "system", "content": BASE_SYSTEM_PROMPT},
-        {"role": "system", "content": EQUIPMENT_SYSTEM_PROMPT},
-        {"role": "user", "content": user_content}
-    ]
+    if prompt_prefix is not None:
+        messages = prompt_prefix.messages(EQUIPMENT_SYSTEM_PROMPT, user_content)
+    else:
+        messages = [
+            {"role": "system", "content": BASE_SYSTEM_PROMPT},
+            {"role": "system", "content": EQUIPMENT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_content}
+        ]
     
     if logger:
         request_truncate = PARALLEL_LOG_REQUEST_TRUNCATE if getattr(logger, "is_parallel", False) else 2000
         trunc = user_content[:request_truncate] + (f"... [truncated, total {len(user_content)} chars]" if request_truncate and len(user_content) > request_truncate else "")
         logger.log_request("emit_equipment " + equipment_id, trunc)
-    if use_reasoner:
-        content = json_call_reasoner_only_with_loading(client, messages, "", show_loading=False, logger=logger)
-    else:
-        content = json_call_chat_max_with_loading(client, messages, "", show_loading=False, logger=logger)
+    with (prompt_prefix.metered("equipment") if prompt_prefix is not None else nullcontext()):
+        content = _emit_json_call(client, messages, use_reasoner, logger=logger, response_cache=response_cache)
     if content is None:
         return (None, None)
     
@@ -840,9 +889,13 @@ def emit_equipment_item(equipment_id, client, context_summary, plan_index, use_r
         
         return (EquipmentItem(normalized_item), log_entry)
     except json.JSONDecodeError as e:
+        _reject_emitted_response(response_cache, messages, use_reasoner)
         raise ValueError(f"Failed to parse equipment JSON for {equipment_id}: {e}")
+    except Exception:
+        _reject_emitted_response(response_cache, messages, use_reasoner)
+        raise
 
-def emit_accessory_equipment_item(accessory_id, client, context_summary, plan_index, use_reasoner=True, logger=None):
+def emit_accessory_equipment_item(accessory_id, client, context_summary, plan_index, use_reasoner=True, logger=None, response_cache=None, prompt_prefix=None):
     """
     Emit a single accessory equipment item using either deepseek-reasoner @ 64K or deepseek-chat @ 8K.
     
@@ -854,6 +907,8 @@ def emit_accessory_equipment_item(accessory_id, client, context_summary, plan_in
         use_reasoner: If True, use reasoner model (slower, potentially higher quality).
                      If False, use chat model (faster, 8K max tokens).
         logger: Optional ConversationLogger for debug logging
+        response_cache: Optional ResponseCache; identical requests are served from disk
+        prompt_prefix: Optional EmitterPromptPrefix; requests then start with the shared generation context
     
     Returns:
         dict: Single AccessoryEquipment item with placeholder ID, or None if cancelled
@@ -880,20 +935,21 @@ def emit_accessory_equipment_item(accessory_id, client, context_summary, plan_in
         f"Output only the accessory equipment object JSON, not a wrapper."
     )
     
-    messages = [
-        {"role": "system", "content": BASE_SYSTEM_PROMPT},
-        {"role": "system", "content": EQUIPMENT_SYSTEM_PROMPT},
-        {"role": "user", "content": user_content}
-    ]
+    if prompt_prefix is not None:
+        messages = prompt_prefix.messages(EQUIPMENT_SYSTEM_PROMPT, user_content)
+    else:
+        messages = [
+            {"role": "system", "content": BASE_SYSTEM_PROMPT},
+            {"role": "system", "content": EQUIPMENT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_content}
+        ]
     
     if logger:
         request_truncate = PARALLEL_LOG_REQUEST_TRUNCATE if getattr(logger, "is_parallel", False) else 2000
         trunc = user_content[:request_truncate] + (f"... [truncated, total {len(user_content)} chars]" if request_truncate and len(user_content) > request_truncate else "")
         logger.log_request("emit_accessory " + accessory_id, trunc)
-    if use_reasoner:
-        content = json_call_reasoner_only_with_loading(client, messages, "", show_loading=False, logger=logger)
-    else:
-        content = json_call_chat_max_with_loading(client, messages, "", show_loading=False, logger=logger)
+    with (prompt_prefix.metered("accessory") if prompt_prefix is not None else nullcontext()):
+        content = _emit_json_call(client, messages, use_reasoner, logger=logger, response_cache=response_cache)
     if content is None:
         return (None, None)
     
@@ -935,7 +991,11 @@ def emit_accessory_equipment_item(accessory_id, client, context_summary, plan_in
         
         return (EquipmentItem(normalized_item), log_entry)
     except json.JSONDecodeError as e:
+        _reject_emitted_response(response_cache, messages, use_reasoner)
         raise ValueError(f"Failed to parse accessory equipment JSON for {accessory_id}: {e}")
+    except Exception:
+        _reject_emitted_response(response_cache, messages, use_reasoner)
+        raise
 
 def emit_exercise_definition(
     exercise_id,
@@ -949,6 +1009,8 @@ def emit_exercise_definition(
     logger=None,
     contract_error_context=None,
     allow_educated_load_guesses=True,
+    response_cache=None,
+    prompt_prefix=None,
 ):
     """
     Emit a single exercise definition using either deepseek-reasoner @ 64K or deepseek-chat @ 8K.
@@ -964,6 +1026,8 @@ def emit_exercise_definition(
                      If False, use chat model (faster, 8K max tokens).
         provided_equipment: Optional dict with 'equipments' and 'accessoryEquipments' keys
         logger: Optional ConversationLogger for debug logging
+        response_cache: Optional ResponseCache; identical requests are served from disk
+        prompt_prefix: Optional EmitterPromptPrefix; requests then start with the shared generation context
     
     Returns:
         dict: Single ExerciseDefinition with placeholder IDs, or None if cancelled
@@ -985,14 +1049,9 @@ def emit_exercise_definition(
     muscle_group_enum_text = ", ".join(valid_muscle_groups)
 
     exercise_plan_json = json.dumps(exercise_entry, indent=2)
-    equipment_list_short = format_equipment_list_for_plan(equipment_subset, accessory_subset)
-    equipment_json_text = json.dumps(
-        {
-            "equipments": equipment_subset or [],
-            "accessoryEquipments": accessory_subset or [],
-        },
-        indent=2,
-    )
+    subset_context = equipment_context(equipment_subset, accessory_subset)
+    equipment_list_short = subset_context.plan_list
+    equipment_json_text = subset_context.details_json
 
     profile = get_exercise_emission_profile(exercise_entry.get("exerciseType"))
     load_field = _load_field_for_exercise_type(exercise_entry.get("exerciseType"))
@@ -1011,12 +1070,14 @@ def emit_exercise_definition(
         else "Set requiresLoadCalibration to true for WEIGHT exercises and BODY_WEIGHT exercises with equipmentId; otherwise false.\n"
     )
 
+    # With a prompt prefix the summary is already in the shared generation context
+    summary_section = "" if prompt_prefix is not None else f"Conversation summary:\n{context_summary}\n\n"
     base_user_content = (
         "Generate ONLY the final JSON object for this one exercise definition.\n"
         f"Placeholder exercise id must remain exactly `{exercise_id}`.\n"
         "Use canonical placeholder IDs only: SET_<number>, EQUIPMENT_<number>, ACCESSORY_<number>.\n"
         "Do not invent semantic IDs.\n\n"
-        f"Conversation summary:\n{context_summary}\n\n"
+        f"{summary_section}"
         f"PlanIndex exercise entry for {exercise_id}:\n{exercise_plan_json}\n\n"
         "Treat the PlanIndex exercise entry as the source of truth for all deterministic exercise details. "
         "Do not reinterpret or change exerciseType, equipmentId, requiredAccessoryEquipmentIds, "
@@ -1091,11 +1152,14 @@ def emit_exercise_definition(
             )
 
         retry_user_content = base_user_content + retry_context
-        messages = [
-            {"role": "system", "content": BASE_SYSTEM_PROMPT},
-            {"role": "system", "content": EXERCISE_SYSTEM_PROMPT},
-            {"role": "user", "content": retry_user_content},
-        ]
+        if prompt_prefix is not None:
+            messages = prompt_prefix.messages(EXERCISE_SYSTEM_PROMPT, retry_user_content)
+        else:
+            messages = [
+                {"role": "system", "content": BASE_SYSTEM_PROMPT},
+                {"role": "system", "content": EXERCISE_SYSTEM_PROMPT},
+                {"role": "user", "content": retry_user_content},
+            ]
 
         if logger:
             request_truncate = PARALLEL_LOG_REQUEST_TRUNCATE if getattr(logger, "is_parallel", False) else 2000
@@ -1103,10 +1167,8 @@ def emit_exercise_definition(
             logger.log_request("emit_exercise " + exercise_id, trunc)
 
         use_reasoner_for_this_attempt = use_reasoner or bool(last_error) or bool(contract_error_context)
-        if use_reasoner_for_this_attempt:
-            content = json_call_reasoner_only_with_loading(client, messages, "", show_loading=False, logger=logger)
-        else:
-            content = json_call_chat_max_with_loading(client, messages, "", show_loading=False, logger=logger)
+        with (prompt_prefix.metered("exercise") if prompt_prefix is not None else nullcontext()):
+            content = _emit_json_call(client, messages, use_reasoner_for_this_attempt, logger=logger, response_cache=response_cache)
         if content is None:
             return (None, None)
         if not content:
@@ -1156,6 +1218,7 @@ def emit_exercise_definition(
             validate_single_exercise_definition_contract(exercise_entry, normalized_item)
             return (ExerciseDefinition(normalized_item), log_entry)
         except Exception as e:
+            _reject_emitted_response(response_cache, messages, use_reasoner_for_this_attempt)
             last_error = str(e)
             last_content = content
             if attempt >= max_attempts:
@@ -1182,6 +1245,8 @@ def emit_workout_structure(
     use_reasoner=True,
     logger=None,
     contract_error_context=None,
+    response_cache=None,
+    prompt_prefix=None,
 ):
     """
     Emit a single workout structure using either deepseek-reasoner @ 64K or deepseek-chat @ 8K.
@@ -1195,6 +1260,8 @@ def emit_workout_structure(
         use_reasoner: If True, use reasoner model (slower, potentially higher quality).
                      If False, use chat model (faster, 8K max tokens).
         logger: Optional ConversationLogger for debug logging
+        response_cache: Optional ResponseCache; identical requests are served from disk
+        prompt_prefix: Optional EmitterPromptPrefix; requests then start with the shared generation context
     
     Returns:
         dict: Single WorkoutStructure with placeholder IDs, or None if cancelled
@@ -1310,21 +1377,22 @@ def emit_workout_structure(
         f"Output only the workout structure JSON (workoutMetadata + workoutComponents), not a wrapper."
     )
     
-    messages = [
-        {"role": "system", "content": BASE_SYSTEM_PROMPT},
-        {"role": "system", "content": WORKOUT_STRUCTURE_SYSTEM_PROMPT},
-        {"role": "user", "content": user_content}
-    ]
+    if prompt_prefix is not None:
+        messages = prompt_prefix.messages(WORKOUT_STRUCTURE_SYSTEM_PROMPT, user_content)
+    else:
+        messages = [
+            {"role": "system", "content": BASE_SYSTEM_PROMPT},
+            {"role": "system", "content": WORKOUT_STRUCTURE_SYSTEM_PROMPT},
+            {"role": "user", "content": user_content}
+        ]
     
     if logger:
         request_truncate = PARALLEL_LOG_REQUEST_TRUNCATE if getattr(logger, "is_parallel", False) else 2000
         trunc = user_content[:request_truncate] + (f"... [truncated, total {len(user_content)} chars]" if request_truncate and len(user_content) > request_truncate else "")
         logger.log_request("emit_workout_structure " + workout_id, trunc)
     use_reasoner_for_this_attempt = use_reasoner or bool(contract_error_context)
-    if use_reasoner_for_this_attempt:
-        content = json_call_reasoner_only_with_loading(client, messages, "", show_loading=False, logger=logger)
-    else:
-        content = json_call_chat_max_with_loading(client, messages, "", show_loading=False, logger=logger)
+    with (prompt_prefix.metered("workout_structure") if prompt_prefix is not None else nullcontext()):
+        content = _emit_json_call(client, messages, use_reasoner_for_this_attempt, logger=logger, response_cache=response_cache)
     if content is None:
         return (None, None)
     
@@ -1374,11 +1442,32 @@ def emit_workout_structure(
         
         return (WorkoutStructure(workout_structure), log_entry)
     except json.JSONDecodeError as e:
+        _reject_emitted_response(response_cache, messages, use_reasoner_for_this_attempt)
         raise ValueError(f"Failed to parse workout structure JSON for {workout_id}: {e}")
+    except Exception:
+        _reject_emitted_response(response_cache, messages, use_reasoner_for_this_attempt)
+        raise
+
+def _emission_item_id(item_data):
+    if isinstance(item_data, tuple):
+        return item_data[0]
+    return item_data.get("id") if isinstance(item_data, dict) else item_data
+
+
+def _estimate_emission_tokens(item_data):
+    """Rough prompt size for the shared tokens-per-minute budget: ~4 characters per token of arguments."""
+    if isinstance(item_data, tuple) and len(item_data) == 2 and isinstance(item_data[1], dict):
+        emitter_args = {key: value for key, value in item_data[1].items() if key not in ("client", "logger")}
+        return len(json.dumps(emitter_args, default=str)) // 4
+    return 0
+
 
 def parallel_emit_items(items, emitter_func, loading_message, max_workers=None, logger=None, fail_fast=False):
     """
-    Execute emitter function for multiple items in parallel using ThreadPoolExecutor.
+    Execute emitter function for multiple items in parallel on the asyncio emission engine.
+
+    All stages share one process-wide request/token budget and an adaptive concurrency
+    limit that halves on 429s and connection resets (see emission_engine).
 
     Args:
         items: List of tuples (item_id, emitter_args_dict) where emitter_args_dict contains
@@ -1387,7 +1476,8 @@ def parallel_emit_items(items, emitter_func, loading_message, max_workers=None,
                       followed by unpacked **emitter_args_dict. Returns (result, log_entry)
                       where log_entry may be None.
         loading_message: Base message for progress indicator (e.g., "Generating equipment")
-        max_workers: Maximum number of worker threads (default: min(32, len(items) + 4))
+        max_workers: Optional cap on concurrent requests for this call (default: the shared
+                     adaptive limit, at most WORKOUT_GENERATOR_MAX_CONCURRENCY)
         logger: Optional ConversationLogger for debug logging (loading start/stop)
         fail_fast: If True, stop/cancel remaining work when any item fails and raise.
 
@@ -1398,88 +1488,182 @@ def parallel_emit_items(items, emitter_func, loading_message, max_workers=None,
     """
     if not items:
         return ({}, [])
+    stage_outputs = _emit_stages(
+        [{"items": items, "emitter_func": emitter_func, "fail_fast": fail_fast}],
+        loading_message,
+        max_workers=max_workers,
+        logger=logger,
+    )
+    return stage_outputs[0]
+
 
+def pipelined_emit_items(
+    items,
+    emitter_func,
+    dependent_items,
+    dependent_emitter_func,
+    depends_on,
+    loading_message,
+    max_workers=None,
+    logger=None,
+    fail_fast=False,
+):
+    """
+    Emit two dependent stages as one DAG: each dependent item starts as soon as the
+    upstream items it references have finished, instead of after the whole upstream stage.
+
+    Args:
+        items: Upstream (item_id, emitter_args_dict) tuples, as for parallel_emit_items
+        emitter_func: Upstream emitter
+        dependent_items: List of (item_id, build_args) where build_args(upstream_results)
+                         returns the emitter_args_dict once its upstream items are done
+        dependent_emitter_func: Downstream emitter
+        depends_on: Function item_id -> upstream item_ids for a dependent item
+        loading_message: Base message for progress indicator
+        max_workers: Optional cap on concurrent requests for this call
+        logger: Optional ConversationLogger for debug logging
+        fail_fast: If True, any upstream failure cancels everything and raises. A dependent
+                   item whose upstream items did not all succeed is skipped (result None);
+                   dependent failures never raise.
+
+    Returns:
+        tuple: ((results_dict, emitter_conversations_list), (dependent_results_dict,
+               dependent_emitter_conversations_list))
+    """
+    upstream_ids = [_emission_item_id(item) for item in items]
+    index_by_id = {item_id: index for index, item_id in enumerate(upstream_ids)}
+    upstream_stage = {"items": items, "emitter_func": emitter_func, "fail_fast": fail_fast}
+    dependent_stage = {
+        "items": dependent_items,
+        "emitter_func": dependent_emitter_func,
+        "fail_fast": False,
+        "after": [
+            [index_by_id[ref] for ref in dict.fromkeys(depends_on(item_id)) if ref in index_by_id]
+            for item_id, _ in dependent_items
+        ],
+    }
+    upstream_output, dependent_output = _emit_stages(
+        [upstream_stage, dependent_stage],
+        loading_message,
+        max_workers=max_workers,
+        logger=logger,
+    )
+    return upstream_output, dependent_output
+
+
+def _emit_stages(stages, loading_message, max_workers=None, logger=None):
+    """
+    Run every item of every stage on one engine call. A stage's "after" lists, per item,
+    the indexes of first-stage items it waits for, and its items are (item_id, build_args)
+    pairs whose arguments are built from the first stage's results.
+    """
     def _out(msg):
         if logger:
             logger.log_print(msg)
         else:
             print(msg)
 
-    results = {}
+    stage_results = [{} for _ in stages]
+    stage_conversations = [[] for _ in stages]
     errors = []
-    emitter_conversations = []
+    errors_lock = threading.Lock()
     emitter_conversations_lock = threading.Lock()
     cancelled = threading.Event()
-    loading = ParallelLoadingIndicator(loading_message, len(items))
+
+    nodes = []
+    after = []
+    for stage_index, stage in enumerate(stages):
+        for item_index, item_data in enumerate(stage["items"]):
+            nodes.append((len(nodes), stage_index, item_data))
+            upstream = stage.get("after")
+            after.append(list(upstream[item_index]) if upstream else [])
+    first_stage_ids = [_emission_item_id(item) for item in stages[0]["items"]]
+
+    total_items = len(nodes)
+    loading = ParallelLoadingIndicator(loading_message, total_items)
     if logger:
         logger.log("Loading started: " + loading_message)
-        logger.log_section(f"Parallel: {loading_message} ({len(items)} items)")
+        logger.log_section(f"Parallel: {loading_message} ({total_items} items)")
 
-    def emit_wrapper(item_data):
+    def emit_wrapper(node):
         """Wrapper to handle individual item emission with error handling."""
+        node_index, stage_index, item_data = node
+        stage = stages[stage_index]
         if cancelled.is_set():
             return (None, None)
 
         if isinstance(item_data, tuple) and len(item_data) == 2:
             item_id, emitter_args = item_data
         else:
-            item_id = item_data.get("id") if isinstance(item_data, dict) else item_data
+            item_id = _emission_item_id(item_data)
             emitter_args = {}
 
+        if stage.get("after") is not None:
+            upstream_results = stage_results[0]
+            upstream_ids = [first_stage_ids[index] for index in after[node_index]]
+            if any(upstream_results.get(upstream_id) is None for upstream_id in upstream_ids):
+                # An upstream item failed; leave this one for the stage's own retry pass
+                loading.increment()
+                return (item_id, None)
+            emitter_args = emitter_args(upstream_results)
+
         # Pass a prefixed logger so each item's log lines are identifiable
         args_copy = dict(emitter_args)
         if logger:
             args_copy["logger"] = PrefixLogger(logger, f"[{item_id}] ")
 
         try:
-            result = emitter_func(item_id, **args_copy)
+            result = stage["emitter_func"](item_id, **args_copy)
             loading.increment()
             # Emitters return (parsed_result, log_entry)
             if isinstance(result, tuple) and len(result) == 2:
                 parsed_result, log_entry = result
                 if log_entry is not None:
                     with emitter_conversations_lock:
-                        emitter_conversations.append(log_entry)
-                return (item_id, parsed_result)
-            return (item_id, result)
+                        stage_conversations[stage_index].append(log_entry)
+            else:
+                parsed_result = result
+            stage_results[stage_index][item_id] = parsed_result
+            return (item_id, parsed_result)
         except KeyboardInterrupt:
             cancelled.set()
             return (item_id, None)
         except Exception as e:
+            if is_throttling_error(e):
+                # The engine backs off and re-queues the item
+                raise
             loading.increment()
-            errors.append((item_id, str(e)))
-            if fail_fast:
+            with errors_lock:
+                errors.append((item_id, str(e), stage["fail_fast"]))
+            if stage["fail_fast"]:
                 cancelled.set()
             return (item_id, None)
 
+    limits = get_emission_limits()
+    if max_workers is not None:
+        limits = limits.with_max_concurrency(max_workers)
+
     loading.start()
 
     try:
-        if max_workers is None:
-            max_workers = min(32, len(items) + 4)
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_item = {executor.submit(emit_wrapper, item): item for item in items}
-
-            for future in as_completed(future_to_item):
-                if cancelled.is_set():
-                    for f in future_to_item:
-                        f.cancel()
-                    break
-
-                try:
-                    item_id, result = future.result()
-                    if item_id:
-                        results[item_id] = result
-                except Exception as e:
-                    item_data = future_to_item[future]
-                    if isinstance(item_data, tuple):
-                        item_id = item_data[0]
-                    else:
-                        item_id = item_data.get("id") if isinstance(item_data, dict) else str(item_data)
-                    errors.append((item_id, str(e)))
-                    results[item_id] = None
-
+        outcomes = run_emissions(
+            nodes,
+            emit_wrapper,
+            limits=limits,
+            estimate_tokens=lambda node: _estimate_emission_tokens(node[2]),
+            cancelled=cancelled,
+            after=after,
+        )
+        for (_, stage_index, item_data), outcome in zip(nodes, outcomes):
+            if isinstance(outcome, BaseException):
+                loading.increment()
+                item_id = _emission_item_id(item_data)
+                errors.append((item_id, str(outcome), stages[stage_index]["fail_fast"]))
+                stage_results[stage_index][item_id] = None
+            elif outcome:
+                item_id, result = outcome
+                if item_id:
+                    stage_results[stage_index][item_id] = result
     except KeyboardInterrupt:
         cancelled.set()
         _out("\nCancelled. Stopping parallel execution...")
@@ -1491,47 +1675,352 @@ def parallel_emit_items(items, emitter_func, loading_message, max_workers=None,
 
     if errors:
         _out(f"  Warning: {len(errors)} item(s) failed:")
-        for item_id, error_msg in errors[:5]:
+        for item_id, error_msg, _ in errors[:5]:
             _out(f"    - {item_id}: {error_msg}")
         if len(errors) > 5:
             _out(f"    ... and {len(errors) - 5} more error(s)")
-        if fail_fast:
-            first_item, first_error = errors[0]
+        fail_fast_errors = [(item_id, error_msg) for item_id, error_msg, fail_fast in errors if fail_fast]
+        if fail_fast_errors:
+            first_item, first_error = fail_fast_errors[0]
             raise RuntimeError(
                 f"{loading_message} failed (fail-fast) on '{first_item}': {first_error}"
             )
 
-    return (results, emitter_conversations)
+    return [(stage_results[index], stage_conversations[index]) for index in range(len(stages))]
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+def _schema_fragment_for_error(error):
+    schema_fragment = getattr(error, "schema", None)
+    if schema_fragment is None:
+        return None
+    try:
+        return copy.deepcopy(schema_fragment)
+    except Exception:
+        return schema_fragment
+
+
+def _build_repair_targets(errors, workout_json):
+    targets = []
+    seen_paths = set()
+    for error in errors:
+        details = extract_validation_error_details(error)
+        path = details.get("path") or "<root>"
+        if path in seen_paths:
+            continue
+        seen_paths.add(path)
+
+        extracted = extract_item_by_path(workout_json, details.get("path_info", {}) or {})
+        target = {
+            "path": path,
+            "validator": getattr(error, "validator", None),
+            "message": details.get("message"),
+            "expected": details.get("expected"),
+            "actual": details.get("actual"),
+            "schemaFragment": _schema_fragment_for_error(error),
+        }
+        if extracted:
+            target["itemType"] = extracted.get("item_type")
+            target["failingItem"] = extracted.get("item")
+            target["context"] = extracted.get("context")
+        targets.append(target)
+    return targets
+
+
+def _format_validation_errors(validation_errors):
+    error_messages = []
+    for error in validation_errors:
+        if hasattr(error, 'message'):
+            error_messages.append(str(error.message))
+        elif hasattr(error, '__str__'):
+            error_messages.append(str(error))
+        else:
+            error_messages.append(repr(error))
+    return "\n".join(f"- {msg}" for msg in error_messages)
+
+
+def _parse_patch_array(content):
+    patch = json.loads(content)
+    # If it's wrapped, try to extract the patch array
+    if isinstance(patch, list):
+        return patch
+    if "patch" in patch and isinstance(patch["patch"], list):
+        return patch["patch"]
+    raise ValueError("Invalid JSON Patch format: expected array of patch operations")
+
+
+def group_validation_errors_by_item(validation_errors):
+    """
+    Group validation errors by the top-level item (equipment, accessory or workout) they belong to.
+
+    Args:
+        validation_errors: jsonschema errors from a full WorkoutStore validation
+
+    Returns:
+        tuple: ({(top_level_array, array_index): [errors]}, [errors not owned by any item])
+    """
+    errors_by_item = {}
+    unowned_errors = []
+    for error in validation_errors:
+        path_info = parse_error_path(list(getattr(error, "absolute_path", []) or []))
+        top_level = path_info.get("top_level_array")
+        if top_level in TOP_LEVEL_ITEM_DEFINITIONS and path_info.get("array_index") is not None:
+            errors_by_item.setdefault((top_level, path_info["array_index"]), []).append(error)
+        else:
+            unowned_errors.append(error)
+    return errors_by_item, unowned_errors
+
+
+def _item_path_info(top_level_array, array_index):
+    path_info = parse_error_path([top_level_array, array_index])
+    path_info["nested_path"] = []
+    return path_info
+
+
+def _normalized_exercise(exercise):
+    from workout_generator_pkg.domain_ops import sanitize_rep_range_fields_on_exercise_dict
+
+    if not isinstance(exercise, dict):
+        return exercise
+    normalized = dict(exercise)
+    if "sets" in normalized:
+        # Fix TimedDurationSet/EnduranceSet to use timeInMillis instead of timeInSeconds
+        normalized["sets"] = fix_set_errors(normalized["sets"])
+    sanitize_rep_range_fields_on_exercise_dict(normalized)
+    return exercise if normalized == exercise else normalized
+
+
+def _normalize_placeholder_store(store, _out):
+    """
+    Fix equipment structure, stray None components and set fields the emitters commonly get wrong.
+
+    Returns a copy-on-write version of `store` (which is not modified), so unchanged workouts
+    stay shared with earlier versions of the document.
+    """
+    writer = DocumentWriter(store)
+    if "equipments" in store:
+        equipments_before = len(store["equipments"])
+        writer.root["equipments"] = fix_equipment_errors(store["equipments"])
+        equipments_after = len(writer.root["equipments"])
+        if equipments_before != equipments_after:
+            _out(f"  Auto-fixed equipment structure issues (removed {equipments_before - equipments_after} invalid equipment item(s))")
+
+    for workout_index, workout in enumerate(store.get("workouts", [])):
+        components = workout.get("workoutComponents")
+        if not isinstance(components, list):
+            continue
+        if any(component is None for component in components):
+            # JSON patch operations can extend arrays with None values
+            components = [component for component in components if component is not None]
+            writer.writable(["workouts", workout_index])["workoutComponents"] = components
+            _out(f"  Removed None value(s) from workout '{workout.get('name', 'Unknown')}' workoutComponents")
+        for component_index, component in enumerate(components):
+            if not isinstance(component, dict):
+                continue
+            normalized = component
+            if component.get("type") == "Exercise":
+                normalized = _normalized_exercise(component)
+            elif component.get("type") == "Superset":
+                exercises = component.get("exercises", [])
+                normalized_exercises = [_normalized_exercise(ex) for ex in exercises]
+                if any(new is not old for new, old in zip(normalized_exercises, exercises)):
+                    normalized = dict(component, exercises=normalized_exercises)
+            if normalized is not component:
+                writer.set(["workouts", workout_index, "workoutComponents", component_index], normalized)
+    return writer.root
 
 
+def repair_item_with_json_patch(client, context_summary, placeholder_json, top_level_array, array_index,
+                                validation_errors, logger=None):
+    """
+    Repair one top-level item of a placeholder WorkoutStore using JSON Patch.
 
+    The prompt carries only the failing item, its own errors and the context it references,
+    so its size does not depend on the rest of the plan.
 
+    Args:
+        client: OpenAI client
+        context_summary: Summarized conversation context
+        placeholder_json: Placeholder-based WorkoutStore containing the item
+        top_level_array: "equipments", "accessoryEquipments" or "workouts"
+        array_index: Index of the item in that array
+        validation_errors: The item's validation errors (paths rooted at the document)
+        logger: Optional ConversationLogger for debug logging (request/response)
 
+    Returns:
+        dict: The repaired item, or None if cancelled
+    """
+    path_info = _item_path_info(top_level_array, array_index)
+    extracted = extract_item_by_path(placeholder_json, path_info) or {}
+    item = placeholder_json[top_level_array][array_index]
+    item_pointer = to_json_pointer([top_level_array, array_index])
 
+    repair_targets = _build_repair_targets(validation_errors, placeholder_json)
+    for target in repair_targets:
+        # The item and its context are sent once below
+        target.pop("context", None)
+        if target.get("failingItem") is item:
+            target.pop("failingItem")
 
+    user_content = (
+        f"Context summary:\n{context_summary}\n\n"
+        f"Validation errors:\n{_format_validation_errors(validation_errors)}\n\n"
+        f"Structured repair targets:\n{json.dumps(repair_targets, indent=2, ensure_ascii=False, default=str)}\n\n"
+        f"Failing {path_info.get('item_type') or 'item'} at {item_pointer}:\n{json.dumps(item, indent=2)}\n\n"
+    )
+    if extracted.get("context"):
+        user_content += f"Referenced context (read-only):\n{json.dumps(extracted['context'], indent=2, ensure_ascii=False)}\n\n"
+    user_content += (
+        f"Generate a JSON Patch (RFC 6902) array that fixes ONLY these validation errors. "
+        f"Patch paths are absolute document paths and must start with {item_pointer}/. "
+        f"Use Structured repair targets as the primary source of truth for the exact failing objects, their paths, and the schema fragments they must satisfy. "
+        f"Do NOT introduce new UUIDs - the document uses placeholder IDs (EQUIPMENT_X, EXERCISE_X, etc.). "
+        f"Output only the JSON Patch array, not a wrapper."
+    )
 
+    messages = [
+        {"role": "system", "content": BASE_SYSTEM_PROMPT},
+        {"role": "system", "content": JSON_PATCH_REPAIR_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content}
+    ]
 
+    if logger:
+        trunc = user_content[:2000] + (f"... [truncated, total {len(user_content)} chars]" if len(user_content) > 2000 else "")
+        logger.log_request("repair_item_with_json_patch", trunc)
+    content = json_call_reasoner_only_with_loading(client, messages, f"Repairing {item_pointer}", show_loading=False, logger=logger)
+    if content is None:
+        return None
 
+    if logger:
+        logger.log_response("repair", content, truncate_at=8000)
+    if not content:
+        raise ValueError("Model returned empty JSON Patch content")
 
+    try:
+        allowed_paths, allowed_descendant_paths = build_allowed_patch_scope(validation_errors)
+        patch_array = _parse_patch_array(content)
+        validate_patch_operations_scope(patch_array, allowed_paths, allowed_descendant_paths)
 
+        # Re-root the patch at the item so only the item is copied and patched
+        item_patch = []
+        for op in patch_array:
+            op = dict(op)
+            for key in ("path", "from"):
+                if key in op:
+                    pointer = normalize_json_pointer(op[key])
+                    if pointer != item_pointer and not pointer.startswith(item_pointer + "/"):
+                        raise ValueError(f"Patch path '{op[key]}' is outside {item_pointer}")
+                    op[key] = pointer[len(item_pointer):]
+            item_patch.append(op)
+
+        repaired_item = apply_json_patch(item, item_patch)
+        changed_paths = collect_changed_json_paths(item, repaired_item, base_path=item_pointer)
+        validate_changed_paths_scope(changed_paths, allowed_paths, allowed_descendant_paths)
+        return repaired_item
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse JSON Patch: {e}")
+    except Exception as e:
+        raise ValueError(f"Failed to apply JSON Patch: {e}")
 
 
+def repair_failing_subtrees(client, context_summary, placeholder_json, errors_by_item, max_workers=None, logger=None):
+    """
+    Repair every failing top-level item concurrently, one bounded JSON Patch request per item.
 
+    Args:
+        client: OpenAI client
+        context_summary: Summarized conversation context
+        placeholder_json: Placeholder-based WorkoutStore (not modified)
+        errors_by_item: {(top_level_array, array_index): [errors]} from group_validation_errors_by_item
+        max_workers: Optional cap on concurrent repair requests
+        logger: Optional ConversationLogger for debug logging
 
+    Returns:
+        dict: {(top_level_array, array_index): repaired item} for the items whose repair succeeded
+    """
+    def _out(msg):
+        if logger:
+            logger.log_print(msg)
+        else:
+            print(msg)
 
+    owners = list(errors_by_item)
+    loading = ParallelLoadingIndicator("Repairing validation errors", len(owners))
+    cancelled = threading.Event()
 
+    def repair_wrapper(owner):
+        if cancelled.is_set():
+            return None
+        top_level_array, array_index = owner
+        item_logger = PrefixLogger(logger, f"[{top_level_array}/{array_index}] ") if logger else None
+        try:
+            repaired_item = repair_item_with_json_patch(
+                client, context_summary, placeholder_json, top_level_array, array_index,
+                errors_by_item[owner], logger=item_logger,
+            )
+            loading.increment()
+            return repaired_item
+        except KeyboardInterrupt:
+            cancelled.set()
+            return None
+        except Exception as e:
+            if not is_throttling_error(e):
+                # Throttled requests are re-queued by the engine and counted when they finish
+                loading.increment()
+            raise
 
+    limits = get_emission_limits()
+    if max_workers is not None:
+        limits = limits.with_max_concurrency(max_workers)
 
+    loading.start()
+    try:
+        outcomes = run_emissions(owners, repair_wrapper, limits=limits, cancelled=cancelled)
+    finally:
+        loading.stop()
 
+    repaired = {}
+    for (top_level_array, array_index), outcome in zip(owners, outcomes):
+        if isinstance(outcome, BaseException):
+            _out(f"  Warning: Repair of {top_level_array}[{array_index}] failed: {outcome}")
+        elif outcome is not None:
+            repaired[(top_level_array, array_index)] = outcome
+    return repaired
 
 
 def validate_and_repair_placeholder_json(client, context_summary, placeholder_json, max_attempts=5,
                                          session_id=None, step_data=None, custom_prompt="",
                                          conversation_hash="", id_manager=None, script_dir=None,
                                          resume_best_json=None, resume_best_error_count=None,
-                                         timing_data=None, use_reasoner_for_emitting=None, logger=None):
+                                         timing_data=None, use_reasoner_for_emitting=None, logger=None,
+                                         max_workers=None):
     """
     Validate placeholder-based WorkoutStore and repair errors using JSON Patch in a loop.
+
+    Errors are grouped by the top-level item they belong to; each failing item is repaired
+    on its own (concurrently) and only the repaired items are revalidated. Errors outside any
+    item fall back to a whole-document repair. A repaired item replaces the current one only
+    if it has no more errors, so the current document is always the best one so far.
     
     Args:
         client: OpenAI client
@@ -1548,6 +2037,7 @@ def validate_and_repair_placeholder_json(client, context_summary, placeholder_js
         resume_best_error_count: Optional best error count from previous run (for resume)
         timing_data: Optional dict to track timing information
         logger: Optional ConversationLogger for debug logging
+        max_workers: Optional cap on concurrent item repairs
     
     Returns:
         dict: Validated and repaired placeholder WorkoutStore, or raises exception if repair fails
@@ -1557,13 +2047,10 @@ def validate_and_repair_placeholder_json(client, context_summary, placeholder_js
             logger.log_print(msg)
         else:
             print(msg)
-    if validate is None:
+    if not SCHEMA_VALIDATORS.available:
         # No validation available, return as-is
         return placeholder_json
     
-    placeholder_schema = create_placeholder_schema()
-    from workout_generator_pkg.domain_ops import strip_rep_range_fields_for_timed_exercises_in_workout_store
-
     # Initialize state: use resume data if provided, otherwise start fresh
     if resume_best_json is not None:
         current_json = resume_best_json
@@ -1573,43 +2060,23 @@ def validate_and_repair_placeholder_json(client, context_summary, placeholder_js
         current_json = placeholder_json
         best_error_count = float('inf')
     
-    best_json = current_json
-    attempt = 0
-    
     # Track if we should save progress (only if session_id and related params are provided)
     should_save_progress = (session_id is not None and step_data is not None and 
                            id_manager is not None and script_dir is not None)
-    
-    while attempt < max_attempts:
-        attempt += 1
-        
-        # Pre-validation normalization: Fix equipment structure issues before schema validation
-        if "equipments" in current_json:
-            equipments_before = len(current_json["equipments"])
-            current_json["equipments"] = fix_equipment_errors(current_json["equipments"])
-            equipments_after = len(current_json["equipments"])
-            if equipments_before != equipments_after:
-                _out(f"  Auto-fixed equipment structure issues (removed {equipments_before - equipments_after} invalid equipment item(s))")
-        
-        # Custom validation: leave invalid equipment weight combinations intact so
-        # the model must repair them explicitly based on validation feedback.
-        equipment_by_id = {eq.get("id"): eq for eq in current_json.get("equipments", [])}
-
-        # Pre-validation normalization: Fix TimedDurationSet/EnduranceSet to use timeInMillis instead of timeInSeconds
-        for workout in current_json.get("workouts", []):
-            for component in workout.get("workoutComponents", []):
-                if component.get("type") == "Exercise":
-                    if "sets" in component:
-                        component["sets"] = fix_set_errors(component["sets"])
-                elif component.get("type") == "Superset":
-                    for ex in component.get("exercises", []):
-                        if "sets" in ex:
-                            ex["sets"] = fix_set_errors(ex["sets"])
-
-        strip_rep_range_fields_for_timed_exercises_in_workout_store(current_json)
 
-        try:
-            validate(instance=current_json, schema=placeholder_schema)
+    def _validate_document(document):
+        return group_validation_errors_by_item(SCHEMA_VALIDATORS.iter_errors(document, PLACEHOLDER_SCHEMA))
+
+    # Pre-validation normalization: only whole-document steps may drop items and shift indexes
+    current_json = _normalize_placeholder_store(current_json, _out)
+    errors_by_item, unowned_errors = _validate_document(current_json)
+    attempt = 1
+
+    while True:
+        errors_to_fix = unowned_errors + [error for item_errors in errors_by_item.values() for error in item_errors]
+        error_count = len(errors_to_fix)
+
+        if not errors_to_fix:
             # Validation passed!
             if attempt > 1:
                 _out(f"✓ Validation passed after {attempt} repair attempt(s)")
@@ -1623,99 +2090,104 @@ def validate_and_repair_placeholder_json(client, context_summary, placeholder_js
                 _, _ = save_generation_progress(session_id, 6, step_data, custom_prompt, conversation_hash, id_manager, script_dir, timing_data, use_reasoner_for_emitting)
             
             return current_json
-        except Exception as validation_err:
-            # Count validation errors
-            error_count = 0
-            if hasattr(validation_err, 'context') and validation_err.context:
-                error_count = len(validation_err.context)
-            else:
-                error_count = 1
-            
-            # Update best state if this is better
-            if error_count < best_error_count:
-                best_error_count = error_count
-                best_json = copy.deepcopy(current_json)
-                
-                # Save progress if error count improved
-                if should_save_progress:
-                    step_data["step_6_best_json"] = best_json
-                    step_data["step_6_best_error_count"] = best_error_count
-                    step_data["step_6_current_attempt"] = attempt
-                    _, _ = save_generation_progress(session_id, 6, step_data, custom_prompt, conversation_hash, id_manager, script_dir, timing_data, use_reasoner_for_emitting)
-            
-            if attempt >= max_attempts:
-                # Max attempts reached
-                raise Exception(f"Validation failed after {max_attempts} repair attempts. Last error count: {error_count}. Best error count achieved: {int(best_error_count) if best_error_count != float('inf') else 'N/A'}. Last error: {str(validation_err)}")
-            
-            # Collect all errors
-            errors_to_fix = []
-            if hasattr(validation_err, 'context') and validation_err.context:
-                errors_to_fix = list(validation_err.context)
-            else:
-                errors_to_fix = [validation_err]
-            
-            # Analyze and log errors
-            error_analysis, log_filepath = analyze_and_log_validation_errors(errors_to_fix, attempt, script_dir)
-            
-            # Display error counter with enhanced breakdown
-            error_summary = error_analysis.get("error_summary", {})
-            by_item_type = error_summary.get("by_item_type", {})
-            by_error_type = error_summary.get("by_error_type", {})
-            common_patterns = error_analysis.get("common_patterns", [])
-            
-            # Build item type breakdown string
-            item_type_parts = []
-            for item_type, count in sorted(by_item_type.items(), key=lambda x: x[1], reverse=True):
-                # Handle None item_type defensively
-                item_type_display = (item_type or "unknown").capitalize()
-                item_type_parts.append(f"{item_type_display}({count})")
-            item_type_str = ", ".join(item_type_parts) if item_type_parts else "Unknown"
-            
-            # Build error type breakdown string
-            error_type_parts = []
-            for err_type, count in sorted(by_error_type.items(), key=lambda x: x[1], reverse=True):
-                error_type_parts.append(f"{err_type}({count})")
-            error_type_str = ", ".join(error_type_parts) if error_type_parts else "Unknown"
-            
-            # Display enhanced error information
-            if error_count < best_error_count:
-                if best_error_count == float('inf'):
-                    _out(f"  Validation error detected (attempt {attempt}/{max_attempts}), attempting repair... Errors: {error_count}")
-                else:
-                    _out(f"  Validation error detected (attempt {attempt}/{max_attempts}), attempting repair... Errors: {error_count} (improved from {int(best_error_count)})")
-            else:
-                _out(f"  Validation error detected (attempt {attempt}/{max_attempts}), attempting repair... Errors: {error_count}")
-            
-            # Show categorized breakdown
-            if by_item_type:
-                _out(f"    Errors by item type: {item_type_str}")
-            if by_error_type:
-                _out(f"    Errors by category: {error_type_str}")
-            
-            # Show top error patterns
-            if common_patterns:
-                top_patterns = common_patterns[:3]
-                _out(f"    Top issues: {', '.join(top_patterns)}")
-            
-            # Show log file path
-            if log_filepath:
-                _out(f"    Detailed errors saved to: {log_filepath}")
+
+        previous_best_error_count = best_error_count
+        if error_count < best_error_count:
+            best_error_count = error_count
             
-            # Try to repair
+            # Save progress if error count improved. Repairs replace items instead of
+            # mutating them, so the current document can be saved without a copy.
+            if should_save_progress:
+                step_data["step_6_best_json"] = current_json
+                step_data["step_6_best_error_count"] = best_error_count
+                step_data["step_6_current_attempt"] = attempt
+                _, _ = save_generation_progress(session_id, 6, step_data, custom_prompt, conversation_hash, id_manager, script_dir, timing_data, use_reasoner_for_emitting)
+        
+        if attempt >= max_attempts:
+            # Max attempts reached
+            raise Exception(f"Validation failed after {max_attempts} repair attempts. Last error count: {error_count}. Best error count achieved: {int(best_error_count) if best_error_count != float('inf') else 'N/A'}. Last error: {str(errors_to_fix[0])}")
+        
+        # Analyze and log errors
+        error_analysis, log_filepath = analyze_and_log_validation_errors(errors_to_fix, attempt, script_dir)
+        
+        # Display error counter with enhanced breakdown
+        error_summary = error_analysis.get("error_summary", {})
+        by_item_type = error_summary.get("by_item_type", {})
+        by_error_type = error_summary.get("by_error_type", {})
+        common_patterns = error_analysis.get("common_patterns", [])
+        
+        # Build item type breakdown string
+        item_type_parts = []
+        for item_type, count in sorted(by_item_type.items(), key=lambda x: x[1], reverse=True):
+            # Handle None item_type defensively
+            item_type_display = (item_type or "unknown").capitalize()
+            item_type_parts.append(f"{item_type_display}({count})")
+        item_type_str = ", ".join(item_type_parts) if item_type_parts else "Unknown"
+        
+        # Build error type breakdown string
+        error_type_parts = []
+        for err_type, count in sorted(by_error_type.items(), key=lambda x: x[1], reverse=True):
+            error_type_parts.append(f"{err_type}({count})")
+        error_type_str = ", ".join(error_type_parts) if error_type_parts else "Unknown"
+        
+        # Display enhanced error information
+        if error_count < previous_best_error_count and previous_best_error_count != float('inf'):
+            _out(f"  Validation error detected (attempt {attempt}/{max_attempts}), attempting repair... Errors: {error_count} (improved from {int(previous_best_error_count)})")
+        else:
+            _out(f"  Validation error detected (attempt {attempt}/{max_attempts}), attempting repair... Errors: {error_count}")
+        
+        # Show categorized breakdown
+        if by_item_type:
+            _out(f"    Errors by item type: {item_type_str}")
+        if by_error_type:
+            _out(f"    Errors by category: {error_type_str}")
+        
+        # Show top error patterns
+        if common_patterns:
+            top_patterns = common_patterns[:3]
+            _out(f"    Top issues: {', '.join(top_patterns)}")
+        
+        # Show log file path
+        if log_filepath:
+            _out(f"    Detailed errors saved to: {log_filepath}")
+        
+        attempt += 1
+
+        if unowned_errors:
+            # Document-level errors: repair the whole document and revalidate all of it
             try:
                 repaired_json = repair_with_json_patch(client, context_summary, current_json, errors_to_fix, logger=logger)
                 if repaired_json is None:
                     raise Exception("Repair was cancelled")
-                # Remove any None values that might have been introduced by JSON patch operations
-                current_json = remove_none_from_workout_components(repaired_json, logger=logger)
-                strip_rep_range_fields_for_timed_exercises_in_workout_store(current_json)
+                current_json = _normalize_placeholder_store(repaired_json, _out)
+                errors_by_item, unowned_errors = _validate_document(current_json)
             except Exception as repair_err:
                 _out(f"  Warning: Repair failed: {repair_err}")
-                # Continue to next attempt with original error
+            continue
+
+        repaired_items = repair_failing_subtrees(
+            client, context_summary, current_json, errors_by_item, max_workers=max_workers, logger=logger
+        )
+        for (top_level_array, array_index), repaired_item in repaired_items.items():
+            # Normalize the item on its own; a repaired equipment that normalization drops is rejected
+            item_store = _normalize_placeholder_store({top_level_array: [repaired_item]}, _out)
+            if len(item_store[top_level_array]) != 1:
                 continue
-    
-    # Should not reach here, but return current_json if we do
-    return current_json
+            candidate_json = reassemble_item(
+                current_json, _item_path_info(top_level_array, array_index), item_store[top_level_array][0]
+            )
+            item_errors = SCHEMA_VALIDATORS.iter_item_errors(candidate_json, top_level_array, array_index, PLACEHOLDER_SCHEMA)
+            if len(item_errors) > len(errors_by_item[(top_level_array, array_index)]):
+                continue
+            current_json = candidate_json
+            if item_errors:
+                errors_by_item[(top_level_array, array_index)] = item_errors
+            else:
+                del errors_by_item[(top_level_array, array_index)]
+
+        if not errors_by_item:
+            # Every item passes on its own; confirm against the full schema once
+            errors_by_item, unowned_errors = _validate_document(current_json)
 
 def repair_with_json_patch(client, context_summary, placeholder_json, validation_errors, logger=None):
     """
@@ -1731,55 +2203,11 @@ def repair_with_json_patch(client, context_summary, placeholder_json, validation
     Returns:
         dict: Repaired placeholder JSON, or None if cancelled
     """
-    def _schema_fragment_for_error(error):
-        schema_fragment = getattr(error, "schema", None)
-        if schema_fragment is None:
-            return None
-        try:
-            return copy.deepcopy(schema_fragment)
-        except Exception:
-            return schema_fragment
-
-    def _build_repair_targets(errors, workout_json):
-        targets = []
-        seen_paths = set()
-        for error in errors:
-            details = extract_validation_error_details(error)
-            path = details.get("path") or "<root>"
-            if path in seen_paths:
-                continue
-            seen_paths.add(path)
-
-            extracted = extract_item_by_path(workout_json, details.get("path_info", {}) or {})
-            target = {
-                "path": path,
-                "validator": getattr(error, "validator", None),
-                "message": details.get("message"),
-                "expected": details.get("expected"),
-                "actual": details.get("actual"),
-                "schemaFragment": _schema_fragment_for_error(error),
-            }
-            if extracted:
-                target["itemType"] = extracted.get("item_type")
-                target["failingItem"] = extracted.get("item")
-                target["context"] = extracted.get("context")
-            targets.append(target)
-        return targets
-
     # Format errors for the prompt
     if not isinstance(validation_errors, list):
         validation_errors = [validation_errors]
 
-    error_messages = []
-    for error in validation_errors:
-        if hasattr(error, 'message'):
-            error_messages.append(str(error.message))
-        elif hasattr(error, '__str__'):
-            error_messages.append(str(error))
-        else:
-            error_messages.append(repr(error))
-
-    errors_text = "\n".join(f"- {msg}" for msg in error_messages)
+    errors_text = _format_validation_errors(validation_errors)
     placeholder_json_str = json.dumps(placeholder_json, indent=2)
     repair_targets = _build_repair_targets(validation_errors, placeholder_json)
     repair_targets_str = json.dumps(repair_targets, indent=2, ensure_ascii=False, default=str)
@@ -1816,14 +2244,7 @@ def repair_with_json_patch(client, context_summary, placeholder_json, validation
 
     try:
         allowed_paths, allowed_descendant_paths = build_allowed_patch_scope(validation_errors)
-        patch = json.loads(content)
-        # If it's wrapped, try to extract the patch array
-        if isinstance(patch, list):
-            patch_array = patch
-        elif "patch" in patch and isinstance(patch["patch"], list):
-            patch_array = patch["patch"]
-        else:
-            raise ValueError("Invalid JSON Patch format: expected array of patch operations")
+        patch_array = _parse_patch_array(content)
 
         validate_patch_operations_scope(patch_array, allowed_paths, allowed_descendant_paths)
 
@@ -2150,10 +2571,12 @@ def self_heal_validation_error(client, workout_json, validation_error, context_s
         # Reassemble the fixed item back into the full structure
         fixed_json = reassemble_item(workout_json, path_info, fixed_item)
         
-        # Validate the reassembled JSON
-        if validate is not None:
+        # Validate the reassembled JSON: the repaired subtree first, then the whole document
+        if SCHEMA_VALIDATORS.available:
             try:
-                validate(instance=fixed_json, schema=JSON_SCHEMA)
+                if path_info.get("top_level_array") in TOP_LEVEL_ITEM_DEFINITIONS:
+                    SCHEMA_VALIDATORS.validate_item(fixed_json, path_info["top_level_array"], path_info["array_index"])
+                SCHEMA_VALIDATORS.validate(fixed_json, STRICT_SCHEMA)
                 print(f"  ✓ Self-healing successful on attempt {attempt}!")
                 return fixed_json
             except Exception as new_error:
@@ -2244,9 +2667,9 @@ def self_heal_validation_error_full_json(client, workout_json, validation_error,
             raise Exception(f"LLM returned invalid JSON: {e}")
         
         # Validate the fixed JSON
-        if validate is not None:
+        if SCHEMA_VALIDATORS.available:
             try:
-                validate(instance=fixed_json, schema=JSON_SCHEMA)
+                SCHEMA_VALIDATORS.validate(fixed_json, STRICT_SCHEMA)
                 print(f"  ✓ Self-healing successful on attempt {attempt}!")
                 return fixed_json
             except Exception as new_error:
@@ -2511,6 +2934,7 @@ from workout_generator_pkg.domain_ops import (
     generate_recursive_valid_subsets as _mod_generate_recursive_valid_subsets,
     calculate_equipment_weight_combinations as _mod_calculate_equipment_weight_combinations,
     get_selectable_weights_for_exercise as _mod_get_selectable_weights_for_exercise,
+    equipment_context as _mod_equipment_context,
     format_equipment_list_for_plan as _mod_format_equipment_list_for_plan,
     format_planner_equipment_context as _mod_format_planner_equipment_context,
     format_equipment_for_llm as _mod_format_equipment_for_llm,
@@ -2609,6 +3033,7 @@ finalize_and_validate_exercise_definition = _mod_finalize_and_validate_exercise_
 generate_recursive_valid_subsets = _mod_generate_recursive_valid_subsets
 calculate_equipment_weight_combinations = _mod_calculate_equipment_weight_combinations
 get_selectable_weights_for_exercise = _mod_get_selectable_weights_for_exercise
+equipment_context = _mod_equipment_context
 format_equipment_list_for_plan = _mod_format_equipment_list_for_plan
 format_planner_equipment_context = _mod_format_planner_equipment_context
 format_equipment_for_llm = _mod_format_equipment_for_llm
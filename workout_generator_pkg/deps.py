@@ -38,6 +38,8 @@ class PipelineDeps:
     format_equipment_for_llm: Any
     EquipmentItem: Any
     default_script_dir: Any
+    open_response_cache: Any = None
+    pipelined_emit_items: Any = None
 
 
 @dataclass(frozen=True)
@@ -104,6 +106,8 @@ def resolve_pipeline_deps() -> PipelineDeps:
         format_equipment_for_llm=_c.format_equipment_for_llm,
         EquipmentItem=_c.EquipmentItem,
         default_script_dir=_c._default_script_dir,
+        open_response_cache=_c.open_response_cache,
+        pipelined_emit_items=_c.pipelined_emit_items,
     )
 
 
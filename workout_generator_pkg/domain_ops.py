@@ -3,20 +3,21 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import json
 import os
 import re
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import date, datetime
+from functools import cached_property, lru_cache
 from typing import Any, Dict, List, Optional
 
 from .constants import JSON_SCHEMA, MUSCLE_GROUP_FIXES
 from .exercise_contracts import get_exercise_emission_profile
-
-try:
-    from jsonschema import validate
-except Exception:
-    validate = None
+from .plan_document import DocumentWriter
+from .schema_validation import SCHEMA_VALIDATORS, STRICT_SCHEMA
 
 
 PLACEHOLDER_ID_PATTERN = (
@@ -824,10 +825,61 @@ def generate_recursive_valid_subsets(available_weights, is_combination_valid=Non
     return combinations
 
 
+def achievable_weight_totals(available_weights, cost=None, max_cost=None):
+    """
+    Distinct totals of every non-empty sub-multiset of available weights.
+
+    Bounded subset-sum DP over (weight, thickness) multiplicities: each reachable partial
+    total keeps only the lowest cost that reaches it, so the work grows with the number of
+    distinct totals instead of the 2^n subsets generate_recursive_valid_subsets lists.
+    Weights are added in ascending (weight, thickness) order, the same order in which the
+    Kotlin-parity subsets are summed, so the float totals are identical.
+
+    Args:
+        available_weights: List of weight dicts (plates or extra weights)
+        cost: Optional function (weight, thickness) -> cost of one item (e.g., its thickness)
+        max_cost: Optional upper bound on the summed cost of a combination
+
+    Returns:
+        set: Achievable totals (sum of weights of one combination, before loading points)
+    """
+    multiplicities = {}
+    for weight_item in available_weights or []:
+        if isinstance(weight_item, dict):
+            key = (weight_item.get("weight", 0), weight_item.get("thickness", 0))
+            multiplicities[key] = multiplicities.get(key, 0) + 1
+
+    lowest_cost = {}  # partial total -> lowest cost of a non-empty combination reaching it
+    for (weight, thickness), count in sorted(multiplicities.items()):
+        item_cost = cost(weight, thickness) if cost is not None else 0
+        extended = dict(lowest_cost)
+        for start_total, start_cost in [(0.0, 0), *lowest_cost.items()]:
+            total, total_cost = start_total, start_cost
+            for _ in range(count):
+                total += weight
+                total_cost += item_cost
+                if max_cost is not None and total_cost > max_cost:
+                    break
+                if total not in extended or total_cost < extended[total]:
+                    extended[total] = total_cost
+        lowest_cost = extended
+    return set(lowest_cost)
+
+
+def _equipment_cache_key(equipment):
+    return json.dumps(equipment, sort_keys=True, default=str)
+
+
+@lru_cache(maxsize=256)
+def _cached_equipment_weight_combinations(equipment_key):
+    return frozenset(_compute_equipment_weight_combinations(json.loads(equipment_key)))
+
+
 def calculate_equipment_weight_combinations(equipment):
     """
     Calculate all valid weight combinations for a given equipment.
     Matches Kotlin getWeightsCombinations() logic for each equipment type.
+    Results are memoized per equipment content, so repeated calls for every exercise are free.
     
     Args:
         equipment: Equipment dictionary with type and relevant fields
@@ -835,189 +887,75 @@ def calculate_equipment_weight_combinations(equipment):
     Returns:
         set: Set of valid weight values (floats) that can be achieved with this equipment
     """
+    return set(_cached_equipment_weight_combinations(_equipment_cache_key(equipment)))
+
+
+def _compute_equipment_weight_combinations(equipment):
     eq_type = equipment.get("type", "").upper()
-    
-    # Helper to check if plate combination is valid (thickness constraint)
-    def is_plate_combination_valid(combination):
-        """Check if plate combination fits within sleeveLength.
-        
+
+    def plate_totals():
+        """Per-side plate totals whose stack fits within sleeveLength.
+
         Note: sleeveLength and thickness are in millimeters (mm).
         sleeveLength refers to the sleeve length (where plates are loaded), not the total barbell length.
         """
-        if eq_type not in ["BARBELL", "PLATELOADEDCABLE"]:
-            return True
         sleeve_length = equipment.get("sleeveLength", equipment.get("barLength", 0))
         if sleeve_length <= 0:
-            return True  # No constraint if sleeveLength not specified
-        total_thickness = sum(plate.get("thickness", 0) for plate in combination if isinstance(plate, dict))
-        return total_thickness <= sleeve_length
-    
-    # Helper to calculate total weight from a combination
-    def calculate_combination_weight(combination, loading_points=1):
-        """Calculate total weight from a combination of weights.
-        
-        For barbells/dumbbells, loading_points=2 means weights are applied to both sides.
-        The combination represents weights on one side, so total = sum(weights) * loading_points.
-        """
-        total = 0.0
-        for weight_item in combination:
-            if isinstance(weight_item, dict):
-                total += weight_item.get("weight", 0.0)
-        return total * loading_points
-    
-    # Generate base combinations
-    base_combinations = set()
-    
-    if eq_type == "BARBELL":
-        available_plates = equipment.get("availablePlates", [])
-        bar_weight = equipment.get("barWeight", 0.0)
-        loading_points = 2  # Two sides
-        
-        # Generate all plate combinations
-        plate_combos = generate_recursive_valid_subsets(
-            available_plates,
-            is_combination_valid=is_plate_combination_valid
+            # No constraint if sleeveLength not specified
+            return achievable_weight_totals(equipment.get("availablePlates", []))
+        return achievable_weight_totals(
+            equipment.get("availablePlates", []),
+            cost=lambda weight, thickness: thickness,
+            max_cost=sleeve_length,
         )
-        
-        # Kotlin parity: totals are barWeight alone plus each valid plate total.
-        result = {bar_weight}
-        for combo in plate_combos:
-            combo_weight = calculate_combination_weight(list(combo), loading_points)
-            result.add(combo_weight + bar_weight)
-        return result
-    
-    elif eq_type == "DUMBBELLS":
-        available_dumbbells = equipment.get("dumbbells", [])
+
+    def base_with_extras(base_items, loading_points):
+        """Each base weight alone and with up to maxExtraWeightsPerLoadingPoint extras per loading point."""
+        base_weights = [item.get("weight", 0.0) for item in base_items if isinstance(item, dict)]
+        totals = {weight * loading_points for weight in base_weights}
         extra_weights = equipment.get("extraWeights", [])
         max_extra_per_point = equipment.get("maxExtraWeightsPerLoadingPoint", 0)
-        loading_points = 2  # Pair
-        
-        # Base combinations: each dumbbell weight × 2 (pair)
-        for db in available_dumbbells:
-            if isinstance(db, dict):
-                db_weight = db.get("weight", 0.0)
-                base_combinations.add(db_weight * loading_points)
-        
-        # Generate extra weight combinations and combine with base dumbbells
         if extra_weights and max_extra_per_point > 0:
-            extra_combos = generate_recursive_valid_subsets(
+            extra_totals = achievable_weight_totals(
                 extra_weights,
-                max_extra_per_point=max_extra_per_point
+                cost=lambda weight, thickness: 1,
+                max_cost=max_extra_per_point,
             )
-            
-            # Combine each base dumbbell with extra weight combinations
-            for db in available_dumbbells:
-                if isinstance(db, dict):
-                    db_weight = db.get("weight", 0.0)
-                    base_total = db_weight * loading_points
-                    
-                    # Add combinations with extra weights
-                    for extra_combo in extra_combos:
-                        # Extra weights are added per loading point, so multiply by loading_points
-                        extra_total = calculate_combination_weight(list(extra_combo), loading_points)
-                        base_combinations.add(base_total + extra_total)
-        
-        result = {w for w in base_combinations if w > 0}
+            for weight in base_weights:
+                for extra_total in extra_totals:
+                    totals.add(weight * loading_points + extra_total * loading_points)
+        return {w for w in totals if w > 0}
+
+    if eq_type == "BARBELL":
+        bar_weight = equipment.get("barWeight", 0.0)
+        # Kotlin parity: totals are barWeight alone plus each valid plate total (both sides).
+        result = {bar_weight}
+        for plate_total in plate_totals():
+            result.add(plate_total * 2 + bar_weight)
         return result
-    
+
+    elif eq_type == "DUMBBELLS":
+        # Pair: each dumbbell weight × 2, extras added on both dumbbells
+        return base_with_extras(equipment.get("dumbbells", []), 2)
+
     elif eq_type == "DUMBBELL":
-        available_dumbbells = equipment.get("dumbbells", [])
-        extra_weights = equipment.get("extraWeights", [])
-        max_extra_per_point = equipment.get("maxExtraWeightsPerLoadingPoint", 0)
-        loading_points = 1  # Single
-        
-        # Base combinations: each dumbbell weight
-        for db in available_dumbbells:
-            if isinstance(db, dict):
-                db_weight = db.get("weight", 0.0)
-                base_combinations.add(db_weight * loading_points)
-        
-        # Generate extra weight combinations and combine with base dumbbells
-        if extra_weights and max_extra_per_point > 0:
-            extra_combos = generate_recursive_valid_subsets(
-                extra_weights,
-                max_extra_per_point=max_extra_per_point
-            )
-            
-            # Combine each base dumbbell with extra weight combinations
-            for db in available_dumbbells:
-                if isinstance(db, dict):
-                    db_weight = db.get("weight", 0.0)
-                    base_total = db_weight * loading_points
-                    
-                    # Add combinations with extra weights
-                    for extra_combo in extra_combos:
-                        extra_total = calculate_combination_weight(list(extra_combo), loading_points)
-                        base_combinations.add(base_total + extra_total)
-        
-        result = {w for w in base_combinations if w > 0}
-        return result
-    
+        return base_with_extras(equipment.get("dumbbells", []), 1)
+
     elif eq_type == "MACHINE":
-        available_weights = equipment.get("availableWeights", [])
-        extra_weights = equipment.get("extraWeights", [])
-        max_extra_per_point = equipment.get("maxExtraWeightsPerLoadingPoint", 0)
-        loading_points = 1
-        
-        # Base combinations: each available weight
-        for weight_item in available_weights:
-            if isinstance(weight_item, dict):
-                weight_val = weight_item.get("weight", 0.0)
-                base_combinations.add(weight_val * loading_points)
-        
-        # Generate extra weight combinations and combine with base weights
-        if extra_weights and max_extra_per_point > 0:
-            extra_combos = generate_recursive_valid_subsets(
-                extra_weights,
-                max_extra_per_point=max_extra_per_point
-            )
-            
-            # Combine each base weight with extra weight combinations
-            for base_weight_item in available_weights:
-                if isinstance(base_weight_item, dict):
-                    base_weight = base_weight_item.get("weight", 0.0)
-                    base_total = base_weight * loading_points
-                    
-                    # Add combinations with extra weights
-                    for extra_combo in extra_combos:
-                        extra_total = calculate_combination_weight(list(extra_combo), loading_points)
-                        base_combinations.add(base_total + extra_total)
-        
-        result = {w for w in base_combinations if w > 0}
-        return result
-    
+        return base_with_extras(equipment.get("availableWeights", []), 1)
+
     elif eq_type == "PLATELOADEDCABLE":
-        available_plates = equipment.get("availablePlates", [])
-        sleeve_length = equipment.get("sleeveLength", equipment.get("barLength", 0))
-        loading_points = 1
-        
-        # Generate all plate combinations
-        plate_combos = generate_recursive_valid_subsets(
-            available_plates,
-            is_combination_valid=is_plate_combination_valid
-        )
-        
-        # Calculate weights
-        for combo in plate_combos:
-            combo_weight = calculate_combination_weight(list(combo), loading_points)
-            base_combinations.add(combo_weight)
-        
-        result = {w for w in base_combinations if w > 0}
-        return result
-    
+        return {w for w in plate_totals() if w > 0}
+
     elif eq_type == "WEIGHTVEST":
-        available_weights = equipment.get("availableWeights", [])
-        loading_points = 1
-        
         # Each available weight is a valid combination
-        for weight_item in available_weights:
-            if isinstance(weight_item, dict):
-                weight_val = weight_item.get("weight", 0.0)
-                base_combinations.add(weight_val * loading_points)
-        
-        result = {w for w in base_combinations if w > 0}
-        return result
-    
+        available_weights = equipment.get("availableWeights", [])
+        return {
+            weight_item.get("weight", 0.0)
+            for weight_item in available_weights
+            if isinstance(weight_item, dict) and weight_item.get("weight", 0.0) > 0
+        }
+
     else:
         # Unknown equipment type
         return set()
@@ -1045,6 +983,188 @@ def _format_weight_value_for_prompt(weight: float) -> str:
     return f"{float(weight):g}"
 
 
+MAX_CACHED_EQUIPMENT_CONTEXTS = 64
+
+
+class EquipmentContext:
+    """
+    Prompt renderings of one equipment/accessory list pair.
+
+    Each rendering is built at most once, on first use. Get instances through
+    `equipment_context`, which builds them from a private copy of the lists and shares them
+    between every prompt built from the same content.
+    """
+
+    def __init__(self, equipment_list, accessory_list):
+        self.equipment_list = equipment_list
+        self.accessory_list = accessory_list
+        # Sorted selectable totals for each primary equipment, in list order
+        self.selectable_weights = [
+            tuple(sorted(calculate_equipment_weight_combinations(eq))) for eq in equipment_list
+        ]
+
+    @cached_property
+    def plan_list(self) -> str:
+        lines = []
+        lines.append("Available Equipment (MUST USE ONLY THESE):")
+        lines.append("")
+        for eq in self.equipment_list:
+            eq_id = eq.get("id", "Unknown")
+            eq_name = eq.get("name", "Unknown")
+            eq_type = eq.get("type", "").upper()
+            lines.append(f"{eq_id} ({eq_name}, {eq_type})")
+        for acc in self.accessory_list:
+            acc_id = acc.get("id", "Unknown")
+            acc_name = acc.get("name", "Unknown")
+            acc_type = acc.get("type", "ACCESSORY").upper()
+            lines.append(f"{acc_id} ({acc_name}, {acc_type})")
+        return "\n".join(lines)
+
+    @cached_property
+    def planner_context(self) -> str:
+        lines = []
+        lines.append("Primary Equipment (valid for equipmentId only):")
+        lines.append("")
+
+        if self.equipment_list:
+            for eq, selectable_loads in zip(self.equipment_list, self.selectable_weights):
+                eq_id = eq.get("id", "Unknown")
+                eq_name = eq.get("name", "Unknown")
+                eq_type = eq.get("type", "").upper()
+                lines.append(f"{eq_id} ({eq_name}, {eq_type})")
+                lines.append("  - Use only as equipmentId, never as requiredAccessoryEquipmentIds.")
+                if eq_type == "CARDIO_MACHINE":
+                    lines.append("  - Compatible exercise types: COUNTUP, COUNTDOWN only.")
+                else:
+                    lines.append("  - Compatible exercise types: WEIGHT, BODY_WEIGHT only.")
+                if selectable_loads:
+                    loads_text = ", ".join(
+                        f"{_format_weight_value_for_prompt(weight)}kg"
+                        for weight in selectable_loads
+                    )
+                    lines.append(
+                        f"  - Selectable app loads for exact targets: {loads_text}"
+                    )
+                else:
+                    lines.append(
+                        "  - Selectable app loads for exact targets: none/no external load calculation."
+                    )
+        else:
+            lines.append("(none)")
+
+        lines.append("")
+        lines.append("Accessory Equipment (valid for requiredAccessoryEquipmentIds only):")
+        lines.append("")
+
+        if self.accessory_list:
+            for acc in self.accessory_list:
+                acc_id = acc.get("id", "Unknown")
+                acc_name = acc.get("name", "Unknown")
+                acc_type = acc.get("type", "ACCESSORY").upper()
+                lines.append(f"{acc_id} ({acc_name}, {acc_type})")
+                lines.append(
+                    "  - Accessory only: never use this ID as equipmentId; use it only in requiredAccessoryEquipmentIds."
+                )
+        else:
+            lines.append("(none)")
+
+        return "\n".join(lines)
+
+    @cached_property
+    def llm_context(self) -> str:
+        lines = []
+        lines.append("Available Equipment (MUST USE ONLY THESE):")
+        lines.append("")
+        
+        # Format weight-loaded equipment
+        for eq, sorted_combos in zip(self.equipment_list, self.selectable_weights):
+            eq_id = eq.get("id", "Unknown")
+            eq_name = eq.get("name", "Unknown")
+            eq_type = eq.get("type", "").upper()
+            
+            lines.append(f"{eq_id} ({eq_name}, {eq_type}):")
+            lines.append(f"  - Type: {eq_type}")
+            
+            if sorted_combos:
+                # Format as comma-separated list (matching ExerciseHistoryExport.kt format)
+                combo_str = ", ".join(f"{w}kg" for w in sorted_combos)
+                total_count = len(sorted_combos)
+                lines.append(f"  - Available Total Weights: {combo_str} (total {total_count} combinations)")
+            else:
+                lines.append(f"  - Available Total Weights: (none calculated)")
+            
+            # Add equipment-specific details
+            if eq_type == "BARBELL":
+                bar_weight = eq.get("barWeight", 0.0)
+                if bar_weight > 0:
+                    lines.append(f"  - Bar Weight: {bar_weight}kg")
+            elif eq_type in ["DUMBBELLS", "DUMBBELL"]:
+                max_extra = eq.get("maxExtraWeightsPerLoadingPoint", 0)
+                if max_extra > 0:
+                    lines.append(f"  - Max Extra Weights Per Loading Point: {max_extra}")
+            elif eq_type == "MACHINE":
+                max_extra = eq.get("maxExtraWeightsPerLoadingPoint", 0)
+                if max_extra > 0:
+                    lines.append(f"  - Max Extra Weights Per Loading Point: {max_extra}")
+            
+            lines.append("")
+        
+        # Format accessory equipment
+        for acc in self.accessory_list:
+            acc_id = acc.get("id", "Unknown")
+            acc_name = acc.get("name", "Unknown")
+            acc_type = acc.get("type", "ACCESSORY").upper()
+            
+            lines.append(f"{acc_id} ({acc_name}, {acc_type}):")
+            lines.append(f"  - Type: {acc_type}")
+            lines.append(f"  - Name: {acc_name}")
+            lines.append("")
+        
+        return "\n".join(lines)
+
+    @cached_property
+    def details_json(self) -> str:
+        return json.dumps(
+            {"equipments": self.equipment_list, "accessoryEquipments": self.accessory_list},
+            indent=2,
+        )
+
+
+_EQUIPMENT_CONTEXTS: "OrderedDict[str, EquipmentContext]" = OrderedDict()
+_EQUIPMENT_CONTEXTS_LOCK = threading.Lock()
+
+
+def equipment_context(equipment_list, accessory_list=None) -> EquipmentContext:
+    """
+    Shared EquipmentContext for these lists, keyed by a hash of their JSON content.
+
+    The most recently used MAX_CACHED_EQUIPMENT_CONTEXTS contexts are kept, so the planner,
+    every emitter and their retries render a given equipment set (and compute its
+    selectable weights) only once.
+
+    Args:
+        equipment_list: List of equipment dictionaries
+        accessory_list: Optional list of accessory equipment dictionaries
+
+    Returns:
+        EquipmentContext: Renderings for exactly this content
+    """
+    content = json.dumps([equipment_list or [], accessory_list or []], default=str)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    with _EQUIPMENT_CONTEXTS_LOCK:
+        context = _EQUIPMENT_CONTEXTS.get(digest)
+        if context is not None:
+            _EQUIPMENT_CONTEXTS.move_to_end(digest)
+            return context
+    context = EquipmentContext(*json.loads(content))
+    with _EQUIPMENT_CONTEXTS_LOCK:
+        context = _EQUIPMENT_CONTEXTS.setdefault(digest, context)
+        _EQUIPMENT_CONTEXTS.move_to_end(digest)
+        while len(_EQUIPMENT_CONTEXTS) > MAX_CACHED_EQUIPMENT_CONTEXTS:
+            _EQUIPMENT_CONTEXTS.popitem(last=False)
+    return context
+
+
 def format_equipment_list_for_plan(equipment_list, accessory_list=None):
     """
     Format equipment for plan index: id, type, and name only (no weight combinations).
@@ -1057,21 +1177,7 @@ def format_equipment_list_for_plan(equipment_list, accessory_list=None):
     Returns:
         str: Short text, one line per equipment/accessory with id, type, name
     """
-    lines = []
-    lines.append("Available Equipment (MUST USE ONLY THESE):")
-    lines.append("")
-    for eq in equipment_list:
-        eq_id = eq.get("id", "Unknown")
-        eq_name = eq.get("name", "Unknown")
-        eq_type = eq.get("type", "").upper()
-        lines.append(f"{eq_id} ({eq_name}, {eq_type})")
-    if accessory_list:
-        for acc in accessory_list:
-            acc_id = acc.get("id", "Unknown")
-            acc_name = acc.get("name", "Unknown")
-            acc_type = acc.get("type", "ACCESSORY").upper()
-            lines.append(f"{acc_id} ({acc_name}, {acc_type})")
-    return "\n".join(lines)
+    return equipment_context(equipment_list, accessory_list).plan_list
 
 
 def format_planner_equipment_context(equipment_list, accessory_list=None):
@@ -1082,55 +1188,7 @@ def format_planner_equipment_context(equipment_list, accessory_list=None):
     selectable app loads for primary equipment so exact target loads can be
     planned against the current equipment file.
     """
-    lines = []
-    lines.append("Primary Equipment (valid for equipmentId only):")
-    lines.append("")
-
-    if equipment_list:
-        for eq in equipment_list:
-            eq_id = eq.get("id", "Unknown")
-            eq_name = eq.get("name", "Unknown")
-            eq_type = eq.get("type", "").upper()
-            lines.append(f"{eq_id} ({eq_name}, {eq_type})")
-            lines.append("  - Use only as equipmentId, never as requiredAccessoryEquipmentIds.")
-            if eq_type == "CARDIO_MACHINE":
-                lines.append("  - Compatible exercise types: COUNTUP, COUNTDOWN only.")
-            else:
-                lines.append("  - Compatible exercise types: WEIGHT, BODY_WEIGHT only.")
-            selectable_loads = calculate_equipment_weight_combinations(eq)
-            if selectable_loads:
-                sorted_loads = sorted(selectable_loads)
-                loads_text = ", ".join(
-                    f"{_format_weight_value_for_prompt(weight)}kg"
-                    for weight in sorted_loads
-                )
-                lines.append(
-                    f"  - Selectable app loads for exact targets: {loads_text}"
-                )
-            else:
-                lines.append(
-                    "  - Selectable app loads for exact targets: none/no external load calculation."
-                )
-    else:
-        lines.append("(none)")
-
-    lines.append("")
-    lines.append("Accessory Equipment (valid for requiredAccessoryEquipmentIds only):")
-    lines.append("")
-
-    if accessory_list:
-        for acc in accessory_list:
-            acc_id = acc.get("id", "Unknown")
-            acc_name = acc.get("name", "Unknown")
-            acc_type = acc.get("type", "ACCESSORY").upper()
-            lines.append(f"{acc_id} ({acc_name}, {acc_type})")
-            lines.append(
-                "  - Accessory only: never use this ID as equipmentId; use it only in requiredAccessoryEquipmentIds."
-            )
-    else:
-        lines.append("(none)")
-
-    return "\n".join(lines)
+    return equipment_context(equipment_list, accessory_list).planner_context
 
 
 def format_equipment_for_llm(equipment_list, accessory_list=None):
@@ -1145,60 +1203,7 @@ def format_equipment_for_llm(equipment_list, accessory_list=None):
     Returns:
         str: Formatted markdown/text representation showing equipment with total weight combinations
     """
-    lines = []
-    lines.append("Available Equipment (MUST USE ONLY THESE):")
-    lines.append("")
-    
-    # Format weight-loaded equipment
-    for eq in equipment_list:
-        eq_id = eq.get("id", "Unknown")
-        eq_name = eq.get("name", "Unknown")
-        eq_type = eq.get("type", "").upper()
-        
-        lines.append(f"{eq_id} ({eq_name}, {eq_type}):")
-        lines.append(f"  - Type: {eq_type}")
-        
-        # Calculate valid weight combinations
-        valid_combinations = calculate_equipment_weight_combinations(eq)
-        
-        if valid_combinations:
-            sorted_combos = sorted(valid_combinations)
-            # Format as comma-separated list (matching ExerciseHistoryExport.kt format)
-            combo_str = ", ".join(f"{w}kg" for w in sorted_combos)
-            total_count = len(sorted_combos)
-            lines.append(f"  - Available Total Weights: {combo_str} (total {total_count} combinations)")
-        else:
-            lines.append(f"  - Available Total Weights: (none calculated)")
-        
-        # Add equipment-specific details
-        if eq_type == "BARBELL":
-            bar_weight = eq.get("barWeight", 0.0)
-            if bar_weight > 0:
-                lines.append(f"  - Bar Weight: {bar_weight}kg")
-        elif eq_type in ["DUMBBELLS", "DUMBBELL"]:
-            max_extra = eq.get("maxExtraWeightsPerLoadingPoint", 0)
-            if max_extra > 0:
-                lines.append(f"  - Max Extra Weights Per Loading Point: {max_extra}")
-        elif eq_type == "MACHINE":
-            max_extra = eq.get("maxExtraWeightsPerLoadingPoint", 0)
-            if max_extra > 0:
-                lines.append(f"  - Max Extra Weights Per Loading Point: {max_extra}")
-        
-        lines.append("")
-    
-    # Format accessory equipment
-    if accessory_list:
-        for acc in accessory_list:
-            acc_id = acc.get("id", "Unknown")
-            acc_name = acc.get("name", "Unknown")
-            acc_type = acc.get("type", "ACCESSORY").upper()
-            
-            lines.append(f"{acc_id} ({acc_name}, {acc_type}):")
-            lines.append(f"  - Type: {acc_type}")
-            lines.append(f"  - Name: {acc_name}")
-            lines.append("")
-    
-    return "\n".join(lines)
+    return equipment_context(equipment_list, accessory_list).llm_context
 
 
 def format_equipment_for_conversation(provided_equipment):
@@ -1408,11 +1413,7 @@ DEFINITION_OWNED_FIELDS = (
 
 def build_exercise_definition_id(definition):
     """Return the deterministic schema-v2 ID for definition-owned content."""
-    content = {
-        key: copy.deepcopy(value)
-        for key, value in definition.items()
-        if key != "id"
-    }
+    content = {key: value for key, value in definition.items() if key != "id"}
     stable_content = json.dumps(content, sort_keys=True, separators=(",", ":"))
     return str(
         uuid.uuid5(uuid.NAMESPACE_URL, f"mwa-exercise-definition-v2:{stable_content}")
@@ -1429,6 +1430,9 @@ def apply_exercise_library_schema_v2(
     Exercise components remain fully materialized for legacy app readers. Definition identity is
     movement/name + exercise type + equipment; programming fields and component IDs remain local
     to each occurrence, which permits periodized prescriptions of one shared movement.
+
+    Definition-owned field values are shared (not copied) between a definition and every
+    prescription linked to it, so the returned package must be treated as read-only JSON.
     """
     if not isinstance(workout_package, dict):
         raise ValueError("Workout package must be an object")
@@ -1479,7 +1483,7 @@ def apply_exercise_library_schema_v2(
         }
         for field in DEFINITION_OWNED_FIELDS:
             if field != "name" and field in exercise:
-                definition[field] = copy.deepcopy(exercise[field])
+                definition[field] = exercise[field]
         definition["id"] = build_exercise_definition_id(definition)
         return definition
 
@@ -1489,14 +1493,15 @@ def apply_exercise_library_schema_v2(
         key = identity_key(exercise)
         definition = canonical_by_identity.get(key)
         if definition is None:
-            definition = copy.deepcopy(supplied_by_identity.get(key) or generated_definition(exercise))
+            # Supplied definitions were already copied above; generated ones are new
+            definition = supplied_by_identity.get(key) or generated_definition(exercise)
             canonical_by_identity[key] = definition
 
         exercise["exerciseDefinitionId"] = definition["id"]
         exercise["placementNotes"] = exercise.get("placementNotes") or exercise.get("notes") or ""
         for field in DEFINITION_OWNED_FIELDS:
             if field in definition:
-                exercise[field] = copy.deepcopy(definition[field])
+                exercise[field] = definition[field]
             else:
                 exercise.pop(field, None)
 
@@ -1579,9 +1584,9 @@ def convert_placeholders_to_uuids(placeholder_workout_store, id_manager, validat
     ensure_unique_ids(uuid_workout_store)
     
     # Optional final validation against strict schema
-    if validate_final and validate is not None:
+    if validate_final and SCHEMA_VALIDATORS.available:
         try:
-            validate(instance=uuid_workout_store, schema=JSON_SCHEMA)
+            SCHEMA_VALIDATORS.validate(uuid_workout_store, STRICT_SCHEMA)
             _out("✓ Final UUID-based validation passed")
         except Exception as final_err:
             _out(f"Warning: Final UUID validation failed (this should be rare): {final_err}")
@@ -2874,15 +2879,16 @@ def reassemble_item(workout_json, path_info, fixed_item):
     Reassemble the fixed item back into the full workout JSON structure.
     
     Args:
-        workout_json: The original workout JSON structure
+        workout_json: The original workout JSON structure (not modified)
         path_info: Parsed path information from parse_error_path()
         fixed_item: The fixed item (could be a full item or just a field value)
     
     Returns:
-        dict: Updated workout JSON with the fixed item in place
+        dict: Updated workout JSON with the fixed item in place. Only the containers on the
+              item's path are copied; every other subtree is shared with workout_json.
     """
-    import copy
-    result = copy.deepcopy(workout_json)
+    writer = DocumentWriter(workout_json)
+    result = writer.root
     
     top_level = path_info.get("top_level_array")
     array_index = path_info.get("array_index")
@@ -2895,9 +2901,9 @@ def reassemble_item(workout_json, path_info, fixed_item):
     if top_level not in result:
         return result
     
-    array = result[top_level]
-    if not isinstance(array, list) or array_index >= len(array):
+    if not isinstance(result[top_level], list) or array_index >= len(result[top_level]):
         return result
+    array = writer.writable([top_level])
     
     # Navigate to the item location
     if not nested_path:
@@ -2905,14 +2911,9 @@ def reassemble_item(workout_json, path_info, fixed_item):
         array[array_index] = fixed_item
     else:
         # Error is nested within the item - need to update specific field
-        base_item = array[array_index]
-        
-        # Build a path list for navigation
-        path_parts = [base_item] + nested_path
-        
         # Navigate to the parent container
-        parent = base_item
-        for i, path_part in enumerate(nested_path[:-1]):
+        parent = array[array_index]
+        for path_part in nested_path[:-1]:
             if isinstance(path_part, int):
                 if isinstance(parent, list) and path_part < len(parent):
                     parent = parent[path_part]
@@ -2925,6 +2926,8 @@ def reassemble_item(workout_json, path_info, fixed_item):
                     return result
             else:
                 return result
+        if isinstance(parent, (dict, list)):
+            parent = writer.writable([top_level, array_index] + list(nested_path[:-1]))
         
         # Set the fixed value at the final path
         final_path = nested_path[-1]
@@ -0,0 +1,223 @@
+"""Asyncio scheduler for parallel LLM emission with shared rate and concurrency limits."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from .api_client import caller_retries_connection_errors, is_connection_error, is_rate_limit_error
+
+REQUESTS_PER_MINUTE_ENV = "WORKOUT_GENERATOR_REQUESTS_PER_MINUTE"
+TOKENS_PER_MINUTE_ENV = "WORKOUT_GENERATOR_TOKENS_PER_MINUTE"
+MAX_CONCURRENCY_ENV = "WORKOUT_GENERATOR_MAX_CONCURRENCY"
+DEFAULT_MAX_CONCURRENCY = 32
+MAX_THROTTLE_RETRIES = 4
+THROTTLE_BASE_DELAY = 2.0
+
+
+def is_throttling_error(e) -> bool:
+    """429s and connection resets: the provider is overloaded, so back off instead of failing the item."""
+    return is_rate_limit_error(e) or is_connection_error(e)
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously.
+
+    `reserve` always succeeds and may drive the balance negative; the caller sleeps for the
+    returned delay, so concurrent callers queue up in the order they reserved.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.balance = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = self._clock()
+            self.balance = min(self.capacity, self.balance + (now - self._updated) * self.rate)
+            self._updated = now
+            self.balance -= min(float(amount), self.capacity)
+            return 0.0 if self.balance >= 0 else -self.balance / self.rate
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by one after a full window of successes and halves on each throttle.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = max(int(maximum), 1)
+        self.minimum = max(min(int(minimum), self.maximum), 1)
+        self.limit = self.maximum
+        self.throttles = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.limit:
+                self.limit = min(self.maximum, self.limit + 1)
+                self._successes = 0
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.limit = max(self.minimum, self.limit // 2)
+            self._successes = 0
+            self.throttles += 1
+
+
+class EmissionLimits:
+    """
+    Process-wide request, token and concurrency limits shared by every emission stage.
+
+    `max_in_flight` caps one run's in-flight requests; the adaptive limit under it is shared,
+    so a throttle seen by any stage slows every stage down.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_in_flight = self.concurrency.maximum
+
+    @property
+    def in_flight_limit(self) -> int:
+        return min(self.max_in_flight, self.concurrency.limit)
+
+    @classmethod
+    def from_env(cls) -> "EmissionLimits":
+        requests_per_minute = os.environ.get(REQUESTS_PER_MINUTE_ENV)
+        tokens_per_minute = os.environ.get(TOKENS_PER_MINUTE_ENV)
+        max_concurrency = os.environ.get(MAX_CONCURRENCY_ENV)
+        return cls(
+            requests_per_minute=float(requests_per_minute) if requests_per_minute else None,
+            tokens_per_minute=float(tokens_per_minute) if tokens_per_minute else None,
+            max_concurrency=int(max_concurrency) if max_concurrency else DEFAULT_MAX_CONCURRENCY,
+        )
+
+    def with_max_concurrency(self, max_concurrency: int) -> "EmissionLimits":
+        """Limits sharing this instance's budgets and adaptive concurrency, with a lower in-flight cap."""
+        limits = EmissionLimits()
+        limits.requests, limits.tokens, limits.concurrency = self.requests, self.tokens, self.concurrency
+        limits.max_in_flight = max(min(int(max_concurrency), self.max_in_flight), 1)
+        return limits
+
+    def admission_delay(self, estimated_tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None and estimated_tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+
+_LIMITS: Optional[EmissionLimits] = None
+_LIMITS_LOCK = threading.Lock()
+
+
+def get_emission_limits() -> EmissionLimits:
+    global _LIMITS
+    with _LIMITS_LOCK:
+        if _LIMITS is None:
+            _LIMITS = EmissionLimits.from_env()
+        return _LIMITS
+
+
+def _call_once(call, item):
+    # The engine re-queues throttled items under the shared limits, so the API helpers must not
+    # also sleep through their own connection retries while holding a slot
+    with caller_retries_connection_errors():
+        return call(item)
+
+
+async def _run_all(items, call, limits, estimate_tokens, cancelled, sleep, after):
+    loop = asyncio.get_running_loop()
+    condition = asyncio.Condition()
+    in_flight = 0
+    done = [asyncio.Event() for _ in items]
+    executor = ThreadPoolExecutor(max_workers=min(limits.max_in_flight, len(items)))
+
+    async def run_one(index, item):
+        nonlocal in_flight
+        try:
+            for upstream in (after[index] if after else ()):
+                await done[upstream].wait()
+            attempt = 0
+            while True:
+                async with condition:
+                    await condition.wait_for(lambda: in_flight < limits.in_flight_limit)
+                    in_flight += 1
+                try:
+                    if cancelled is not None and cancelled.is_set():
+                        return None
+                    delay = limits.admission_delay(estimate_tokens(item) if estimate_tokens else 0)
+                    if delay:
+                        await sleep(delay)
+                    outcome = await loop.run_in_executor(executor, _call_once, call, item)
+                    limits.concurrency.on_success()
+                    return outcome
+                except Exception as e:
+                    if not is_throttling_error(e) or attempt >= MAX_THROTTLE_RETRIES:
+                        raise
+                    limits.concurrency.on_throttle()
+                finally:
+                    async with condition:
+                        in_flight -= 1
+                        condition.notify_all()
+                await sleep(THROTTLE_BASE_DELAY * (2 ** attempt) + random.uniform(0, 1))
+                attempt += 1
+        finally:
+            done[index].set()
+
+    try:
+        return await asyncio.gather(*(run_one(index, item) for index, item in enumerate(items)), return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_emissions(
+    items: Sequence[Any],
+    call: Callable[[Any], Any],
+    limits: Optional[EmissionLimits] = None,
+    estimate_tokens: Optional[Callable[[Any], int]] = None,
+    cancelled: Optional[threading.Event] = None,
+    sleep: Callable[[float], Any] = asyncio.sleep,
+    after: Optional[Sequence[Sequence[int]]] = None,
+) -> List[Any]:
+    """
+    Run the blocking `call(item)` for every item on one event loop under the shared limits.
+
+    Each call runs in a worker thread (the emitters share one client and its connection pool).
+    Throttling errors shrink the concurrency limit and re-queue the item with exponential
+    backoff (the API helpers' own connection retry is off inside `call`, so this is the only
+    retry); any other exception, or a throttle after MAX_THROTTLE_RETRIES, is returned in
+    place of that item's result.
+
+    With `after`, item i starts only once every item index in `after[i]` has finished
+    (successfully or not), so dependent work starts as soon as its own inputs are ready.
+
+    Returns:
+        list: One outcome per item, in input order (result, exception, or None if cancelled)
+    """
+    if not items:
+        return []
+    limits = limits or get_emission_limits()
+    return asyncio.run(_run_all(list(items), call, limits, estimate_tokens, cancelled, sleep, after))
@@ -8,10 +8,13 @@ import time
 import traceback
 import uuid
 import copy
+import functools
 from datetime import datetime
 
 from .deps import resolve_pipeline_deps
 from .domain_ops import strip_rep_range_fields_for_timed_exercises_in_workout_store
+from .api_client import PromptUsageMeter
+from .prompt_prefix import EmitterPromptPrefix
 from .plan_contract import (
     ContractValidationError,
     hydrate_plan_index_from_exercise_library,
@@ -199,6 +202,45 @@ def _extract_structured_generation_facts(custom_prompt):
     return "\n".join(structured_lines)
 
 
+def _workout_exercise_refs(workout_entry):
+    """Exercise IDs a plan-index workout references, directly or through superset groups."""
+    refs = list(workout_entry.get("exerciseIds") or [])
+    for group in workout_entry.get("supersetGroups") or []:
+        if isinstance(group, dict):
+            refs.extend(group.get("exerciseIds") or [])
+    return list(dict.fromkeys(ref for ref in refs if isinstance(ref, str)))
+
+
+def _workout_exercise_index(workout_entry, exercise_definitions):
+    """
+    The exercise_index handed to emit_workout_structure: only the definitions the workout references.
+
+    Used both when a workout is emitted alongside Step 3 and in Step 4 (including contract
+    retries), so a workout gets the same prompt whichever path emits it.
+    """
+    return {
+        ex_id: exercise_definitions[ex_id]
+        for ex_id in _workout_exercise_refs(workout_entry)
+        if exercise_definitions.get(ex_id) is not None
+    }
+
+
+def _workout_emitter_args_builder(workout_entry, client, context_summary, plan_index, use_reasoner, logger):
+    """Build emit_workout_structure arguments from the exercise definitions emitted so far."""
+
+    def build(exercise_results):
+        return {
+            "client": client,
+            "context_summary": context_summary,
+            "plan_index": plan_index,
+            "exercise_index": _workout_exercise_index(workout_entry, exercise_results),
+            "use_reasoner": use_reasoner,
+            "logger": logger,
+        }
+
+    return build
+
+
 def execute_workout_generation(
     client,
     messages,
@@ -226,6 +268,7 @@ def execute_workout_generation(
     emit_exercise_definition = deps.emit_exercise_definition
     emit_workout_structure = deps.emit_workout_structure
     parallel_emit_items = deps.parallel_emit_items
+    pipelined_emit_items = deps.pipelined_emit_items
     assemble_placeholder_workout_store = deps.assemble_placeholder_workout_store
     sync_exercises_from_definitions = deps.sync_exercises_from_definitions
     sync_exercises_from_plan_index = deps.sync_exercises_from_plan_index
@@ -242,6 +285,7 @@ def execute_workout_generation(
     format_equipment_for_llm = deps.format_equipment_for_llm
     EquipmentItem = deps.EquipmentItem
     _default_script_dir = deps.default_script_dir
+    open_response_cache = deps.open_response_cache
     """
     Execute the complete workout generation process.
     
@@ -282,6 +326,15 @@ def execute_workout_generation(
         except (NameError, AttributeError):
             script_dir = os.getcwd()
 
+    # Serve emitter requests identical to an earlier run (same model, messages and limits) from disk
+    response_cache = open_response_cache(script_dir) if open_response_cache is not None else None
+    if response_cache is not None:
+        emit_equipment_item = functools.partial(emit_equipment_item, response_cache=response_cache)
+        emit_accessory_equipment_item = functools.partial(emit_accessory_equipment_item, response_cache=response_cache)
+        emit_exercise_definition = functools.partial(emit_exercise_definition, response_cache=response_cache)
+        emit_workout_structure = functools.partial(emit_workout_structure, response_cache=response_cache)
+    prompt_usage = PromptUsageMeter()
+
     # Test connection before starting generation (skip if resuming)
     if not resume_session_id:
         success, error_msg = test_connection(client, show_message=True, logger=logger)
@@ -348,8 +401,10 @@ def execute_workout_generation(
             # Also extract any placeholders that might already be in the structure
             id_manager.extract_placeholders_from_json(converted_acc)
 
-        planner_exercise_definitions = copy.deepcopy(supplied_exercise_definitions)
-        for definition in planner_exercise_definitions:
+        # Only the equipment references change; every other field is shared with the library
+        planner_exercise_definitions = []
+        for supplied_definition in supplied_exercise_definitions:
+            definition = dict(supplied_definition)
             equipment_id = definition.get("equipmentId")
             if equipment_id in id_manager.uuid_to_placeholder:
                 definition["equipmentId"] = id_manager.uuid_to_placeholder[equipment_id]
@@ -357,6 +412,7 @@ def execute_workout_generation(
                 id_manager.uuid_to_placeholder.get(accessory_id, accessory_id)
                 for accessory_id in definition.get("requiredAccessoryEquipmentIds") or []
             ]
+            planner_exercise_definitions.append(definition)
         
         # Update provided_equipment with converted versions (now using placeholders)
         provided_equipment = {
@@ -528,6 +584,12 @@ def execute_workout_generation(
             step_data["step_0_structured_generation_facts"] = structured_generation_facts
             _gen_print("Step 0: Using saved context summary")
 
+        # Every emitter request starts with the same system prompt and generation context,
+        # so the provider can serve that prefix from its prompt cache after the first request
+        prompt_prefix = EmitterPromptPrefix(context_summary, usage_meter=prompt_usage)
+        emit_equipment_item = functools.partial(emit_equipment_item, prompt_prefix=prompt_prefix)
+        emit_accessory_equipment_item = functools.partial(emit_accessory_equipment_item, prompt_prefix=prompt_prefix)
+
         # Step 1: Generate PlanIndex (planner stage)
         if current_step < 1:
             step_start_time = time.time()
@@ -835,6 +897,14 @@ def execute_workout_generation(
                 step_data["step_2_provided_equipment"] = provided_equipment
             _gen_print(f"Step 2: Using saved equipment items ({len(equipment_items)} items, {len(accessory_items)} accessories)")
         
+        # Equipment is final from here on; add it to the shared context for exercises and workouts
+        prompt_prefix = prompt_prefix.with_equipment(format_equipment_for_llm(
+            [eq for eq in equipment_items.values() if isinstance(eq, dict)],
+            [acc for acc in accessory_items.values() if isinstance(acc, dict)],
+        ))
+        emit_exercise_definition = functools.partial(emit_exercise_definition, prompt_prefix=prompt_prefix)
+        emit_workout_structure = functools.partial(emit_workout_structure, prompt_prefix=prompt_prefix)
+
         # Step 3: Emit exercise definitions (chunked emitters) - parallelized
         if current_step < 3:
             step_start_time = time.time()
@@ -869,14 +939,35 @@ def execute_workout_generation(
                         "logger": logger
                     }
                 ))
+            early_workout_results = {}
+            workout_refs_by_id = {wo.get("id"): _workout_exercise_refs(wo) for wo in plan_index.get("workouts", [])}
             try:
-                exercise_results, exercise_convs = parallel_emit_items(
-                    exercise_items_list,
-                    emit_exercise_definition,
-                    "Step 3: Emitting exercises",
-                    logger=logger,
-                    fail_fast=True,
-                )
+                if pipelined_emit_items is not None:
+                    # Start each Step 4 workout as soon as the exercises it references are emitted
+                    early_workout_items = [
+                        (wo.get("id"), _workout_emitter_args_builder(wo, client, context_summary, plan_index, use_reasoner_for_emitting, logger))
+                        for wo in plan_index.get("workouts", [])
+                        if wo.get("id")
+                    ]
+                    (exercise_results, exercise_convs), (early_workout_results, early_workout_convs) = pipelined_emit_items(
+                        exercise_items_list,
+                        emit_exercise_definition,
+                        early_workout_items,
+                        emit_workout_structure,
+                        lambda wo_id: workout_refs_by_id.get(wo_id, []),
+                        "Step 3: Emitting exercises (and ready workouts)",
+                        logger=logger,
+                        fail_fast=True,
+                    )
+                    aggregated_emitter_conversations.extend(early_workout_convs)
+                else:
+                    exercise_results, exercise_convs = parallel_emit_items(
+                        exercise_items_list,
+                        emit_exercise_definition,
+                        "Step 3: Emitting exercises",
+                        logger=logger,
+                        fail_fast=True,
+                    )
             except Exception as e:
                 _log_step_error("Step 3", e)
                 return {"success": False, "filepath": None, "error": str(e)}
@@ -998,6 +1089,19 @@ def execute_workout_generation(
             timing_data["total_time_seconds"] += step_time
             _gen_print(f"✓ Emitted {len(exercise_definitions)} exercise definition(s) ({step_time:.2f}s)")
             step_data["step_3_exercise_definitions"] = exercise_definitions
+            # Keep early workouts only if every exercise they were built from survived the Step 3 retries
+            pipelined_workout_structures = {
+                wo_id: structure
+                for wo_id, structure in early_workout_results.items()
+                if structure is not None
+                and all(
+                    exercise_definitions.get(ex_id) is exercise_results.get(ex_id)
+                    for ex_id in workout_refs_by_id.get(wo_id, [])
+                )
+            }
+            if pipelined_workout_structures:
+                _gen_print(f"  → {len(pipelined_workout_structures)} workout structure(s) emitted alongside Step 3")
+            step_data["step_4_pipelined_workout_structures"] = pipelined_workout_structures
             timing_data["last_step_time"] = datetime.now().isoformat()
             _, save_time = save_generation_progress(session_id, 3, step_data, custom_prompt, conversation_hash, id_manager, script_dir, timing_data, use_reasoner_for_emitting)
         else:
@@ -1011,6 +1115,7 @@ def execute_workout_generation(
                 _log_step_error("Step 3", e, prefix="Contract validation failed")
                 return {"success": False, "filepath": None, "error": str(e)}
             step_data["step_3_exercise_definitions"] = exercise_definitions
+            pipelined_workout_structures = progress_data["step_data"].get("step_4_pipelined_workout_structures") or {}
             _gen_print(f"Step 3: Using saved exercise definitions ({len(exercise_definitions)} exercises)")
         
         # Step 4: Emit workout structures (chunked emitters) - parallelized
@@ -1018,16 +1123,18 @@ def execute_workout_generation(
             step_start_time = time.time()
             _gen_print("Step 4: Emitting workout structures...")
             workout_entries = [wo for wo in plan_index.get("workouts", []) if wo.get("id")]
+            step_data.pop("step_4_pipelined_workout_structures", None)
             workout_items_list = [
                 (wo.get("id"), {
                     "client": client,
                     "context_summary": context_summary,
                     "plan_index": plan_index,
-                    "exercise_index": exercise_definitions,
+                    "exercise_index": _workout_exercise_index(wo, exercise_definitions),
                     "use_reasoner": use_reasoner_for_emitting,
                     "logger": logger
                 })
                 for wo in workout_entries
+                if wo.get("id") not in pipelined_workout_structures
             ]
             try:
                 workout_results, workout_convs = parallel_emit_items(
@@ -1041,7 +1148,8 @@ def execute_workout_generation(
                 return {"success": False, "filepath": None, "error": str(e)}
             aggregated_emitter_conversations.extend(workout_convs)
             # Filter out None results (cancelled/failed items)
-            workout_structures = {k: v for k, v in workout_results.items() if v is not None}
+            workout_structures = dict(pipelined_workout_structures)
+            workout_structures.update({k: v for k, v in workout_results.items() if v is not None})
             contract_retry_budget = 2
             contract_retry_count = 0
             while True:
@@ -1084,7 +1192,7 @@ def execute_workout_generation(
                                 client=client,
                                 context_summary=context_summary,
                                 plan_index=plan_index,
-                                exercise_index=exercise_definitions,
+                                exercise_index=_workout_exercise_index(wo_entry, exercise_definitions),
                                 use_reasoner=use_reasoner_for_emitting,
                                 logger=logger,
                                 contract_error_context=per_wo_error_context,
@@ -1114,6 +1222,9 @@ def execute_workout_generation(
             step_data["step_4_workout_structures"] = workout_structures
             _gen_print(f"Step 4: Using saved workout structures ({len(workout_structures)} workouts)")
         
+        for line in prompt_usage.summary_lines():
+            _gen_print(f"  Prompt cache, {line}")
+
         # Step 5: Assemble placeholder workout plan package
         if current_step < 5:
             step_start_time = time.time()
@@ -6,10 +6,23 @@ import copy
 import re
 from typing import Any, Dict, Iterable, List, Set, Tuple
 
+from .plan_document import DocumentWriter, pointer_parts
+
 
 def apply_json_patch(json_obj: Dict[str, Any], patch: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Apply a JSON Patch (RFC 6902) to a JSON object."""
-    result = copy.deepcopy(json_obj)
+    """
+    Apply a JSON Patch (RFC 6902) to a JSON object.
+
+    The input is not modified. The result is a copy-on-write version of it: only containers
+    on patched paths are copied and everything else is shared with the input.
+    """
+    writer = DocumentWriter(json_obj)
+    result = writer.root
+
+    def own_parent(path_str: str) -> None:
+        # Make the container that the operation mutates private to the result
+        if "/" in path_str:
+            writer.writable(pointer_parts(path_str.rsplit("/", 1)[0]))
 
     def get_path(obj: Any, path_str: str) -> Any:
         if path_str == "":
@@ -78,6 +91,7 @@ def apply_json_patch(json_obj: Dict[str, Any], patch: List[Dict[str, Any]]) -> D
 
         if op == "add":
             value = operation.get("value")
+            own_parent(path)
             if path.endswith("/-") or (
                 isinstance(get_path(result, path.rsplit("/", 1)[0]), list) if "/" in path else isinstance(result, list)
             ):
@@ -91,6 +105,7 @@ def apply_json_patch(json_obj: Dict[str, Any], patch: List[Dict[str, Any]]) -> D
                 set_path(result, path, value)
 
         elif op == "remove":
+            own_parent(path)
             if "/" in path:
                 parent_path = "/".join(path.split("/")[:-1])
                 key = path.split("/")[-1].replace("~1", "/").replace("~0", "~")
@@ -109,12 +124,14 @@ def apply_json_patch(json_obj: Dict[str, Any], patch: List[Dict[str, Any]]) -> D
 
         elif op == "replace":
             value = operation.get("value")
+            own_parent(path)
             set_path(result, path, value)
 
         elif op == "move":
             from_path = operation.get("from", "")
             value = get_path(result, from_path)
             if value is not None:
+                own_parent(from_path)
                 if "/" in from_path:
                     parent_path = "/".join(from_path.split("/")[:-1])
                     key = from_path.split("/")[-1].replace("~1", "/").replace("~0", "~")
@@ -130,12 +147,16 @@ def apply_json_patch(json_obj: Dict[str, Any], patch: List[Dict[str, Any]]) -> D
                             pass
                 else:
                     result.pop(from_path, None)
+                # After the removal, so list indexes on the target path are current
+                own_parent(path)
                 set_path(result, path, value)
 
         elif op == "copy":
             from_path = operation.get("from", "")
             value = get_path(result, from_path)
             if value is not None:
+                own_parent(path)
+                # A snapshot: the source may be an ancestor of the target
                 set_path(result, path, copy.deepcopy(value))
 
     return result
@@ -344,6 +365,45 @@ def collect_changed_json_paths(before: Any, after: Any, base_path: str = "") ->
     return changed
 
 
+
+def diff_json(before: Any, after: Any, base_path: str = "") -> List[Dict[str, Any]]:
+    """
+    JSON Patch that turns `before` into `after`, in the subset apply_json_patch supports.
+
+    Objects are diffed key by key and lists index by index; surplus list items are removed
+    from the end and new ones appended with "/-".
+    """
+    if type(before) is not type(after):
+        return [{"op": "replace", "path": base_path, "value": copy.deepcopy(after)}]
+
+    if isinstance(before, dict):
+        operations: List[Dict[str, Any]] = []
+        for key in before:
+            if key not in after:
+                operations.append({"op": "remove", "path": f"{base_path}/{escape_json_pointer_token(key)}"})
+        for key, value in after.items():
+            child_path = f"{base_path}/{escape_json_pointer_token(key)}"
+            if key not in before:
+                operations.append({"op": "add", "path": child_path, "value": copy.deepcopy(value)})
+            else:
+                operations.extend(diff_json(before[key], value, child_path))
+        return operations
+
+    if isinstance(before, list):
+        operations = []
+        for i in range(min(len(before), len(after))):
+            operations.extend(diff_json(before[i], after[i], f"{base_path}/{i}"))
+        for i in range(len(before) - 1, len(after) - 1, -1):
+            operations.append({"op": "remove", "path": f"{base_path}/{i}"})
+        for value in after[len(before):]:
+            operations.append({"op": "add", "path": f"{base_path}/-", "value": copy.deepcopy(value)})
+        return operations
+
+    if before != after:
+        return [{"op": "replace", "path": base_path, "value": after}]
+    return []
+
+
 def validate_changed_paths_scope(
     changed_paths: Set[str],
     allowed_paths: Set[str],
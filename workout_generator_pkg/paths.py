@@ -79,3 +79,16 @@ def legacy_conversation_history_path(script_dir: Optional[str] = None) -> str:
         except (NameError, AttributeError):
             script_dir = os.getcwd()
     return os.path.join(script_dir, "conversation_history.json")
+
+
+def get_response_cache_dir(script_dir: Optional[str] = None) -> str:
+    """Get the directory path for cached LLM responses."""
+    if script_dir is None:
+        try:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+        except (NameError, AttributeError):
+            script_dir = os.getcwd()
+
+    cache_dir = os.path.join(script_dir, "workouts", "llm_response_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
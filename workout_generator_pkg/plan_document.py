@@ -0,0 +1,98 @@
+"""Copy-on-write editing of plan documents (WorkoutStores, exercise libraries) kept as plain JSON."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+
+def pointer_parts(pointer: str) -> List[str]:
+    """Split a JSON Pointer into unescaped reference tokens ("" is the whole document)."""
+    if pointer == "":
+        return []
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer.lstrip("/").split("/")]
+
+
+class DocumentWriter:
+    """
+    Builds a new version of a JSON document that shares every untouched subtree with the source.
+
+    Only the dicts and lists on written paths are copied, shallowly and at most once per writer.
+    Because unchanged subtrees are shared, neither the source nor the result may be mutated
+    directly afterwards: edit through `writable`/`set`, or start another writer.
+    """
+
+    def __init__(self, document: Any):
+        # Keyed by id and holding the object, so an id cannot be reused while the writer lives
+        self._owned: Dict[int, Any] = {}
+        self.root = self._own(document)
+
+    def _own(self, container: Any) -> Any:
+        if isinstance(container, dict):
+            container = dict(container)
+        elif isinstance(container, list):
+            container = list(container)
+        else:
+            return container
+        self._owned[id(container)] = container
+        return container
+
+    def owns(self, container: Any) -> bool:
+        return self._owned.get(id(container)) is container
+
+    def writable(self, path: Sequence[Any]) -> Any:
+        """
+        The container at `path`, safe to mutate in place.
+
+        Shared containers along the path (the target included) are replaced by private copies.
+        Returns None if the path does not resolve to a dict or list; the resolved prefix is
+        still made writable.
+        """
+        current = self.root
+        for part in path:
+            if isinstance(current, dict):
+                if part not in current:
+                    return None
+                key = part
+            elif isinstance(current, list):
+                try:
+                    key = int(part)
+                except (TypeError, ValueError):
+                    return None
+                if not 0 <= key < len(current):
+                    return None
+            else:
+                return None
+            child = current[key]
+            if not isinstance(child, (dict, list)):
+                return None
+            if not self.owns(child):
+                child = current[key] = self._own(child)
+            current = child
+        return current if isinstance(current, (dict, list)) else None
+
+    def set(self, path: Sequence[Any], value: Any) -> bool:
+        """Replace the value at `path` (an existing list index or any dict key). Returns False if unresolved."""
+        if not path:
+            self.root = value
+            return True
+        parent = self.writable(path[:-1])
+        key = path[-1]
+        if isinstance(parent, dict):
+            parent[key] = value
+            return True
+        if isinstance(parent, list):
+            try:
+                index = int(key)
+            except (TypeError, ValueError):
+                return False
+            if 0 <= index < len(parent):
+                parent[index] = value
+                return True
+        return False
+
+
+def assoc_path(document: Any, path: Sequence[Any], value: Any) -> Any:
+    """New version of `document` with `value` at `path`, sharing everything off that path."""
+    writer = DocumentWriter(document)
+    writer.set(path, value)
+    return writer.root
@@ -5,12 +5,128 @@ from __future__ import annotations
 import glob
 import json
 import os
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from .json_patching import apply_json_patch, diff_json
 from .paths import get_progress_dir
 
+CHECKPOINT_INDEX_FILENAME = "checkpoint_index.json"
+# Write a fresh base snapshot when a delta is this large relative to the full state,
+# or when the log has grown to this many times the size of the state.
+CHECKPOINT_REBASE_DELTA_RATIO = 0.5
+CHECKPOINT_COMPACT_LOG_RATIO = 8
+
+# Sessions whose last written state stays in memory; older ones are replayed from disk if saved again
+MAX_CACHED_CHECKPOINT_STATES = 2
+
+_checkpoint_lock = threading.Lock()
+# Last state written per checkpoint log, so a save only has to diff against memory
+_last_checkpoint_states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _checkpoint_path(progress_dir: str, session_id: str) -> str:
+    return os.path.join(progress_dir, f"checkpoint_{session_id}.jsonl")
+
+
+def _read_checkpoint_log(filepath: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Rebuild the latest state from the last base snapshot and the deltas after it.
+
+    Returns:
+        tuple: (state or None, whether the log ends in a torn or unreadable record)
+    """
+    state = None
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn append; everything before it is intact
+                return state, True
+            if record.get("kind") == "base":
+                state = record["state"]
+            elif record.get("kind") == "delta" and state is not None:
+                state = apply_json_patch(state, record["patch"])
+    return state, False
+
+
+def _replay_checkpoint_log(filepath: str) -> Optional[Dict[str, Any]]:
+    return _read_checkpoint_log(filepath)[0]
+
+
+def _checkpoint_matches(progress_dir: str, session_id: str) -> List[str]:
+    """The checkpoint log of `session_id`: an exact match, else the only log whose id starts with it."""
+    exact = _checkpoint_path(progress_dir, session_id)
+    if os.path.exists(exact):
+        return [exact]
+    matches = glob.glob(os.path.join(progress_dir, f"checkpoint_{glob.escape(session_id)}*.jsonl"))
+    # An ambiguous short id must not resolve to some other session's log
+    return matches if len(matches) == 1 else []
+
+
+def _read_checkpoint_index(progress_dir: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(os.path.join(progress_dir, CHECKPOINT_INDEX_FILENAME), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_checkpoint_index(progress_dir: str, index: Dict[str, Dict[str, Any]]) -> None:
+    index_path = os.path.join(progress_dir, CHECKPOINT_INDEX_FILENAME)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(temp_path, index_path)
+
+
+def _append_checkpoint(filepath: str, state: Dict[str, Any], step_number: int, timestamp: str) -> None:
+    """Append a delta against the previous state, or rewrite the log as a single base snapshot."""
+    state_text = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+    previous = _last_checkpoint_states.get(filepath)
+    torn = False
+    if previous is None and os.path.exists(filepath):
+        previous, torn = _read_checkpoint_log(filepath)
+
+    record_text = None
+    # After a torn record, an append would join the fragment; rewrite a base of the recovered state instead
+    if previous is not None and not torn:
+        patch = diff_json(previous, state)
+        delta_text = json.dumps(
+            {"kind": "delta", "step": step_number, "timestamp": timestamp, "patch": patch},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        log_size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+        if (
+            len(delta_text) < len(state_text) * CHECKPOINT_REBASE_DELTA_RATIO
+            and log_size + len(delta_text) < len(state_text) * CHECKPOINT_COMPACT_LOG_RATIO
+        ):
+            record_text = delta_text
+
+    # Forget the cached state until the write lands, so a failed append is detected on the next save
+    _last_checkpoint_states.pop(filepath, None)
+    if record_text is not None:
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write(record_text + "\n")
+    else:
+        base_text = f'{{"kind":"base","step":{step_number},"timestamp":{json.dumps(timestamp)},"state":{state_text}}}'
+        temp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(base_text + "\n")
+        os.replace(temp_path, filepath)
+    _last_checkpoint_states[filepath] = state
+    while len(_last_checkpoint_states) > MAX_CACHED_CHECKPOINT_STATES:
+        _last_checkpoint_states.popitem(last=False)
+
 
 def save_generation_progress(
     session_id: str,
@@ -23,15 +139,16 @@ def save_generation_progress(
     timing_data: Optional[Dict[str, Any]] = None,
     use_reasoner_for_emitting: Optional[bool] = None,
 ) -> Tuple[Optional[str], float]:
-    """Save generation progress after a step completes."""
+    """
+    Save generation progress after a step completes.
+
+    Each session has one append-only checkpoint log: a base snapshot followed by JSON Patch
+    deltas, plus an entry in the sidecar index that list_available_progress reads.
+    """
     save_start_time = time.time()
     try:
         progress_dir = get_progress_dir(script_dir)
-
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        short_session_id = session_id[:8] if len(session_id) >= 8 else session_id
-        filename = f"progress_{timestamp}_{short_session_id}.json"
-        filepath = os.path.join(progress_dir, filename)
+        filepath = _checkpoint_path(progress_dir, session_id)
 
         progress_data: Dict[str, Any] = {
             "session_id": session_id,
@@ -58,8 +175,18 @@ def save_generation_progress(
             }
             progress_data["timing"] = timing_copy
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(progress_data, f, indent=2, ensure_ascii=False)
+        # Round-trip once: detaches the snapshot from live step_data and normalizes tuples/keys
+        state = json.loads(json.dumps(progress_data, ensure_ascii=False))
+        with _checkpoint_lock:
+            _append_checkpoint(filepath, state, step_number, progress_data["timestamp"])
+            index = _read_checkpoint_index(progress_dir)
+            index[session_id] = {
+                "session_id": session_id,
+                "timestamp": progress_data["timestamp"],
+                "current_step": step_number,
+                "filepath": filepath,
+            }
+            _write_checkpoint_index(progress_dir, index)
 
         save_time = time.time() - save_start_time
 
@@ -87,6 +214,9 @@ def load_generation_progress(session_id: str, script_dir: Optional[str] = None)
             pattern = os.path.join(progress_dir, f"progress_*_{session_id}.json")
             matches = glob.glob(pattern)
 
+        # Checkpoint logs first: a legacy file only wins with a strictly later step
+        matches = _checkpoint_matches(progress_dir, session_id) + matches
+
         if not matches:
             return None
 
@@ -95,8 +225,11 @@ def load_generation_progress(session_id: str, script_dir: Optional[str] = None)
 
         for filepath in matches:
             try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    progress_data = json.load(f)
+                if filepath.endswith(".jsonl"):
+                    progress_data = _replay_checkpoint_log(filepath) or {}
+                else:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        progress_data = json.load(f)
 
                 if "session_id" not in progress_data or "current_step" not in progress_data:
                     continue
@@ -144,12 +277,32 @@ def load_generation_progress(session_id: str, script_dir: Optional[str] = None)
 
 
 def list_available_progress(script_dir: Optional[str] = None) -> List[Dict[str, Any]]:
-    """List all available progress files."""
+    """
+    List all available progress files.
+
+    Checkpoint logs are listed from the sidecar index without reading their payloads;
+    only legacy progress_*.json files are opened.
+    """
     progress_dir = get_progress_dir(script_dir)
     pattern = os.path.join(progress_dir, "progress_*.json")
     files = glob.glob(pattern)
 
     progress_list = []
+    for entry in _read_checkpoint_index(progress_dir).values():
+        session_id = entry.get("session_id", "unknown")
+        current_step = entry.get("current_step", -1)
+        if not os.path.exists(entry.get("filepath", "")):
+            continue
+        progress_list.append(
+            {
+                "session_id": session_id,
+                "short_id": session_id[:8] if len(session_id) >= 8 else session_id,
+                "timestamp": entry.get("timestamp", ""),
+                "current_step": current_step,
+                "filepath": entry["filepath"],
+                "status": "complete" if current_step >= 7 else "incomplete",
+            }
+        )
     for filepath in files:
         try:
             with open(filepath, "r", encoding="utf-8") as f:
@@ -187,6 +340,9 @@ def delete_progress_file(session_id: str, script_dir: Optional[str] = None) -> b
         pattern = os.path.join(progress_dir, f"progress_*_{session_id}.json")
         matches = glob.glob(pattern)
 
+    checkpoint_matches = _checkpoint_matches(progress_dir, session_id)
+    matches = checkpoint_matches + matches
+
     if not matches:
         return False
 
@@ -198,4 +354,13 @@ def delete_progress_file(session_id: str, script_dir: Optional[str] = None) -> b
         except Exception:
             pass
 
+    if checkpoint_matches:
+        with _checkpoint_lock:
+            for filepath in checkpoint_matches:
+                _last_checkpoint_states.pop(filepath, None)
+            index = _read_checkpoint_index(progress_dir)
+            remaining = {key: entry for key, entry in index.items() if entry.get("filepath") not in checkpoint_matches}
+            if remaining != index:
+                _write_checkpoint_index(progress_dir, remaining)
+
     return deleted
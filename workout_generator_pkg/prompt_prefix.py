@@ -0,0 +1,53 @@
+"""Shared leading messages for emitter prompts, so provider-side prefix caching can hit."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+from .api_client import PromptUsageMeter, metered_prompt_usage
+from .constants import BASE_SYSTEM_PROMPT
+
+
+class EmitterPromptPrefix:
+    """
+    Leading messages shared by every emitter request of one generation.
+
+    Requests are laid out as [base system prompt, generation context, stage system prompt,
+    item request]. The generation context (conversation summary, then the formatted
+    equipment once it is known) is rendered once, so every request of a stage starts with
+    the same bytes and the stages share everything up to their own system prompt.
+    """
+
+    def __init__(
+        self,
+        context_summary: str,
+        equipment_text: Optional[str] = None,
+        usage_meter: Optional[PromptUsageMeter] = None,
+    ):
+        self.context_summary = context_summary
+        self.equipment_text = equipment_text
+        self.usage_meter = usage_meter
+        context = f"Generation context shared by every item of this plan.\n\nConversation summary:\n{context_summary}"
+        if equipment_text:
+            context += f"\n\n{equipment_text}"
+        self._prefix = (
+            {"role": "system", "content": BASE_SYSTEM_PROMPT},
+            {"role": "system", "content": context},
+        )
+
+    def with_equipment(self, equipment_text: str) -> "EmitterPromptPrefix":
+        """The same prefix with the formatted equipment appended to the generation context."""
+        return EmitterPromptPrefix(self.context_summary, equipment_text, self.usage_meter)
+
+    def messages(self, stage_system_prompt: str, user_content: str) -> List[Dict[str, Any]]:
+        return [dict(message) for message in self._prefix] + [
+            {"role": "system", "content": stage_system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
+    def metered(self, stage: str):
+        """Context manager attributing the prompt usage of requests made inside it to `stage`."""
+        if self.usage_meter is None:
+            return nullcontext()
+        return metered_prompt_usage(self.usage_meter, stage)
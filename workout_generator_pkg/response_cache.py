@@ -0,0 +1,165 @@
+"""Content-addressed on-disk cache for LLM JSON responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .paths import get_response_cache_dir
+
+RESPONSE_CACHE_MB_ENV = "WORKOUT_GENERATOR_RESPONSE_CACHE_MB"
+DEFAULT_RESPONSE_CACHE_MB = 256
+# Evictions trim to this share of max_bytes, so a full cache is not rescanned on every put
+EVICT_TO_FRACTION = 0.9
+
+
+def response_cache_key(model: str, messages: List[Dict[str, Any]], max_tokens: int, **sampling: Any) -> str:
+    """
+    Stable digest of everything that determines a completion.
+
+    Args:
+        model: Model name sent to the API
+        messages: Chat messages sent to the API
+        max_tokens: Output token limit
+        **sampling: Any other request parameters (response_format, temperature, ...)
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON request
+    """
+    request = {"model": model, "messages": messages, "max_tokens": max_tokens, **sampling}
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    One JSON file per response, named by its request digest.
+
+    Hits refresh the file's mtime; when the directory grows past `max_bytes`, the least
+    recently used responses are deleted first, down to EVICT_TO_FRACTION of it. The directory size is scanned once on open
+    and then tracked on every put and delete, so only an eviction walks the directory.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)["content"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def discard(self, key: str) -> None:
+        """Drop a stored response, e.g. one its consumer rejected, so the request is fetched again."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.stat(path).st_size
+                os.remove(path)
+            except OSError:
+                return
+            self.total_bytes -= size
+
+    def put(self, key: str, content: str, model: Optional[str] = None) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "created": time.time(), "content": content}, f, ensure_ascii=False)
+        size = os.stat(temp_path).st_size
+        with self._lock:
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            os.replace(temp_path, path)
+            self.total_bytes += size - replaced
+            over_budget = self.total_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = self._entries()
+            # Resync with the directory, which other processes may share
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for _, size, name in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                total -= size
+            self.total_bytes = total
+
+    def call(
+        self,
+        fetch: Callable[[], Optional[str]],
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        **sampling: Any,
+    ) -> Optional[str]:
+        """
+        Return the cached response for this request, or `fetch()` it and cache it.
+
+        Cancelled (None) and empty responses are not cached. Callers that parse or validate
+        the content must `discard` the key when they reject it, or the same rejected reply
+        is replayed for every identical request.
+        """
+        key = response_cache_key(model, messages, max_tokens, **sampling)
+        content = self.get(key)
+        if content is not None:
+            return content
+        content = fetch()
+        if content:
+            self.put(key, content, model=model)
+        return content
+
+
+def open_response_cache(script_dir: Optional[str] = None) -> Optional[ResponseCache]:
+    """
+    Response cache under the runtime directory, sized by WORKOUT_GENERATOR_RESPONSE_CACHE_MB.
+
+    Returns:
+        ResponseCache or None when the size is set to 0 (caching disabled)
+    """
+    configured = os.environ.get(RESPONSE_CACHE_MB_ENV)
+    megabytes = float(configured) if configured else DEFAULT_RESPONSE_CACHE_MB
+    if megabytes <= 0:
+        return None
+    return ResponseCache(get_response_cache_dir(script_dir), int(megabytes * 1024 * 1024))
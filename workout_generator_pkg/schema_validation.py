@@ -0,0 +1,143 @@
+"""Precompiled JSON-schema validators for workout store documents."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .constants import JSON_SCHEMA
+
+try:
+    from jsonschema import validators as _jsonschema_validators
+    from jsonschema.exceptions import best_match
+except Exception:
+    _jsonschema_validators = None
+    best_match = None
+
+
+STRICT_SCHEMA = "strict"
+PLACEHOLDER_SCHEMA = "placeholder"
+
+# Schema definition for each top-level array item, i.e. the subtree a repair replaces.
+TOP_LEVEL_ITEM_DEFINITIONS = {
+    "equipments": "Equipment",
+    "accessoryEquipments": "EquipmentAccessory",
+    "workouts": "Workout",
+}
+
+
+def _placeholder_schema():
+    # Imported lazily: domain_ops validates through this module.
+    from .domain_ops import create_placeholder_schema
+
+    return create_placeholder_schema()
+
+
+def subtree_schema(root_schema, definition):
+    """
+    Schema that validates a single `$defs` entry of `root_schema`.
+
+    The definitions are carried along so nested `$ref`s keep resolving.
+    """
+    if definition not in root_schema.get("$defs", {}):
+        raise KeyError(f"Unknown schema definition: {definition}")
+    schema = {"$ref": f"#/$defs/{definition}", "$defs": root_schema["$defs"]}
+    if "$schema" in root_schema:
+        schema["$schema"] = root_schema["$schema"]
+    return schema
+
+
+def _reroot_error(error, top_level_array, array_index) -> None:
+    # Child errors compute their absolute path through the root error, so prefix that one only
+    root_error = error
+    while getattr(root_error, "parent", None) is not None:
+        root_error = root_error.parent
+    relative_path = getattr(root_error, "relative_path", None)
+    if relative_path is not None:
+        relative_path.extendleft([array_index, top_level_array])
+
+
+class SchemaValidatorRegistry:
+    """
+    Compiles each named schema (and each requested subtree of it) once and reuses the validator.
+
+    Schemas are registered as factories so the placeholder schema is only built when first used.
+    """
+
+    def __init__(self, schema_factories: Dict[str, Callable[[], Dict[str, Any]]]):
+        self._schema_factories = dict(schema_factories)
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._validators: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return _jsonschema_validators is not None
+
+    def schema(self, name: str = STRICT_SCHEMA) -> Dict[str, Any]:
+        with self._lock:
+            return self._schema_locked(name)
+
+    def _schema_locked(self, name):
+        schema = self._schemas.get(name)
+        if schema is None:
+            if name not in self._schema_factories:
+                raise KeyError(f"Unknown schema: {name}")
+            schema = self._schemas[name] = self._schema_factories[name]()
+        return schema
+
+    def validator(self, name: str = STRICT_SCHEMA, definition: Optional[str] = None):
+        """Compiled validator for schema `name`, or for its `$defs/<definition>` subtree."""
+        if not self.available:
+            raise RuntimeError("jsonschema is not installed")
+        key = (name, definition)
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is None:
+                root = self._schema_locked(name)
+                schema = root if definition is None else subtree_schema(root, definition)
+                validator_class = _jsonschema_validators.validator_for(schema)
+                validator_class.check_schema(schema)
+                validator = self._validators[key] = validator_class(schema)
+            return validator
+
+    def iter_errors(self, instance, name: str = STRICT_SCHEMA, definition: Optional[str] = None) -> List[Any]:
+        return list(self.validator(name, definition).iter_errors(instance))
+
+    def validate(self, instance, name: str = STRICT_SCHEMA, definition: Optional[str] = None) -> None:
+        """Raise the most relevant ValidationError, like `jsonschema.validate`."""
+        error = best_match(self.validator(name, definition).iter_errors(instance))
+        if error is not None:
+            raise error
+
+    def validate_item(self, document, top_level_array, array_index, name: str = STRICT_SCHEMA) -> None:
+        """
+        Validate one top-level array item (a workout, equipment or accessory) in place.
+
+        Raised errors are re-rooted at the document so their paths match a full validation.
+        """
+        definition = TOP_LEVEL_ITEM_DEFINITIONS[top_level_array]
+        try:
+            self.validate(document[top_level_array][array_index], name, definition)
+        except Exception as error:
+            _reroot_error(error, top_level_array, array_index)
+            raise
+
+    def iter_item_errors(self, document, top_level_array, array_index, name: str = STRICT_SCHEMA) -> List[Any]:
+        """All errors of one top-level array item, re-rooted at the document like `validate_item`."""
+        definition = TOP_LEVEL_ITEM_DEFINITIONS[top_level_array]
+        errors = self.iter_errors(document[top_level_array][array_index], name, definition)
+        for error in errors:
+            _reroot_error(error, top_level_array, array_index)
+        return errors
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+            self._validators.clear()
+
+
+SCHEMA_VALIDATORS = SchemaValidatorRegistry({
+    STRICT_SCHEMA: lambda: JSON_SCHEMA,
+    PLACEHOLDER_SCHEMA: _placeholder_schema,
+})
@@ -1,5 +1,29 @@
 """MCP access to MyWorkoutAssistant backup workout history."""
 
-from .loader import WorkoutHistoryStore, load_backup, load_store
+from .instrumentation import CallMetrics, CallSample
+from .loader import BackupSelectionError, WorkoutHistoryStore, load_backup, load_store
+from .response_cache import ResponseCache
+from .sqlite_cache import HistoryDatabase, IngestStats, SqliteWorkoutHistoryStore
+from .store_cache import BackupFingerprint, StoreCache, StoreRegistry, backup_fingerprint
+from .streaming import iter_backup_members, iter_backup_records, load_compact_backup, load_compact_store
 
-__all__ = ["WorkoutHistoryStore", "load_backup", "load_store"]
+__all__ = [
+    "BackupFingerprint",
+    "BackupSelectionError",
+    "CallMetrics",
+    "CallSample",
+    "HistoryDatabase",
+    "IngestStats",
+    "ResponseCache",
+    "SqliteWorkoutHistoryStore",
+    "StoreCache",
+    "StoreRegistry",
+    "WorkoutHistoryStore",
+    "backup_fingerprint",
+    "iter_backup_members",
+    "iter_backup_records",
+    "load_backup",
+    "load_compact_backup",
+    "load_compact_store",
+    "load_store",
+]
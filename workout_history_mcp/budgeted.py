@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from .exporters import (
+    active_exercise_sessions,
+    athlete_context_markdown,
+    exercise_heading_lines,
+    exercise_session_lines,
+    format_duration,
+    format_number,
+    is_insight_comparison_set,
+    load_for_set,
+    reps_for_set,
+    session_body_lines,
+    session_heading_lines,
+    volume_for_set,
+)
+from .instrumentation import BYTES_PER_TOKEN
+from .loader import WorkoutHistoryStore
+
+
+DEFAULT_MAX_TOKENS = 4000
+MIN_MAX_CHARS = 500
+FOOTER_RESERVE_CHARS = 160
+
+
+def budget_chars(max_tokens: int | None = None, max_chars: int | None = None) -> int:
+    """Character budget from an explicit character count, else from tokens at about four characters each."""
+    if max_chars is not None:
+        limit = int(max_chars)
+    else:
+        limit = int(max_tokens if max_tokens is not None else DEFAULT_MAX_TOKENS) * BYTES_PER_TOKEN
+    if limit < MIN_MAX_CHARS:
+        raise ValueError(f"Budget too small: {limit} characters. Use at least {MIN_MAX_CHARS} characters or {MIN_MAX_CHARS // BYTES_PER_TOKEN} tokens.")
+    return limit
+
+
+def _parse_cursor(cursor: str | None, total: int) -> int:
+    if cursor in (None, ""):
+        return 0
+    try:
+        offset = int(str(cursor))
+    except ValueError:
+        offset = -1
+    if offset < 0 or offset > total:
+        raise ValueError(f"Invalid cursor: {cursor}. Pass next_cursor from the previous page, or omit it to start over.")
+    return offset
+
+
+class _Page:
+    """Markdown accumulator that refuses blocks past its character limit."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit - FOOTER_RESERVE_CHARS
+        self.parts: list[str] = []
+        self.size = 0
+
+    def add(self, text: str, *, force: bool = False) -> bool:
+        if not force and self.size + len(text) > self.limit:
+            return False
+        self.parts.append(text)
+        self.size += len(text)
+        return True
+
+    def markdown(self) -> str:
+        return "".join(self.parts).rstrip() + "\n"
+
+
+def _block(lines: list[str]) -> str:
+    return "\n".join(lines).rstrip() + "\n\n"
+
+
+def _render_newest_first(
+    page: _Page,
+    count: int,
+    offset: int,
+    full_block: Callable[[int], str],
+    rollup_heading: str,
+    rollup_row: Callable[[int], str],
+) -> tuple[int, int]:
+    """Add full blocks newest first until one does not fit, then one-line rollup rows.
+
+    Returns (full, collapsed) counts. At least one row is always emitted so every page advances.
+    """
+    full = collapsed = 0
+    position = offset
+    while position < count and page.add(full_block(position)):
+        full += 1
+        position += 1
+    heading = rollup_heading
+    while position < count and page.add(heading + rollup_row(position), force=full + collapsed == 0):
+        heading = ""
+        collapsed += 1
+        position += 1
+    return full, collapsed
+
+
+def _footer(page: _Page, next_offset: int, total: int, noun: str) -> dict[str, Any]:
+    remaining = total - next_offset
+    if remaining:
+        page.add(f"_{remaining} older {noun} not shown. Call again with cursor `{next_offset}` to continue._\n", force=True)
+    return {
+        "markdown": page.markdown(),
+        "next_cursor": str(next_offset) if remaining else None,
+        "remaining": remaining,
+        "chars": page.size,
+    }
+
+
+def exercise_history_page(
+    store: WorkoutHistoryStore,
+    exercise_id: str,
+    max_tokens: int | None = None,
+    max_chars: int | None = None,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """Exercise history newest first within a size budget, collapsing older sessions into rollup rows.
+
+    The exercise config and athlete context appear on the first page only.
+    """
+    exercise = store.exercises_by_id().get(str(exercise_id))
+    if not exercise:
+        raise ValueError(f"Exercise not found: {exercise_id}")
+    page = _Page(budget_chars(max_tokens, max_chars))
+    sessions = active_exercise_sessions(store, str(exercise_id))
+    newest_first = sessions[::-1]
+    total = len(sessions)
+    offset = _parse_cursor(cursor, total)
+    if offset == 0:
+        lines = exercise_heading_lines(store, exercise)
+        lines.append(athlete_context_markdown(store).rstrip())
+        if sessions:
+            first_date, last_date = sessions[0][0].session.get("date"), sessions[-1][0].session.get("date")
+            lines.append(f"Sessions: {total} | Range: {first_date} to {last_date} | Newest first")
+        page.add(_block(lines), force=True)
+    else:
+        page.add(f"# {exercise.get('name')} (continued)\n\n", force=True)
+    workouts = store.workouts_by_id()
+
+    def full_block(position: int) -> str:
+        exercise_session, active_sets = newest_first[position]
+        return _block(exercise_session_lines(store, exercise, total - position, exercise_session, active_sets, workouts))
+
+    def rollup_row(position: int) -> str:
+        exercise_session, active_sets = newest_first[position]
+        top = max(active_sets, key=lambda item: (load_for_set(item, exercise), reps_for_set(item)))
+        return (
+            f"| S{total - position} | {exercise_session.session.get('date')} | "
+            f"{format_number(load_for_set(top, exercise))}x{reps_for_set(top)} | {len(active_sets)} | "
+            f"{sum(reps_for_set(item) for item in active_sets)} | "
+            f"{format_number(sum(volume_for_set(item, exercise) for item in active_sets))} |\n"
+        )
+
+    full, collapsed = _render_newest_first(
+        page,
+        total,
+        offset,
+        full_block,
+        "## Older Sessions\n| Session | Date | Top set (kg x reps) | Sets | Reps | Volume kg |\n|---|---|---|---|---|---|\n",
+        rollup_row,
+    )
+    result = _footer(page, offset + full + collapsed, total, "sessions")
+    return {"exercise_id": str(exercise_id), "total_sessions": total, "full_sessions": full, "collapsed_sessions": collapsed, **result}
+
+
+def sessions_page(
+    store: WorkoutHistoryStore,
+    workout_history_ids: list[str] | None = None,
+    max_tokens: int | None = None,
+    max_chars: int | None = None,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """Completed sessions (or the given ids) newest first within a size budget.
+
+    The athlete context is emitted once, on the first page, instead of once per session.
+    """
+    if workout_history_ids:
+        sessions_by_id = store.sessions_by_id()
+        missing = [str(item) for item in workout_history_ids if str(item) not in sessions_by_id]
+        if missing:
+            raise ValueError(f"Workout session not found: {', '.join(missing)}")
+        chosen = [sessions_by_id[item] for item in dict.fromkeys(str(item) for item in workout_history_ids)]
+        chosen.sort(key=lambda session: (str(session.get("date") or ""), str(session.get("time") or "")))
+    else:
+        chosen = list(store.completed_sessions())
+    newest_first = chosen[::-1]
+    total = len(newest_first)
+    offset = _parse_cursor(cursor, total)
+    page = _Page(budget_chars(max_tokens, max_chars))
+    if offset == 0:
+        page.add(athlete_context_markdown(store), force=True)
+    workouts = store.workouts_by_id()
+    exercises = store.exercises_by_id()
+
+    def full_block(position: int) -> str:
+        session = newest_first[position]
+        return _block([*session_heading_lines(store, session), *session_body_lines(store, session)])
+
+    def rollup_row(position: int) -> str:
+        session = newest_first[position]
+        active_sets = [item for item in store.sets_for_session(str(session.get("id"))) if is_insight_comparison_set(item)]
+        volume = sum(volume_for_set(item, exercises.get(str(item.get("exerciseId"))) or {}) for item in active_sets)
+        workout = workouts.get(str(session.get("workoutId"))) or {}
+        return (
+            f"| {session.get('date')} | {workout.get('name') or 'Unknown Workout'} | "
+            f"{format_duration(session.get('duration'))} | {len(active_sets)} | {format_number(volume)} | "
+            f"`{session.get('id')}` |\n"
+        )
+
+    full, collapsed = _render_newest_first(
+        page,
+        total,
+        offset,
+        full_block,
+        "## Older Sessions\n| Date | Workout | Duration | Sets | Volume kg | Workout history id |\n|---|---|---|---|---|---|\n",
+        rollup_row,
+    )
+    result = _footer(page, offset + full + collapsed, total, "sessions")
+    return {"total_sessions": total, "full_sessions": full, "collapsed_sessions": collapsed, **result}
@@ -2,11 +2,20 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import datetime
-from math import floor
 import re
 from typing import Any
 
-from .loader import WorkoutHistoryStore
+from .heart_rate import (
+    HeartRateBasis,
+    effective_max_heart_rate,
+    effective_resting_heart_rate,
+    heart_rate_from_percentage,
+    heart_rate_zone_bounds_bpm,
+    round_half_up,
+    zone_index_for_bpm,
+    zone_sample_counts,
+)
+from .loader import ExerciseSession, WorkoutHistoryStore
 
 
 def format_number(value: Any) -> str:
@@ -266,8 +275,10 @@ def summary_markdown(store: WorkoutHistoryStore) -> str:
 
 
 def session_list(store: WorkoutHistoryStore, limit: int = 50, offset: int = 0, workout_name: str | None = None, exercise_name: str | None = None) -> dict[str, Any]:
-    sessions = list(reversed(store.completed_sessions()))
+    sessions = store.completed_sessions()
     workouts = store.workouts_by_id()
+    safe_offset = max(offset, 0)
+    safe_limit = max(limit, 0)
     exercise_matches: set[str] | None = None
     if exercise_name:
         needle = exercise_name.lower()
@@ -275,38 +286,51 @@ def session_list(store: WorkoutHistoryStore, limit: int = 50, offset: int = 0, w
             exercise_id for exercise_id, exercise in store.exercises_by_id().items()
             if needle in str(exercise.get("name") or "").lower()
         }
-    filtered = []
-    for session in sessions:
-        workout = workouts.get(str(session.get("workoutId"))) or {}
-        if workout_name and workout_name.lower() not in str(workout.get("name") or "").lower():
-            continue
-        sets = store.sets_for_session(str(session.get("id")))
-        if exercise_matches is not None and not any(str(item.get("exerciseId")) in exercise_matches for item in sets):
-            continue
-        filtered.append({
-            "workout_history_id": session.get("id"),
-            "workout_id": session.get("workoutId"),
-            "workout_name": workout.get("name") or "Unknown Workout",
-            "date": session.get("date"),
-            "time": session.get("time"),
-            "duration": format_duration(session.get("duration")),
-            "duration_seconds": session.get("duration"),
-            "recorded_set_count": len([item for item in sets if is_insight_comparison_set(item)]),
-            "heart_rate": heart_rate_summary_data(store, session),
-        })
-    safe_offset = max(offset, 0)
-    safe_limit = max(limit, 0)
+    if not workout_name and exercise_matches is None:
+        total = len(sessions)
+        page = [
+            sessions[total - 1 - index]
+            for index in range(safe_offset, min(safe_offset + safe_limit, total))
+        ]
+    else:
+        filtered = []
+        for session in reversed(sessions):
+            workout = workouts.get(str(session.get("workoutId"))) or {}
+            if workout_name and workout_name.lower() not in str(workout.get("name") or "").lower():
+                continue
+            aggregate = store.session_aggregate(str(session.get("id")))
+            if exercise_matches is not None and aggregate.exercise_ids.isdisjoint(exercise_matches):
+                continue
+            filtered.append(session)
+        total = len(filtered)
+        page = filtered[safe_offset:safe_offset + safe_limit]
     return {
-        "total": len(filtered),
+        "total": total,
         "limit": safe_limit,
         "offset": safe_offset,
-        "has_more": safe_offset + safe_limit < len(filtered),
-        "items": filtered[safe_offset:safe_offset + safe_limit],
+        "has_more": safe_offset + safe_limit < total,
+        "items": [session_list_item(store, session, workouts) for session in page],
+    }
+
+
+def session_list_item(store: WorkoutHistoryStore, session: dict[str, Any], workouts: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    workout = workouts.get(str(session.get("workoutId"))) or {}
+    return {
+        "workout_history_id": session.get("id"),
+        "workout_id": session.get("workoutId"),
+        "workout_name": workout.get("name") or "Unknown Workout",
+        "date": session.get("date"),
+        "time": session.get("time"),
+        "duration": format_duration(session.get("duration")),
+        "duration_seconds": session.get("duration"),
+        "recorded_set_count": store.session_aggregate(str(session.get("id"))).recorded_set_count,
+        "heart_rate": heart_rate_summary_data(store, session),
     }
 
 
 def list_exercises_data(store: WorkoutHistoryStore, query: str | None = None) -> list[dict[str, Any]]:
     exercises = store.exercises_by_id()
+    equipment_by_id = store.equipment_or_accessory_by_id()
     query_lc = query.lower() if query else None
     rows = []
     for exercise_id, exercise in exercises.items():
@@ -321,7 +345,7 @@ def list_exercises_data(store: WorkoutHistoryStore, query: str | None = None) ->
             "enabled": exercise.get("enabled", True),
             "do_not_store_history": exercise.get("doNotStoreHistory", False),
             "notes": exercise.get("notes") or "",
-            "equipment_name": (store.equipment_or_accessory_by_id().get(str(exercise.get("equipmentId"))) or {}).get("name"),
+            "equipment_name": (equipment_by_id.get(str(exercise.get("equipmentId"))) or {}).get("name"),
             "progression_mode": exercise.get("progressionMode"),
             "min_reps": exercise.get("minReps"),
             "max_reps": exercise.get("maxReps"),
@@ -338,80 +362,38 @@ def list_exercises_data(store: WorkoutHistoryStore, query: str | None = None) ->
 
 
 def heart_rate_summary_data(store: WorkoutHistoryStore, session: dict[str, Any]) -> dict[str, Any] | None:
-    samples = [int(item) for item in session.get("heartBeatRecords") or [] if isinstance(item, int)]
-    valid = [item for item in samples if item > 0]
+    session_id = str(session.get("id"))
+    basis = HeartRateBasis.from_workout_store(store.workout_store)
+    return store.memoize(
+        ("heart_rate_summary", session_id, basis),
+        lambda: _heart_rate_summary(store, session_id, basis),
+    )
+
+
+def _heart_rate_summary(store: WorkoutHistoryStore, session_id: str, basis: HeartRateBasis) -> dict[str, Any] | None:
+    aggregate = store.session_aggregate(session_id)
+    valid = aggregate.heart_rate_samples
     if not valid:
         return None
-    birth_year = store.workout_store.get("birthDateYear")
-    age = datetime.today().year - int(birth_year) if birth_year else None
-    max_hr = effective_max_heart_rate(age, store.workout_store.get("measuredMaxHeartRate"))
-    resting_hr = effective_resting_heart_rate(store.workout_store.get("restingHeartRate"))
-    zones = heart_rate_zone_counts(valid, max_hr, resting_hr) if max_hr else {}
+    max_hr = basis.max_hr
+    zones = heart_rate_zone_counts(valid, max_hr, basis.resting_hr) if max_hr else {}
     return {
         "valid_sample_count": len(valid),
-        "invalid_sample_count": len(samples) - len(valid),
+        "invalid_sample_count": aggregate.invalid_heart_rate_sample_count,
         "duration": compact_duration(len(valid)),
         "average_bpm": int(sum(valid) / len(valid)),
         "min_bpm": min(valid),
         "max_bpm": max(valid),
         "max_hr_basis_bpm": max_hr,
-        "resting_hr_basis_bpm": resting_hr,
+        "resting_hr_basis_bpm": basis.resting_hr,
         "zone_time": zones,
     }
 
 
-def effective_max_heart_rate(age: int | None, measured_max_heart_rate: Any) -> int | None:
-    if measured_max_heart_rate is not None:
-        return int(measured_max_heart_rate)
-    if age is None:
-        return None
-    return 211 - round_half_up(0.64 * age)
-
-
-def effective_resting_heart_rate(resting_heart_rate: Any) -> int:
-    return int(resting_heart_rate) if resting_heart_rate is not None else 60
-
-
-def round_half_up(value: float) -> int:
-    return int(floor(value + 0.5))
-
-
-def heart_rate_from_percentage(percentage: float, max_hr: int, resting_hr: int) -> int:
-    reserve = max(max_hr - resting_hr, 1)
-    return round_half_up(resting_hr + (percentage / 100) * reserve)
-
-
-def heart_rate_zone_bounds_bpm(max_hr: int, resting_hr: int) -> list[tuple[int, int]]:
-    zone_ranges = [(0, 50), (50, 60), (60, 70), (70, 80), (80, 90), (90, 100)]
-    zone_starts = [heart_rate_from_percentage(lower, max_hr, resting_hr) for lower, _ in zone_ranges]
-    absolute_max = heart_rate_from_percentage(zone_ranges[-1][1], max_hr, resting_hr)
-    bounds: list[tuple[int, int]] = []
-    for index, lower in enumerate(zone_starts):
-        upper = zone_starts[index + 1] - 1 if index < len(zone_starts) - 1 else absolute_max
-        bounds.append((lower, max(lower, upper)))
-    return bounds
-
-
-def zone_index_for_bpm(heart_rate: int, zone_bounds: list[tuple[int, int]]) -> int:
-    for index in range(len(zone_bounds) - 1, -1, -1):
-        lower, upper = zone_bounds[index]
-        if lower <= heart_rate <= upper:
-            return index
-    if heart_rate < zone_bounds[0][0]:
-        return 0
-    if heart_rate > zone_bounds[-1][1]:
-        return len(zone_bounds) - 1
-    return 0
-
-
-def heart_rate_zone_counts(samples: list[int], max_hr: int, resting_hr: int) -> dict[str, str]:
+def heart_rate_zone_counts(samples: Any, max_hr: int, resting_hr: int) -> dict[str, str]:
     if max_hr <= 0:
         return {}
-    zone_bounds = heart_rate_zone_bounds_bpm(max_hr, resting_hr)
-    counts = [0 for _ in zone_bounds]
-    for sample in samples:
-        zone_index = zone_index_for_bpm(sample, zone_bounds)
-        counts[zone_index] += 1
+    counts = zone_sample_counts(samples, max_hr, resting_hr)
     return {f"Z{index}": compact_duration(count) for index, count in enumerate(counts) if count > 0}
 
 
@@ -419,25 +401,45 @@ def session_markdown(store: WorkoutHistoryStore, workout_history_id: str) -> str
     session = store.sessions_by_id().get(str(workout_history_id))
     if not session:
         raise ValueError(f"Workout session not found: {workout_history_id}")
+    lines = [
+        *session_heading_lines(store, session),
+        athlete_context_markdown(store).rstrip(),
+        *session_body_lines(store, session),
+    ]
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def session_heading_lines(store: WorkoutHistoryStore, session: dict[str, Any]) -> list[str]:
     workout = store.workout_by_id(str(session.get("workoutId"))) or {}
+    return [
+        f"# {workout.get('name') or 'Unknown Workout'}",
+        f"{session.get('date')} {session.get('time')} | Dur: {format_duration(session.get('duration'))}",
+        "",
+    ]
+
+
+def heart_rate_record_count(session: Any) -> int:
+    # Compact session records keep the raw count; their packed samples drop non-integer entries
+    count = session.get("heart_rate_count")
+    return count if count is not None else len(session.get("heartBeatRecords") or [])
+
+
+def session_body_lines(store: WorkoutHistoryStore, session: dict[str, Any]) -> list[str]:
+    """Session summary, heart rate and per-exercise blocks, without the heading or athlete context."""
+    workout_history_id = str(session.get("id"))
     exercises = store.exercises_by_id()
-    sets = store.sets_for_session(str(workout_history_id))
     sets_by_exercise: dict[str, list[dict[str, Any]]] = defaultdict(list)
-    for set_history in sets:
+    for set_history in store.sets_for_session(workout_history_id):
         exercise_id = set_history.get("exerciseId")
         if exercise_id:
             sets_by_exercise[str(exercise_id)].append(set_history)
 
     lines = [
-        f"# {workout.get('name') or 'Unknown Workout'}",
-        f"{session.get('date')} {session.get('time')} | Dur: {format_duration(session.get('duration'))}",
-        "",
-        athlete_context_markdown(store).rstrip(),
         "## Session Summary",
         f"- Workout history id: `{session.get('id')}`",
         f"- Completed: {session.get('isDone')}",
-        f"- Recorded sets: {len([item for item in sets if is_insight_comparison_set(item)])}",
-        f"- Heart rate samples: {len(session.get('heartBeatRecords') or [])}",
+        f"- Recorded sets: {store.session_aggregate(workout_history_id).recorded_set_count}",
+        f"- Heart rate samples: {heart_rate_record_count(session)}",
         "",
     ]
     hr_summary = heart_rate_summary_data(store, session)
@@ -456,7 +458,7 @@ def session_markdown(store: WorkoutHistoryStore, workout_history_id: str) -> str
         if not active_sets:
             continue
         exercise = exercises.get(exercise_id) or {"name": "Unknown Exercise"}
-        progression = store.progression_for(str(workout_history_id), exercise_id)
+        progression = store.progression_for(workout_history_id, exercise_id)
         lines.extend([
             f"### {exercise.get('name')}",
             f"- Type: {exercise.get('exerciseType') or 'unknown'}",
@@ -464,7 +466,7 @@ def session_markdown(store: WorkoutHistoryStore, workout_history_id: str) -> str
             f"- Total reps: {sum(reps_for_set(item) for item in active_sets)}",
             f"- Total volume: {format_number(sum(volume_for_set(item, exercise) for item in active_sets))} kg",
         ])
-        rest_line = compact_rest_summary(store.rest_records_for_session(str(workout_history_id), exercise_id))
+        rest_line = compact_rest_summary(store.rest_records_for_session(workout_history_id, exercise_id))
         if rest_line:
             lines.append(f"- Rest: {rest_line}")
         if progression:
@@ -475,22 +477,42 @@ def session_markdown(store: WorkoutHistoryStore, workout_history_id: str) -> str
                 f"vs previous: {progression.get('vsPrevious', 'unknown')})"
             )
         lines.append("")
-    return "\n".join(lines).rstrip() + "\n"
+    return lines
 
 
 def exercise_history_markdown(store: WorkoutHistoryStore, exercise_id: str) -> str:
     exercise = store.exercises_by_id().get(str(exercise_id))
     if not exercise:
         raise ValueError(f"Exercise not found: {exercise_id}")
-    all_sets = [item for item in store.sets_for_exercise(str(exercise_id)) if is_insight_comparison_set(item)]
-    sessions_by_id = store.sessions_by_id()
-    session_ids = sorted(
-        {str(item.get("workoutHistoryId")) for item in all_sets if item.get("workoutHistoryId")},
-        key=lambda sid: (
-            str(sessions_by_id.get(sid, {}).get("date") or ""),
-            str(sessions_by_id.get(sid, {}).get("time") or ""),
-        ),
-    )
+    exercise_sessions = active_exercise_sessions(store, str(exercise_id))
+    lines = exercise_heading_lines(store, exercise)
+    lines.append(athlete_context_markdown(store).rstrip())
+    if exercise_sessions:
+        first = exercise_sessions[0][0].session
+        last = exercise_sessions[-1][0].session
+        lines.append(f"Sessions: {len(exercise_sessions)} | Range: {first.get('date')} to {last.get('date')}")
+        lines.append("")
+
+    workouts = store.workouts_by_id()
+    for index, (exercise_session, active_sets) in enumerate(exercise_sessions, start=1):
+        lines.extend(exercise_session_lines(store, exercise, index, exercise_session, active_sets, workouts))
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def active_exercise_sessions(
+    store: WorkoutHistoryStore,
+    exercise_id: str,
+) -> list[tuple[ExerciseSession, list[dict[str, Any]]]]:
+    """Sessions with at least one insight comparison set for the exercise, oldest first."""
+    grouped = []
+    for item in store.exercise_sessions(exercise_id):
+        active_sets = [set_history for set_history in item.sets if is_insight_comparison_set(set_history)]
+        if active_sets:
+            grouped.append((item, active_sets))
+    return grouped
+
+
+def exercise_heading_lines(store: WorkoutHistoryStore, exercise: dict[str, Any]) -> list[str]:
     lines = [
         f"# {exercise.get('name')}",
         f"Type: {exercise.get('exerciseType') or 'unknown'}",
@@ -516,51 +538,49 @@ def exercise_history_markdown(store: WorkoutHistoryStore, exercise_id: str) -> s
             "- Set load = relative BW +/- equipment weight",
             "",
         ])
-    lines.append(athlete_context_markdown(store).rstrip())
-    if session_ids:
-        first = sessions_by_id.get(session_ids[0], {})
-        last = sessions_by_id.get(session_ids[-1], {})
-        lines.append(f"Sessions: {len(session_ids)} | Range: {first.get('date')} to {last.get('date')}")
-        lines.append("")
-
-    workouts = store.workouts_by_id()
-    for index, session_id in enumerate(session_ids, start=1):
-        session = sessions_by_id.get(session_id) or {}
-        workout = workouts.get(str(session.get("workoutId"))) or {}
-        active_sets = [
-            item for item in all_sets
-            if str(item.get("workoutHistoryId")) == session_id
-        ]
-        progression = store.progression_for(session_id, str(exercise_id))
+    return lines
+
+
+def exercise_session_lines(
+    store: WorkoutHistoryStore,
+    exercise: dict[str, Any],
+    index: int,
+    exercise_session: ExerciseSession,
+    active_sets: list[dict[str, Any]],
+    workouts: dict[str, dict[str, Any]],
+) -> list[str]:
+    session = exercise_session.session
+    workout = workouts.get(str(session.get("workoutId"))) or {}
+    progression = exercise_session.progression
+    lines = [
+        f"## S{index} ({session.get('date')})",
+        "### Performance",
+        f"- Sets: {', '.join(set_token(item, exercise, store) for item in active_sets)}",
+        f"- Top set: {top_set_token(active_sets, exercise, store)}",
+        f"- Total reps: {sum(reps_for_set(item) for item in active_sets)}",
+        f"- Total volume: {format_number(sum(volume_for_set(item, exercise) for item in active_sets))} kg",
+        f"- Rest: {compact_rest_summary(exercise_session.rest_records) or 'none'}",
+        "",
+        "### Context",
+        f"- Workout: {workout.get('name') or 'Unknown Workout'}",
+        f"- Session duration: {format_duration(session.get('duration'))}",
+    ]
+    if progression:
+        expected = progression.get("expectedSets") or []
+        expected_line = ", ".join(f"{format_number(item.get('weight'))}x{item.get('reps')}" for item in expected)
         lines.extend([
-            f"## S{index} ({session.get('date')})",
-            "### Performance",
-            f"- Sets: {', '.join(set_token(item, exercise, store) for item in active_sets)}",
-            f"- Top set: {top_set_token(active_sets, exercise, store)}",
-            f"- Total reps: {sum(reps_for_set(item) for item in active_sets)}",
-            f"- Total volume: {format_number(sum(volume_for_set(item, exercise) for item in active_sets))} kg",
-            f"- Rest: {compact_rest_summary(store.rest_records_for_session(session_id, str(exercise_id))) or 'none'}",
             "",
-            "### Context",
-            f"- Workout: {workout.get('name') or 'Unknown Workout'}",
-            f"- Session duration: {format_duration(session.get('duration'))}",
+            "### Target",
+            f"- Planned sets: {expected_line or 'none'}",
+            (
+                "- Outcome: "
+                f"{progression.get('progressionState', 'unknown')} "
+                f"(vs expected: {progression.get('vsExpected', 'unknown')}, "
+                f"vs previous: {progression.get('vsPrevious', 'unknown')})"
+            ),
         ])
-        if progression:
-            expected = progression.get("expectedSets") or []
-            expected_line = ", ".join(f"{format_number(item.get('weight'))}x{item.get('reps')}" for item in expected)
-            lines.extend([
-                "",
-                "### Target",
-                f"- Planned sets: {expected_line or 'none'}",
-                (
-                    "- Outcome: "
-                    f"{progression.get('progressionState', 'unknown')} "
-                    f"(vs expected: {progression.get('vsExpected', 'unknown')}, "
-                    f"vs previous: {progression.get('vsPrevious', 'unknown')})"
-                ),
-            ])
-        lines.append("")
-    return "\n".join(lines).rstrip() + "\n"
+    lines.append("")
+    return lines
 
 
 
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from math import floor
+from typing import Any
+
+
+SAMPLE_TYPECODE = "I"
+# Largest sample the buffer holds (32 bits on supported platforms); any positive reading up to it is valid
+MAX_SAMPLE_BPM = 2 ** (8 * array(SAMPLE_TYPECODE).itemsize) - 1
+ZONE_PERCENT_RANGES = ((0, 50), (50, 60), (60, 70), (70, 80), (80, 90), (90, 100))
+
+
+@dataclass(frozen=True)
+class HeartRateBasis:
+    """Athlete max/resting HR used to place samples into zones."""
+
+    max_hr: int | None
+    resting_hr: int
+
+    @staticmethod
+    def from_workout_store(workout_store: dict[str, Any]) -> HeartRateBasis:
+        birth_year = workout_store.get("birthDateYear")
+        age = datetime.today().year - int(birth_year) if birth_year else None
+        return HeartRateBasis(
+            max_hr=effective_max_heart_rate(age, workout_store.get("measuredMaxHeartRate")),
+            resting_hr=effective_resting_heart_rate(workout_store.get("restingHeartRate")),
+        )
+
+
+def compact_heart_rate_samples(records: Any) -> tuple[array, int]:
+    """Pack positive integer samples into an unsigned int buffer; return it with the invalid count."""
+    samples = [int(item) for item in records or [] if isinstance(item, int)]
+    valid = array(SAMPLE_TYPECODE, (item for item in samples if 0 < item <= MAX_SAMPLE_BPM))
+    return valid, len(samples) - len(valid)
+
+
+def effective_max_heart_rate(age: int | None, measured_max_heart_rate: Any) -> int | None:
+    if measured_max_heart_rate is not None:
+        return int(measured_max_heart_rate)
+    if age is None:
+        return None
+    return 211 - round_half_up(0.64 * age)
+
+
+def effective_resting_heart_rate(resting_heart_rate: Any) -> int:
+    return int(resting_heart_rate) if resting_heart_rate is not None else 60
+
+
+def round_half_up(value: float) -> int:
+    return int(floor(value + 0.5))
+
+
+def heart_rate_from_percentage(percentage: float, max_hr: int, resting_hr: int) -> int:
+    reserve = max(max_hr - resting_hr, 1)
+    return round_half_up(resting_hr + (percentage / 100) * reserve)
+
+
+def heart_rate_zone_bounds_bpm(max_hr: int, resting_hr: int) -> list[tuple[int, int]]:
+    return list(_cached_zone_bounds(max_hr, resting_hr))
+
+
+@lru_cache(maxsize=64)
+def _cached_zone_bounds(max_hr: int, resting_hr: int) -> tuple[tuple[int, int], ...]:
+    zone_starts = [heart_rate_from_percentage(lower, max_hr, resting_hr) for lower, _ in ZONE_PERCENT_RANGES]
+    absolute_max = heart_rate_from_percentage(ZONE_PERCENT_RANGES[-1][1], max_hr, resting_hr)
+    bounds: list[tuple[int, int]] = []
+    for index, lower in enumerate(zone_starts):
+        upper = zone_starts[index + 1] - 1 if index < len(zone_starts) - 1 else absolute_max
+        bounds.append((lower, max(lower, upper)))
+    return tuple(bounds)
+
+
+@lru_cache(maxsize=64)
+def zone_starts_bpm(max_hr: int, resting_hr: int) -> tuple[int, ...]:
+    return tuple(lower for lower, _ in _cached_zone_bounds(max_hr, resting_hr))
+
+
+def zone_index_for_bpm(heart_rate: int, zone_bounds: list[tuple[int, int]]) -> int:
+    for index in range(len(zone_bounds) - 1, -1, -1):
+        lower, upper = zone_bounds[index]
+        if lower <= heart_rate <= upper:
+            return index
+    if heart_rate < zone_bounds[0][0]:
+        return 0
+    if heart_rate > zone_bounds[-1][1]:
+        return len(zone_bounds) - 1
+    return 0
+
+
+def zone_sample_counts(samples: Any, max_hr: int, resting_hr: int) -> list[int]:
+    """Count samples per zone.
+
+    Zones are contiguous and ordered, so the highest zone whose start is <= bpm is the
+    same zone the reverse scan in `zone_index_for_bpm` finds. Binning distinct bpm
+    values instead of samples keeps the Python loop bounded by the bpm range.
+    """
+    starts = zone_starts_bpm(max_hr, resting_hr)
+    counts = [0 for _ in starts]
+    for bpm, count in Counter(samples).items():
+        counts[max(bisect_right(starts, bpm) - 1, 0)] += count
+    return counts
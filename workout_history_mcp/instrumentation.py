@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+METRICS_WINDOW_ENV = "MYWORKOUT_METRICS_WINDOW"
+TRACE_PATH_ENV = "MYWORKOUT_TRACE_PATH"
+DEFAULT_METRICS_WINDOW = 1000
+BYTES_PER_TOKEN = 4
+PERCENTILES = (50, 95, 99)
+
+logger = logging.getLogger(__name__)
+
+
+def metrics_window_from_env() -> int:
+    configured = os.environ.get(METRICS_WINDOW_ENV)
+    if not configured:
+        return DEFAULT_METRICS_WINDOW
+    return max(int(configured), 1)
+
+
+def trace_path_from_env() -> Path | None:
+    configured = os.environ.get(TRACE_PATH_ENV)
+    return Path(configured).expanduser() if configured else None
+
+
+def estimate_tokens(output_bytes: int) -> int:
+    """Rough token count for UTF-8 output; about four bytes per token for English markdown and JSON."""
+    return math.ceil(output_bytes / BYTES_PER_TOKEN)
+
+
+def output_size_bytes(output: Any) -> int:
+    if isinstance(output, str):
+        return len(output.encode("utf-8"))
+    return len(json.dumps(output, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+@dataclass(frozen=True)
+class CallSample:
+    """Timing and size of one tool or resource call."""
+
+    label: str
+    ok: bool
+    load_ms: float
+    render_ms: float
+    output_bytes: int
+
+    @property
+    def total_ms(self) -> float:
+        return self.load_ms + self.render_ms
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.output_bytes)
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    summary = {
+        f"p{percentile}": round(ordered[max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)], 3)
+        for percentile in PERCENTILES
+    }
+    summary["max"] = round(ordered[-1], 3)
+    return summary
+
+
+class CallMetrics:
+    """Rolling per-label window of call samples, with optional JSONL tracing of every call."""
+
+    def __init__(self, window: int = DEFAULT_METRICS_WINDOW, trace_path: str | os.PathLike[str] | None = None) -> None:
+        self.window = window
+        self.trace_path = Path(trace_path).expanduser() if trace_path else None
+        self.trace_error: str | None = None
+        self._samples: dict[str, deque[CallSample]] = {}
+        self._calls: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+        self._trace_handle: Any = None
+
+    def record(self, sample: CallSample) -> None:
+        with self._lock:
+            samples = self._samples.get(sample.label)
+            if samples is None:
+                samples = self._samples[sample.label] = deque(maxlen=self.window)
+            samples.append(sample)
+            self._calls[sample.label] = self._calls.get(sample.label, 0) + 1
+            if not sample.ok:
+                self._errors[sample.label] = self._errors.get(sample.label, 0) + 1
+        if self.trace_path is not None and self.trace_error is None:
+            self._trace(sample)
+
+    def _trace(self, sample: CallSample) -> None:
+        """Append one JSONL line; the first failure disables tracing instead of failing the call."""
+        payload = {"ts": round(time.time(), 3), **asdict(sample), "estimated_tokens": sample.estimated_tokens}
+        line = json.dumps(payload, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._trace_lock:
+            if self.trace_error is not None:
+                return
+            try:
+                if self._trace_handle is None:
+                    self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._trace_handle = self.trace_path.open("a", encoding="utf-8")
+                self._trace_handle.write(line)
+                self._trace_handle.flush()
+            except OSError as exc:
+                self.trace_error = str(exc)
+                logger.warning("Disabling call tracing to %s: %s", self.trace_path, exc)
+                if self._trace_handle is not None:
+                    try:
+                        self._trace_handle.close()
+                    except OSError:
+                        pass
+                    self._trace_handle = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._calls.clear()
+            self._errors.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            windows = {label: list(samples) for label, samples in self._samples.items()}
+            calls = dict(self._calls)
+            errors = dict(self._errors)
+        tools = {}
+        for label, samples in sorted(windows.items()):
+            tools[label] = {
+                "calls": calls.get(label, 0),
+                "errors": errors.get(label, 0),
+                "window": len(samples),
+                "load_ms": _percentiles([sample.load_ms for sample in samples]),
+                "render_ms": _percentiles([sample.render_ms for sample in samples]),
+                "total_ms": _percentiles([sample.total_ms for sample in samples]),
+                "output_bytes": _percentiles([sample.output_bytes for sample in samples]),
+                "estimated_tokens": _percentiles([sample.estimated_tokens for sample in samples]),
+            }
+        return {
+            "window": self.window,
+            "trace_path": str(self.trace_path) if self.trace_path else None,
+            "trace_error": self.trace_error,
+            "tools": tools,
+        }
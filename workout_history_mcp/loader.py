@@ -2,14 +2,23 @@ from __future__ import annotations
 
 import json
 import os
+from array import array
+from collections import defaultdict
+from collections.abc import Callable, Hashable
 from dataclasses import dataclass
 from datetime import date
+from functools import cached_property
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
+
+from .heart_rate import SAMPLE_TYPECODE, compact_heart_rate_samples
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 BACKUP_PATH_ENV = "MYWORKOUT_BACKUP_PATH"
+BACKUP_DIR_ENV = "MYWORKOUT_BACKUP_DIR"
+
+T = TypeVar("T")
 
 
 def backup_path_from_env() -> Path:
@@ -19,6 +28,43 @@ def backup_path_from_env() -> Path:
     return Path(configured).expanduser()
 
 
+class BackupSelectionError(LookupError):
+    """The requested backup selector does not name a served backup."""
+
+
+def backup_dir_from_env() -> Path | None:
+    configured = os.environ.get(BACKUP_DIR_ENV)
+    return Path(configured).expanduser() if configured else None
+
+
+def available_backups() -> dict[str, Path]:
+    """Map each served backup selector (file stem) to its path."""
+    directory = backup_dir_from_env()
+    if directory is None:
+        path = backup_path_from_env()
+        return {path.stem: path}
+    if not directory.is_dir():
+        raise FileNotFoundError(f"{BACKUP_DIR_ENV} is not a directory: {directory}")
+    return {path.stem: path for path in sorted(directory.glob("*.json")) if path.is_file()}
+
+
+def resolve_backup_path(selector: str | None = None) -> Path:
+    if backup_dir_from_env() is None and not selector:
+        return backup_path_from_env()
+    backups = available_backups()
+    if not selector:
+        if len(backups) == 1:
+            return next(iter(backups.values()))
+        raise BackupSelectionError(
+            f"Multiple backups are served ({len(backups)}); pass `backup` to choose one."
+            if backups else f"No *.json backups found in {backup_dir_from_env()}."
+        )
+    key = selector[:-5] if selector.endswith(".json") else selector
+    if key not in backups:
+        raise BackupSelectionError(f"Backup not found: {selector}")
+    return backups[key]
+
+
 def load_backup(path: str | os.PathLike[str] | None = None) -> dict[str, Any]:
     backup_path = Path(path).expanduser() if path else backup_path_from_env()
     with backup_path.open("r", encoding="utf-8") as handle:
@@ -69,10 +115,81 @@ def _exercise_definition_rank(workout: dict[str, Any], exercise: dict[str, Any])
     )
 
 
+def _execution_sort_key(item: dict[str, Any]) -> tuple[bool, int | float, int | float, str]:
+    return (
+        item.get("executionSequence") is None,
+        _sort_number(item.get("executionSequence")),
+        _sort_number(item.get("order")),
+        str(item.get("startTime") or ""),
+    )
+
+
+def _group_by_key(records: list[dict[str, Any]], key: str) -> dict[str, list[dict[str, Any]]]:
+    grouped: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        grouped[str(record.get(key))].append(record)
+    return dict(grouped)
+
+
+@dataclass(frozen=True)
+class SessionAggregate:
+    """Per-session totals derived in one pass over SetHistories."""
+
+    workout_history_id: str
+    recorded_set_count: int
+    exercise_ids: frozenset[str]
+    recorded_exercise_ids: frozenset[str]
+    heart_rate_samples: array
+    invalid_heart_rate_sample_count: int
+
+
+@dataclass(frozen=True)
+class ExerciseSession:
+    """One session's records for a single exercise, grouped in one pass per exercise."""
+
+    workout_history_id: str
+    session: dict[str, Any]
+    sets: list[dict[str, Any]]
+    rest_records: list[dict[str, Any]]
+    progression: dict[str, Any] | None
+
+
+_EMPTY_SESSION_AGGREGATE = SessionAggregate(
+    workout_history_id="",
+    recorded_set_count=0,
+    exercise_ids=frozenset(),
+    recorded_exercise_ids=frozenset(),
+    heart_rate_samples=array(SAMPLE_TYPECODE),
+    invalid_heart_rate_sample_count=0,
+)
+
+
 @dataclass(frozen=True)
 class WorkoutHistoryStore:
+    """Read-only view over one AppBackup with lazily built hash indexes.
+
+    Index-backed accessors return shared containers; callers must not mutate them.
+    """
+
     backup: dict[str, Any]
 
+    index_attributes = (
+        "_workouts_by_id",
+        "_exercises_by_id",
+        "_workout_names_by_exercise",
+        "_equipment_or_accessory_by_id",
+        "_sessions_by_id",
+        "_completed_sessions",
+        "_sets_by_session",
+        "_sets_by_exercise",
+        "_rest_sets_by_session",
+        "_rests_by_session",
+        "_progressions_by_key",
+        "_rests_by_exercise",
+        "_progressions_by_exercise",
+        "_session_aggregates",
+    )
+
     @property
     def workout_store(self) -> dict[str, Any]:
         return self.backup.get("WorkoutStore") or {}
@@ -105,15 +222,28 @@ class WorkoutHistoryStore:
     def accessory_equipment(self) -> list[dict[str, Any]]:
         return _as_list(self.workout_store.get("accessoryEquipments"))
 
-    def workouts_by_id(self) -> dict[str, dict[str, Any]]:
-        return {str(workout.get("id")): workout for workout in self.workouts}
+    @cached_property
+    def _memo(self) -> dict[Hashable, Any]:
+        return {}
 
-    def workout_by_id(self, workout_id: str | None) -> dict[str, Any] | None:
-        if workout_id is None:
-            return None
-        return self.workouts_by_id().get(str(workout_id))
+    def memoize(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Return a value derived from this backup, computing it once per store."""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
 
-    def exercises_by_id(self) -> dict[str, dict[str, Any]]:
+    def build_indexes(self) -> WorkoutHistoryStore:
+        """Build every lookup index now instead of on first use."""
+        for name in self.index_attributes:
+            getattr(self, name)
+        return self
+
+    @cached_property
+    def _workouts_by_id(self) -> dict[str, dict[str, Any]]:
+        return {str(workout.get("id")): workout for workout in self.workouts}
+
+    @cached_property
+    def _exercises_by_id(self) -> dict[str, dict[str, Any]]:
         exercises: dict[str, dict[str, Any]] = {}
         ranks: dict[str, tuple[int, int, int]] = {}
         for workout in self.workouts:
@@ -129,75 +259,168 @@ class WorkoutHistoryStore:
                         ranks[key] = rank
         return exercises
 
-    def workout_names_for_exercise(self, exercise_id: str) -> list[str]:
-        names: list[str] = []
+    @cached_property
+    def _workout_names_by_exercise(self) -> dict[str, list[str]]:
+        names_by_exercise: dict[str, list[str]] = defaultdict(list)
         for workout in self.workouts:
+            name = workout.get("name")
+            if not name:
+                continue
             for component in _as_list(workout.get("workoutComponents")):
-                if any(str(ex.get("id")) == exercise_id for ex in _component_exercises(component)):
-                    name = workout.get("name")
-                    if name and name not in names:
+                for exercise in _component_exercises(component):
+                    names = names_by_exercise[str(exercise.get("id"))]
+                    if str(name) not in names:
                         names.append(str(name))
-        return names
+        return dict(names_by_exercise)
 
-    def equipment_by_id(self) -> dict[str, dict[str, Any]]:
+    @cached_property
+    def _equipment_by_id(self) -> dict[str, dict[str, Any]]:
         return {str(item.get("id")): item for item in self.equipment}
 
-    def accessory_equipment_by_id(self) -> dict[str, dict[str, Any]]:
+    @cached_property
+    def _accessory_equipment_by_id(self) -> dict[str, dict[str, Any]]:
         return {str(item.get("id")): item for item in self.accessory_equipment}
 
-    def equipment_or_accessory_by_id(self) -> dict[str, dict[str, Any]]:
+    @cached_property
+    def _equipment_or_accessory_by_id(self) -> dict[str, dict[str, Any]]:
         return {
-            **self.equipment_by_id(),
-            **self.accessory_equipment_by_id(),
+            **self._equipment_by_id,
+            **self._accessory_equipment_by_id,
         }
 
-    def sessions_by_id(self) -> dict[str, dict[str, Any]]:
+    @cached_property
+    def _sessions_by_id(self) -> dict[str, dict[str, Any]]:
         return {str(session.get("id")): session for session in self.workout_histories}
 
-    def completed_sessions(self) -> list[dict[str, Any]]:
+    @cached_property
+    def _completed_sessions(self) -> list[dict[str, Any]]:
         return sorted(
             [session for session in self.workout_histories if session.get("isDone") is True],
             key=_sort_key_for_session,
         )
 
-    def sets_for_session(self, workout_history_id: str) -> list[dict[str, Any]]:
-        sets = [
-            set_history for set_history in self.set_histories
-            if str(set_history.get("workoutHistoryId")) == str(workout_history_id)
-        ]
-        return sorted(
-            sets,
-            key=lambda item: (
-                item.get("executionSequence") is None,
-                _sort_number(item.get("executionSequence")),
-                _sort_number(item.get("order")),
-                str(item.get("startTime") or ""),
-            ),
+    @cached_property
+    def _sets_by_session(self) -> dict[str, list[dict[str, Any]]]:
+        grouped = _group_by_key(self.set_histories, "workoutHistoryId")
+        for sets in grouped.values():
+            sets.sort(key=_execution_sort_key)
+        return grouped
+
+    @cached_property
+    def _sets_by_exercise(self) -> dict[str, list[dict[str, Any]]]:
+        return _group_by_key(self.set_histories, "exerciseId")
+
+    @cached_property
+    def _rest_sets_by_session(self) -> dict[str, list[dict[str, Any]]]:
+        return _group_by_key(
+            [
+                set_history for set_history in self.set_histories
+                if (set_history.get("setData") or {}).get("type") == "RestSetData"
+            ],
+            "workoutHistoryId",
         )
 
+    @cached_property
+    def _rests_by_session(self) -> dict[str, list[dict[str, Any]]]:
+        grouped = _group_by_key(self.rest_histories, "workoutHistoryId")
+        for rests in grouped.values():
+            rests.sort(key=lambda item: (_sort_number(item.get("order")), str(item.get("startTime") or "")))
+        return grouped
+
+    @cached_property
+    def _progressions_by_key(self) -> dict[tuple[str, str], dict[str, Any]]:
+        progressions: dict[tuple[str, str], dict[str, Any]] = {}
+        for progression in self.progressions:
+            key = (str(progression.get("workoutHistoryId")), str(progression.get("exerciseId")))
+            progressions.setdefault(key, progression)
+        return progressions
+
+    @cached_property
+    def _rests_by_exercise(self) -> dict[str, list[dict[str, Any]]]:
+        return _group_by_key(self.rest_histories, "exerciseId")
+
+    @cached_property
+    def _progressions_by_exercise(self) -> dict[str, list[dict[str, Any]]]:
+        return _group_by_key(self.progressions, "exerciseId")
+
+    @cached_property
+    def _session_aggregates(self) -> dict[str, SessionAggregate]:
+        recorded_counts: dict[str, int] = defaultdict(int)
+        exercise_ids: dict[str, set[str]] = defaultdict(set)
+        recorded_exercise_ids: dict[str, set[str]] = defaultdict(set)
+        for set_history in self.set_histories:
+            session_id = str(set_history.get("workoutHistoryId"))
+            exercise_id = set_history.get("exerciseId")
+            exercise_ids[session_id].add(str(exercise_id))
+            if _is_active_set(set_history):
+                recorded_counts[session_id] += 1
+                if exercise_id is not None:
+                    recorded_exercise_ids[session_id].add(str(exercise_id))
+        sessions_by_id = self._sessions_by_id
+        aggregates: dict[str, SessionAggregate] = {}
+        for session_id in {*sessions_by_id, *exercise_ids}:
+            samples, invalid_count = compact_heart_rate_samples(
+                (sessions_by_id.get(session_id) or {}).get("heartBeatRecords")
+            )
+            aggregates[session_id] = SessionAggregate(
+                workout_history_id=session_id,
+                recorded_set_count=recorded_counts.get(session_id, 0),
+                exercise_ids=frozenset(exercise_ids.get(session_id, ())),
+                recorded_exercise_ids=frozenset(recorded_exercise_ids.get(session_id, ())),
+                heart_rate_samples=samples,
+                invalid_heart_rate_sample_count=invalid_count,
+            )
+        return aggregates
+
+    def session_aggregates(self) -> dict[str, SessionAggregate]:
+        return self._session_aggregates
+
+    def session_aggregate(self, workout_history_id: str) -> SessionAggregate:
+        return self._session_aggregates.get(str(workout_history_id), _EMPTY_SESSION_AGGREGATE)
+
+    def workouts_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._workouts_by_id
+
+    def workout_by_id(self, workout_id: str | None) -> dict[str, Any] | None:
+        if workout_id is None:
+            return None
+        return self._workouts_by_id.get(str(workout_id))
+
+    def exercises_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._exercises_by_id
+
+    def workout_names_for_exercise(self, exercise_id: str) -> list[str]:
+        return list(self._workout_names_by_exercise.get(str(exercise_id), ()))
+
+    def equipment_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._equipment_by_id
+
+    def accessory_equipment_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._accessory_equipment_by_id
+
+    def equipment_or_accessory_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._equipment_or_accessory_by_id
+
+    def sessions_by_id(self) -> dict[str, dict[str, Any]]:
+        return self._sessions_by_id
+
+    def completed_sessions(self) -> list[dict[str, Any]]:
+        return self._completed_sessions
+
+    def sets_for_session(self, workout_history_id: str) -> list[dict[str, Any]]:
+        return self._sets_by_session.get(str(workout_history_id), [])
+
     def sets_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
-        return [
-            set_history for set_history in self.set_histories
-            if str(set_history.get("exerciseId")) == str(exercise_id)
-        ]
+        return self._sets_by_exercise.get(str(exercise_id), [])
 
     def rests_for_session(self, workout_history_id: str, exercise_id: str | None = None) -> list[dict[str, Any]]:
-        rests = [
-            rest for rest in self.rest_histories
-            if str(rest.get("workoutHistoryId")) == str(workout_history_id)
-        ]
+        rests = self._rests_by_session.get(str(workout_history_id), [])
         if exercise_id is not None:
             rests = [rest for rest in rests if str(rest.get("exerciseId")) == str(exercise_id)]
-        return sorted(rests, key=lambda item: (_sort_number(item.get("order")), str(item.get("startTime") or "")))
+        return rests
 
     def rest_records_for_session(self, workout_history_id: str, exercise_id: str | None = None) -> list[dict[str, Any]]:
-        rest_set_histories = [
-            set_history for set_history in self.set_histories
-            if (
-                str(set_history.get("workoutHistoryId")) == str(workout_history_id)
-                and (set_history.get("setData") or {}).get("type") == "RestSetData"
-            )
-        ]
+        rest_set_histories = self._rest_sets_by_session.get(str(workout_history_id), [])
         if exercise_id is not None:
             rest_set_histories = [
                 rest for rest in rest_set_histories
@@ -205,22 +428,52 @@ class WorkoutHistoryStore:
             ]
         return sorted(
             [*self.rests_for_session(workout_history_id, exercise_id), *rest_set_histories],
-            key=lambda item: (
-                item.get("executionSequence") is None,
-                _sort_number(item.get("executionSequence")),
-                _sort_number(item.get("order")),
-                str(item.get("startTime") or ""),
-            ),
+            key=_execution_sort_key,
         )
 
     def progression_for(self, workout_history_id: str, exercise_id: str) -> dict[str, Any] | None:
-        for progression in self.progressions:
-            if (
-                str(progression.get("workoutHistoryId")) == str(workout_history_id)
-                and str(progression.get("exerciseId")) == str(exercise_id)
-            ):
-                return progression
-        return None
+        return self._progressions_by_key.get((str(workout_history_id), str(exercise_id)))
+
+    def rests_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
+        return self._rests_by_exercise.get(str(exercise_id), [])
+
+    def progressions_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
+        return self._progressions_by_exercise.get(str(exercise_id), [])
+
+    def exercise_sessions(self, exercise_id: str) -> tuple[ExerciseSession, ...]:
+        """Every session that recorded `exercise_id`, oldest first, built once per exercise."""
+        return self.memoize(("exercise_sessions", str(exercise_id)), lambda: self._group_exercise_sessions(str(exercise_id)))
+
+    def _group_exercise_sessions(self, exercise_id: str) -> tuple[ExerciseSession, ...]:
+        sets_by_session: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        rest_sets_by_session: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for set_history in self.sets_for_exercise(exercise_id):
+            if not set_history.get("workoutHistoryId"):
+                continue
+            session_id = str(set_history.get("workoutHistoryId"))
+            sets_by_session[session_id].append(set_history)
+            if (set_history.get("setData") or {}).get("type") == "RestSetData":
+                rest_sets_by_session[session_id].append(set_history)
+        rests_by_session = _group_by_key(self.rests_for_exercise(exercise_id), "workoutHistoryId")
+        progressions: dict[str, dict[str, Any]] = {}
+        for progression in self.progressions_for_exercise(exercise_id):
+            progressions.setdefault(str(progression.get("workoutHistoryId")), progression)
+        sessions_by_id = self._sessions_by_id
+        grouped = [
+            ExerciseSession(
+                workout_history_id=session_id,
+                session=sessions_by_id.get(session_id) or {},
+                sets=sets,
+                rest_records=sorted(
+                    [*rests_by_session.get(session_id, ()), *rest_sets_by_session.get(session_id, ())],
+                    key=_execution_sort_key,
+                ),
+                progression=progressions.get(session_id),
+            )
+            for session_id, sets in sets_by_session.items()
+        ]
+        grouped.sort(key=lambda item: (str(item.session.get("date") or ""), str(item.session.get("time") or "")))
+        return tuple(grouped)
 
     def training_date_range(self) -> tuple[str | None, str | None]:
         sessions = self.completed_sessions()
@@ -233,11 +486,8 @@ class WorkoutHistoryStore:
         birth_year = workout_store.get("birthDateYear")
         current_age = date.today().year - int(birth_year) if birth_year else None
         start_date, end_date = self.training_date_range()
-        exercise_ids = {
-            str(set_history.get("exerciseId"))
-            for set_history in self.set_histories
-            if set_history.get("exerciseId") is not None and _is_active_set(set_history)
-        }
+        aggregates = self._session_aggregates.values()
+        exercise_ids = set().union(*(aggregate.recorded_exercise_ids for aggregate in aggregates))
         completed_sessions = self.completed_sessions()
         return {
             "birth_year": birth_year,
@@ -250,7 +500,7 @@ class WorkoutHistoryStore:
             "training_end_date": end_date,
             "latest_workout_date": end_date,
             "completed_session_count": len(completed_sessions),
-            "total_recorded_sets": len([item for item in self.set_histories if _is_active_set(item)]),
+            "total_recorded_sets": sum(aggregate.recorded_set_count for aggregate in aggregates),
             "exercise_count": len(exercise_ids),
             "available_equipment": [item.get("name") for item in self.equipment if item.get("name")],
             "available_accessories": [item.get("name") for item in self.accessory_equipment if item.get("name")],
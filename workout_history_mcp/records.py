@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import exp
+from typing import Any
+
+from .exporters import is_insight_comparison_set, load_for_set, reps_for_set, volume_for_set
+from .loader import WorkoutHistoryStore
+
+
+RECORD_KINDS = ("load", "reps", "e1rm", "volume")
+TIMELINE_COLUMNS = ("date", "workout_history_id", "records", "top_load_kg", "top_set_reps", "e1rm_kg", "session_volume_kg")
+SUMMARY_COLUMNS = (
+    "exercise_id",
+    "exercise",
+    "sessions",
+    "best_load_kg",
+    "best_load_date",
+    "best_e1rm_kg",
+    "best_e1rm_date",
+    "best_session_volume_kg",
+    "best_session_volume_date",
+    "last_record_date",
+)
+REPS_AT_LOAD_COLUMNS = ("load_kg", "reps", "date")
+
+
+def estimated_one_rep_max(load: float, reps: int) -> float:
+    """Mayhew estimate, matching the app's OneRM model: load / (0.522 + 0.419 * e^(-0.055 * reps))."""
+    if load <= 0 or reps <= 0:
+        return 0.0
+    return load / (0.522 + 0.419 * exp(-0.055 * reps))
+
+
+@dataclass(frozen=True)
+class RecordEvent:
+    """A session that set at least one new running maximum for its exercise."""
+
+    date: str | None
+    workout_history_id: str
+    kinds: tuple[str, ...]
+    top_load: float
+    top_set_reps: int
+    e1rm: float
+    session_volume: float
+
+
+@dataclass(frozen=True)
+class ExerciseRecords:
+    exercise_id: str
+    session_count: int
+    best_load: float
+    best_load_date: str | None
+    best_e1rm: float
+    best_e1rm_date: str | None
+    best_session_volume: float
+    best_session_volume_date: str | None
+    reps_at_load: tuple[tuple[float, int, str | None], ...]
+    events: tuple[RecordEvent, ...]
+
+
+def _improves_reps_at_load(frontier: dict[float, tuple[int, str | None]], load: float, reps: int) -> bool:
+    return all(not (best_load >= load and best_reps >= reps) for best_load, (best_reps, _) in frontier.items())
+
+
+def _add_to_frontier(frontier: dict[float, tuple[int, str | None]], load: float, reps: int, day: str | None) -> None:
+    for best_load in [key for key, (best_reps, _) in frontier.items() if key <= load and best_reps <= reps]:
+        del frontier[best_load]
+    frontier[load] = (reps, day)
+
+
+def _compute_exercise_records(store: WorkoutHistoryStore, exercise_id: str) -> ExerciseRecords:
+    exercise = store.exercises_by_id().get(exercise_id) or {}
+    best_load = best_e1rm = best_volume = 0.0
+    best_load_date = best_e1rm_date = best_volume_date = None
+    frontier: dict[float, tuple[int, str | None]] = {}
+    events: list[RecordEvent] = []
+    session_count = 0
+    for exercise_session in store.exercise_sessions(exercise_id):
+        active_sets = [item for item in exercise_session.sets if is_insight_comparison_set(item)]
+        if not active_sets:
+            continue
+        session_count += 1
+        day = exercise_session.session.get("date")
+        day = str(day) if day is not None else None
+        kinds: list[str] = []
+        performed = [(round(load_for_set(item, exercise), 2), reps_for_set(item)) for item in active_sets]
+        top_load, top_reps = max(performed)
+        session_e1rm = max(estimated_one_rep_max(load, reps) for load, reps in performed)
+        session_volume = sum(volume_for_set(item, exercise) for item in active_sets)
+        if top_load > best_load:
+            best_load, best_load_date = top_load, day
+            kinds.append("load")
+        for load, reps in performed:
+            if load > 0 and reps > 0 and _improves_reps_at_load(frontier, load, reps):
+                _add_to_frontier(frontier, load, reps, day)
+                if "reps" not in kinds:
+                    kinds.append("reps")
+        if session_e1rm > best_e1rm:
+            best_e1rm, best_e1rm_date = session_e1rm, day
+            kinds.append("e1rm")
+        if session_volume > best_volume:
+            best_volume, best_volume_date = session_volume, day
+            kinds.append("volume")
+        if kinds:
+            events.append(RecordEvent(
+                date=day,
+                workout_history_id=exercise_session.workout_history_id,
+                kinds=tuple(kind for kind in RECORD_KINDS if kind in kinds),
+                top_load=top_load,
+                top_set_reps=top_reps,
+                e1rm=session_e1rm,
+                session_volume=session_volume,
+            ))
+    return ExerciseRecords(
+        exercise_id=exercise_id,
+        session_count=session_count,
+        best_load=best_load,
+        best_load_date=best_load_date,
+        best_e1rm=best_e1rm,
+        best_e1rm_date=best_e1rm_date,
+        best_session_volume=best_volume,
+        best_session_volume_date=best_volume_date,
+        reps_at_load=tuple((load, reps, day) for load, (reps, day) in sorted(frontier.items(), reverse=True)),
+        events=tuple(events),
+    )
+
+
+def exercise_records(store: WorkoutHistoryStore, exercise_id: str) -> ExerciseRecords:
+    """Running maxima for one exercise, computed chronologically once per store."""
+    exercise_id = str(exercise_id)
+    if exercise_id not in store.exercises_by_id():
+        raise ValueError(f"Exercise not found: {exercise_id}")
+    return store.memoize(("exercise_records", exercise_id), lambda: _compute_exercise_records(store, exercise_id))
+
+
+def personal_records_data(store: WorkoutHistoryStore, exercise_id: str | None = None) -> dict[str, Any]:
+    """Compact PR tables: current bests for every exercise, or one exercise's PR timeline."""
+    exercises = store.exercises_by_id()
+    if exercise_id is None:
+        rows = []
+        for current_id, exercise in exercises.items():
+            records = exercise_records(store, current_id)
+            if not records.events:
+                continue
+            rows.append([
+                current_id,
+                exercise.get("name"),
+                records.session_count,
+                round(records.best_load, 2),
+                records.best_load_date,
+                round(records.best_e1rm, 2),
+                records.best_e1rm_date,
+                round(records.best_session_volume, 2),
+                records.best_session_volume_date,
+                records.events[-1].date,
+            ])
+        rows.sort(key=lambda row: str(row[1] or "").lower())
+        return {"columns": list(SUMMARY_COLUMNS), "rows": rows}
+
+    records = exercise_records(store, exercise_id)
+    return {
+        "exercise_id": records.exercise_id,
+        "exercise": exercises[records.exercise_id].get("name"),
+        "sessions": records.session_count,
+        "columns": list(TIMELINE_COLUMNS),
+        "rows": [
+            [
+                event.date,
+                event.workout_history_id,
+                ",".join(event.kinds),
+                round(event.top_load, 2),
+                event.top_set_reps,
+                round(event.e1rm, 2),
+                round(event.session_volume, 2),
+            ]
+            for event in records.events
+        ],
+        "reps_at_load": {
+            "columns": list(REPS_AT_LOAD_COLUMNS),
+            "rows": [[load, reps, day] for load, reps, day in records.reps_at_load],
+        },
+    }
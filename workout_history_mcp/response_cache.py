@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+
+RESPONSE_CACHE_SIZE_ENV = "MYWORKOUT_RESPONSE_CACHE_SIZE"
+DEFAULT_RESPONSE_CACHE_SIZE = 256
+
+T = TypeVar("T")
+
+
+def response_cache_size_from_env() -> int:
+    configured = os.environ.get(RESPONSE_CACHE_SIZE_ENV)
+    if not configured:
+        return DEFAULT_RESPONSE_CACHE_SIZE
+    return max(int(configured), 0)
+
+
+def freeze_arguments(arguments: dict[str, Any]) -> tuple[tuple[str, Hashable], ...]:
+    return tuple(sorted((name, _freeze(value)) for name, value in arguments.items()))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return freeze_arguments(value)
+    return value
+
+
+class ResponseCache:
+    """Bounded LRU of rendered tool/resource responses.
+
+    Keys must include the backup fingerprint so a new backup never serves stale output.
+    Failed renders raise through and are not cached.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RESPONSE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
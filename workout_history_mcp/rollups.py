@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any
+
+from .exporters import is_insight_comparison_set, load_for_set, reps_for_set, volume_for_set
+from .heart_rate import ZONE_PERCENT_RANGES, HeartRateBasis, zone_sample_counts
+from .loader import WorkoutHistoryStore
+
+
+ROLLUP_PERIODS = ("day", "week", "month")
+ROLLUP_GROUPS = ("exercise", "muscle_group", "workout")
+ZONE_COLUMNS = tuple(f"z{index}_seconds" for index in range(len(ZONE_PERCENT_RANGES)))
+
+
+@dataclass
+class _RollupCell:
+    name: str
+    sessions: set[str] = field(default_factory=set)
+    sets: int = 0
+    reps: int = 0
+    volume: float = 0.0
+    top_load: float = 0.0
+    zone_seconds: list[int] = field(default_factory=lambda: [0 for _ in ZONE_COLUMNS])
+
+
+def period_start(day: date, period: str) -> str:
+    if period == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if period == "month":
+        return day.replace(day=1).isoformat()
+    return day.isoformat()
+
+
+def _parse_date(value: Any) -> date | None:
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _parse_bound(value: str | None, name: str) -> date | None:
+    if not value:
+        return None
+    parsed = _parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {name}: {value}. Use YYYY-MM-DD.")
+    return parsed
+
+
+def training_rollup_data(
+    store: WorkoutHistoryStore,
+    period: str = "week",
+    group_by: str = "exercise",
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict[str, Any]:
+    """Roll completed sessions up per period and group as a compact column/row table.
+
+    Sets count toward every primary muscle group of their exercise. Heart-rate zone
+    time is recorded per session, so it is only reported when grouping by workout.
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unsupported period: {period}. Use one of: {', '.join(ROLLUP_PERIODS)}.")
+    if group_by not in ROLLUP_GROUPS:
+        raise ValueError(f"Unsupported group_by: {group_by}. Use one of: {', '.join(ROLLUP_GROUPS)}.")
+    start = _parse_bound(start_date, "start_date")
+    end = _parse_bound(end_date, "end_date")
+    exercises = store.exercises_by_id()
+    workouts = store.workouts_by_id()
+    basis = HeartRateBasis.from_workout_store(store.workout_store)
+    cells: dict[tuple[str, str], _RollupCell] = {}
+
+    def cell(period_key: str, group_id: str, name: str) -> _RollupCell:
+        key = (period_key, group_id)
+        if key not in cells:
+            cells[key] = _RollupCell(name=name)
+        return cells[key]
+
+    for session in store.completed_sessions():
+        day = _parse_date(session.get("date"))
+        if day is None or (start and day < start) or (end and day > end):
+            continue
+        session_id = str(session.get("id"))
+        period_key = period_start(day, period)
+        if group_by == "workout":
+            workout_id = str(session.get("workoutId"))
+            workout_cell = cell(period_key, workout_id, str((workouts.get(workout_id) or {}).get("name") or "Unknown Workout"))
+            workout_cell.sessions.add(session_id)
+            if basis.max_hr:
+                samples = store.session_aggregate(session_id).heart_rate_samples
+                for index, count in enumerate(zone_sample_counts(samples, basis.max_hr, basis.resting_hr)):
+                    workout_cell.zone_seconds[index] += count
+        for set_history in store.sets_for_session(session_id):
+            if not is_insight_comparison_set(set_history):
+                continue
+            exercise_id = str(set_history.get("exerciseId"))
+            exercise = exercises.get(exercise_id) or {}
+            if group_by == "exercise":
+                targets = [cell(period_key, exercise_id, str(exercise.get("name") or "Unknown Exercise"))]
+            elif group_by == "muscle_group":
+                muscles = exercise.get("muscleGroups") or ["UNSPECIFIED"]
+                targets = [cell(period_key, str(muscle), str(muscle)) for muscle in muscles]
+            else:
+                workout_id = str(session.get("workoutId"))
+                targets = [cells[(period_key, workout_id)]]
+            volume = volume_for_set(set_history, exercise)
+            load = load_for_set(set_history, exercise)
+            reps = reps_for_set(set_history)
+            for target in targets:
+                target.sessions.add(session_id)
+                target.sets += 1
+                target.reps += reps
+                target.volume += volume
+                target.top_load = max(target.top_load, load)
+
+    columns = ["period_start", "group_id", "group", "sessions", "sets", "reps", "volume_kg", "top_set_load_kg"]
+    if group_by == "workout":
+        columns.extend(ZONE_COLUMNS)
+    rows = []
+    for (period_key, group_id), item in sorted(cells.items(), key=lambda entry: (entry[0][0], entry[1].name.lower())):
+        row: list[Any] = [
+            period_key,
+            group_id,
+            item.name,
+            len(item.sessions),
+            item.sets,
+            item.reps,
+            round(item.volume, 2),
+            round(item.top_load, 2),
+        ]
+        if group_by == "workout":
+            row.extend(item.zone_seconds)
+        rows.append(row)
+    return {
+        "period": period,
+        "group_by": group_by,
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "columns": columns,
+        "rows": rows,
+    }
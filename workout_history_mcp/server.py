@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import os
+import time
 from collections.abc import Callable
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 
+from .budgeted import DEFAULT_MAX_TOKENS, exercise_history_page, sessions_page
 from .exporters import (
     current_training_plan_data,
     exercise_history_markdown,
@@ -17,55 +19,147 @@ from .exporters import (
     session_markdown,
     summary_markdown,
 )
-from .loader import WorkoutHistoryStore, backup_path_from_env, load_store
+from .instrumentation import CallMetrics, CallSample, metrics_window_from_env, output_size_bytes, trace_path_from_env
+from .loader import (
+    BACKUP_DIR_ENV,
+    BACKUP_PATH_ENV,
+    WorkoutHistoryStore,
+    available_backups,
+    backup_dir_from_env,
+    resolve_backup_path,
+)
+from .records import personal_records_data
+from .rollups import training_rollup_data
+from .response_cache import ResponseCache, freeze_arguments, response_cache_size_from_env
+from .sqlite_cache import history_cache_path_from_env
+from .store_cache import StoreRegistry
 from .tool_errors import ToolFailure
 
 
-def _load_store_or_failure() -> WorkoutHistoryStore | ToolFailure:
+_STORES = StoreRegistry(history_cache_path=history_cache_path_from_env())
+_METRICS = CallMetrics(window=metrics_window_from_env(), trace_path=trace_path_from_env())
+MAX_BATCH_IDS = 50
+
+T = TypeVar("T")
+
+
+def _load_store_or_failure(backup: str | None = None) -> WorkoutHistoryStore | ToolFailure:
     try:
-        path = backup_path_from_env()
-        return load_store(path)
+        path = resolve_backup_path(backup)
+        return _STORES.get(path)
     except Exception as exc:
-        shown_path = Path(os.environ.get("MYWORKOUT_BACKUP_PATH") or "MYWORKOUT_BACKUP_PATH")
+        directory = backup_dir_from_env()
+        if directory is not None:
+            shown_path = directory / backup if backup else directory
+        else:
+            shown_path = Path(os.environ.get(BACKUP_PATH_ENV) or BACKUP_PATH_ENV)
         return ToolFailure.from_load_exception(exc, shown_path)
 
 
-def _with_store_str(factory: Callable[[WorkoutHistoryStore], str], *, label: str) -> str:
-    loaded = _load_store_or_failure()
-    if isinstance(loaded, ToolFailure):
-        return loaded.as_markdown()
-    try:
-        return factory(loaded)
-    except ValueError as exc:
-        return ToolFailure.from_value_error(exc, tool=label).as_markdown()
-    except Exception as exc:
-        return ToolFailure.unexpected(exc, tool=label).as_markdown()
+def _record_call(label: str, started: float, loaded: float, output: Any, *, ok: bool) -> None:
+    finished = time.perf_counter()
+    _METRICS.record(CallSample(
+        label=label,
+        ok=ok,
+        load_ms=(loaded - started) * 1000,
+        render_ms=(finished - loaded) * 1000,
+        output_bytes=output_size_bytes(output),
+    ))
 
 
-def _with_store_dict(factory: Callable[[WorkoutHistoryStore], dict[str, Any]], *, label: str) -> dict[str, Any]:
-    loaded = _load_store_or_failure()
+def _with_store_str(
+    factory: Callable[[WorkoutHistoryStore], str],
+    *,
+    label: str,
+    backup: str | None = None,
+) -> str:
+    started = time.perf_counter()
+    loaded = _load_store_or_failure(backup)
+    loaded_at = time.perf_counter()
+    ok = False
     if isinstance(loaded, ToolFailure):
-        return loaded.as_dict()
-    try:
-        return factory(loaded)
-    except ValueError as exc:
-        return ToolFailure.from_value_error(exc, tool=label).as_dict()
-    except Exception as exc:
-        return ToolFailure.unexpected(exc, tool=label).as_dict()
+        output = loaded.as_markdown()
+    else:
+        try:
+            output = factory(loaded)
+            ok = True
+        except ValueError as exc:
+            output = ToolFailure.from_value_error(exc, tool=label).as_markdown()
+        except Exception as exc:
+            output = ToolFailure.unexpected(exc, tool=label).as_markdown()
+    _record_call(label, started, loaded_at, output, ok=ok)
+    return output
+
+
+def _with_store_dict(
+    factory: Callable[[WorkoutHistoryStore], dict[str, Any]],
+    *,
+    label: str,
+    backup: str | None = None,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    loaded = _load_store_or_failure(backup)
+    loaded_at = time.perf_counter()
+    ok = False
+    if isinstance(loaded, ToolFailure):
+        output = loaded.as_dict()
+    else:
+        try:
+            output = factory(loaded)
+            # Batch tools report per-id failures in an ok=False payload instead of raising
+            ok = output.get("ok") is not False
+        except ValueError as exc:
+            output = ToolFailure.from_value_error(exc, tool=label).as_dict()
+        except Exception as exc:
+            output = ToolFailure.unexpected(exc, tool=label).as_dict()
+    _record_call(label, started, loaded_at, output, ok=ok)
+    return output
 
 
 def _with_store_list(
     factory: Callable[[WorkoutHistoryStore], list[dict[str, Any]]],
     *,
     label: str,
+    backup: str | None = None,
 ) -> list[dict[str, Any]] | dict[str, Any]:
-    loaded = _load_store_or_failure()
+    started = time.perf_counter()
+    loaded = _load_store_or_failure(backup)
+    loaded_at = time.perf_counter()
+    ok = False
     if isinstance(loaded, ToolFailure):
-        return loaded.as_dict()
-    try:
-        return factory(loaded)
-    except Exception as exc:
-        return ToolFailure.unexpected(exc, tool=label).as_dict()
+        output: list[dict[str, Any]] | dict[str, Any] = loaded.as_dict()
+    else:
+        try:
+            output = factory(loaded)
+            ok = True
+        except Exception as exc:
+            output = ToolFailure.unexpected(exc, tool=label).as_dict()
+    _record_call(label, started, loaded_at, output, ok=ok)
+    return output
+
+
+def _render_batch(
+    store: WorkoutHistoryStore,
+    ids: list[str],
+    render: Callable[[WorkoutHistoryStore, str], str],
+    *,
+    label: str,
+) -> dict[str, Any]:
+    unique_ids = list(dict.fromkeys(str(item) for item in ids))
+    if not unique_ids:
+        raise ValueError(f"{label} needs at least one id.")
+    if len(unique_ids) > MAX_BATCH_IDS:
+        raise ValueError(f"{label} accepts at most {MAX_BATCH_IDS} ids per call; got {len(unique_ids)}.")
+    items: dict[str, str] = {}
+    errors: dict[str, dict[str, Any]] = {}
+    for item_id in unique_ids:
+        try:
+            items[item_id] = render(store, item_id)
+        except ValueError as exc:
+            errors[item_id] = ToolFailure.from_value_error(exc, tool=label).as_dict()
+        except Exception as exc:
+            errors[item_id] = ToolFailure.unexpected(exc, tool=label).as_dict()
+    return {"ok": not errors, "items": items, "errors": errors}
 
 
 def create_mcp() -> FastMCP:
@@ -76,6 +170,7 @@ def create_mcp() -> FastMCP:
         instructions=(
             "Read-only access to a MyWorkoutAssistant AppBackup JSON. "
             "Use the resources for broad context and tools for targeted session or exercise history. "
+            f"When {BACKUP_DIR_ENV} serves several backups, call list_backups and pass `backup` to each tool. "
             "When a tool or resource fails, JSON payloads include ok=false with error and optional hint; "
             "markdown tools return a '# Tool error' document instead of raising."
         ),
@@ -84,42 +179,112 @@ def create_mcp() -> FastMCP:
         stateless_http=True,
         transport_security=TransportSecuritySettings(enable_dns_rebinding_protection=False),
     )
+    responses = ResponseCache(max_entries=response_cache_size_from_env())
+
+    def cached(
+        name: str,
+        factory: Callable[[WorkoutHistoryStore], T],
+        **arguments: Any,
+    ) -> Callable[[WorkoutHistoryStore], T]:
+        def render(store: WorkoutHistoryStore) -> T:
+            fingerprint = _STORES.fingerprint_for(store)
+            if fingerprint is None:
+                return factory(store)
+            key = (name, freeze_arguments(arguments), fingerprint)
+            return responses.get_or_compute(key, lambda: factory(store))
+
+        return render
 
     @mcp.resource("workout-history://athlete")
     def athlete_resource() -> dict[str, Any]:
         """Athlete profile and derived training context."""
-        return _with_store_dict(lambda store: store.athlete_profile(), label="workout-history://athlete")
+        return _with_store_dict(
+            cached("workout-history://athlete", lambda store: store.athlete_profile()),
+            label="workout-history://athlete",
+        )
 
     @mcp.resource("workout-history://summary")
     def summary_resource() -> str:
         """Summary of athlete context, date range, workouts, and exercise index."""
-        return _with_store_str(lambda store: summary_markdown(store), label="workout-history://summary")
+        return _with_store_str(cached("workout-history://summary", summary_markdown), label="workout-history://summary")
 
     @mcp.resource("workout-history://exercises")
     def exercises_resource() -> str:
         """Compact searchable exercise index."""
-        return _with_store_str(lambda store: exercise_index_markdown(store), label="workout-history://exercises")
+        return _with_store_str(
+            cached("workout-history://exercises", exercise_index_markdown),
+            label="workout-history://exercises",
+        )
 
     @mcp.resource("workout-history://current-plan")
     def current_plan_resource() -> dict[str, Any]:
         """Current active workouts, exercise prescriptions, progression settings, and equipment."""
-        return _with_store_dict(lambda store: current_training_plan_data(store), label="workout-history://current-plan")
+        return _with_store_dict(
+            cached("workout-history://current-plan", current_training_plan_data),
+            label="workout-history://current-plan",
+        )
+
+    @mcp.resource("workout-history://diagnostics")
+    def diagnostics_resource() -> dict[str, Any]:
+        """Server statistics: resident backups, response cache hits and misses, and per-tool latency and output size."""
+        return {
+            "stores": _STORES.stats(),
+            "response_cache": responses.stats(),
+            "calls": _METRICS.stats(),
+        }
 
     @mcp.tool()
-    def get_athlete_profile() -> dict[str, Any]:
+    def list_backups() -> dict[str, Any]:
+        """List the backups this server can read; pass a returned `backup` value to other tools to choose one.
+
+        On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
+        """
+        try:
+            backups = available_backups()
+        except Exception as exc:
+            shown_path = backup_dir_from_env() or Path(os.environ.get(BACKUP_PATH_ENV) or BACKUP_PATH_ENV)
+            return ToolFailure.from_load_exception(exc, shown_path).as_dict()
+        resident = {item["path"] for item in _STORES.stats()["resident_backups"]}
+        items = []
+        for selector, path in backups.items():
+            try:
+                size_bytes: int | None = path.stat().st_size
+            except OSError:
+                size_bytes = None
+            items.append({
+                "backup": selector,
+                "path": str(path),
+                "size_bytes": size_bytes,
+                "loaded": str(path.expanduser().resolve()) in resident,
+            })
+        return {
+            "mode": "directory" if backup_dir_from_env() is not None else "single",
+            "backups": items,
+        }
+
+    @mcp.tool()
+    def get_athlete_profile(backup: str | None = None) -> dict[str, Any]:
         """Return profile fields, derived history stats, and available equipment.
 
         On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
         """
-        return _with_store_dict(lambda store: store.athlete_profile(), label="get_athlete_profile")
+        return _with_store_dict(
+            cached("get_athlete_profile", lambda store: store.athlete_profile()),
+            label="get_athlete_profile",
+            backup=backup,
+        )
 
     @mcp.tool()
-    def get_workout_history_summary() -> str:
+    def get_workout_history_summary(backup: str | None = None) -> str:
         """Return a markdown summary of the full workout history backup.
 
         On failure returns a markdown document headed '# Tool error' instead of raising.
         """
-        return _with_store_str(lambda store: summary_markdown(store), label="get_workout_history_summary")
+        return _with_store_str(
+            cached("get_workout_history_summary", summary_markdown),
+            label="get_workout_history_summary",
+            backup=backup,
+        )
 
     @mcp.tool()
     def list_workout_sessions(
@@ -127,64 +292,248 @@ def create_mcp() -> FastMCP:
         offset: int = 0,
         workout_name: str | None = None,
         exercise_name: str | None = None,
+        backup: str | None = None,
     ) -> dict[str, Any]:
         """List completed workout sessions with pagination metadata, newest first.
 
         On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
         """
         return _with_store_dict(
-            lambda store: session_list(
-                store,
+            cached(
+                "list_workout_sessions",
+                lambda store: session_list(
+                    store,
+                    limit=limit,
+                    offset=offset,
+                    workout_name=workout_name,
+                    exercise_name=exercise_name,
+                ),
                 limit=limit,
                 offset=offset,
                 workout_name=workout_name,
                 exercise_name=exercise_name,
             ),
             label="list_workout_sessions",
+            backup=backup,
         )
 
     @mcp.tool()
-    def get_session_markdown(workout_history_id: str) -> str:
+    def get_session_markdown(workout_history_id: str, backup: str | None = None) -> str:
         """Return markdown for one workout session by workout history id.
 
         On failure returns a markdown document headed '# Tool error' instead of raising.
         """
         return _with_store_str(
-            lambda store: session_markdown(store, workout_history_id),
+            cached(
+                "get_session_markdown",
+                lambda store: session_markdown(store, workout_history_id),
+                workout_history_id=workout_history_id,
+            ),
             label="get_session_markdown",
+            backup=backup,
         )
 
     @mcp.tool()
-    def list_exercises(query: str | None = None) -> list[dict[str, Any]] | dict[str, Any]:
+    def get_sessions_markdown(workout_history_ids: list[str], backup: str | None = None) -> dict[str, Any]:
+        """Return markdown for up to 50 workout sessions in one call, keyed by workout history id.
+
+        Unknown ids are reported under errors with their own hint; the other sessions are still returned.
+        """
+        return _with_store_dict(
+            lambda store: _render_batch(
+                store,
+                workout_history_ids,
+                lambda loaded, item_id: cached(
+                    "get_session_markdown",
+                    lambda inner: session_markdown(inner, item_id),
+                    workout_history_id=item_id,
+                )(loaded),
+                label="get_sessions_markdown",
+            ),
+            label="get_sessions_markdown",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def list_exercises(query: str | None = None, backup: str | None = None) -> list[dict[str, Any]] | dict[str, Any]:
         """List exercises with ids, current config, planned sets, and recorded history counts.
 
         On failure returns a JSON object with ok=false, error, and optional hint instead of a list.
         """
         return _with_store_list(
-            lambda store: list_exercises_data(store, query=query),
+            cached("list_exercises", lambda store: list_exercises_data(store, query=query), query=query),
             label="list_exercises",
+            backup=backup,
         )
 
     @mcp.tool()
-    def get_exercise_history_markdown(exercise_id: str) -> str:
+    def get_exercise_history_markdown(exercise_id: str, backup: str | None = None) -> str:
         """Return chronological markdown history for one exercise id.
 
         On failure returns a markdown document headed '# Tool error' instead of raising.
         """
         return _with_store_str(
-            lambda store: exercise_history_markdown(store, exercise_id),
+            cached(
+                "get_exercise_history_markdown",
+                lambda store: exercise_history_markdown(store, exercise_id),
+                exercise_id=exercise_id,
+            ),
             label="get_exercise_history_markdown",
+            backup=backup,
         )
 
     @mcp.tool()
-    def get_current_training_plan(active_only: bool = True) -> dict[str, Any]:
+    def get_exercise_histories_markdown(exercise_ids: list[str], backup: str | None = None) -> dict[str, Any]:
+        """Return chronological markdown history for up to 50 exercises in one call, keyed by exercise id.
+
+        Unknown ids are reported under errors with their own hint; the other histories are still returned.
+        """
+        return _with_store_dict(
+            lambda store: _render_batch(
+                store,
+                exercise_ids,
+                lambda loaded, item_id: cached(
+                    "get_exercise_history_markdown",
+                    lambda inner: exercise_history_markdown(inner, item_id),
+                    exercise_id=item_id,
+                )(loaded),
+                label="get_exercise_histories_markdown",
+            ),
+            label="get_exercise_histories_markdown",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def get_exercise_history_page(
+        exercise_id: str,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_chars: int | None = None,
+        cursor: str | None = None,
+        backup: str | None = None,
+    ) -> dict[str, Any]:
+        """Return one exercise's history newest first, sized to max_tokens (or max_chars).
+
+        Recent sessions are rendered in full and older ones as rollup rows; the athlete context appears
+        on the first page only. Pass next_cursor back as cursor to continue; it is null on the last page.
+        On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
+        """
+        return _with_store_dict(
+            cached(
+                "get_exercise_history_page",
+                lambda store: exercise_history_page(
+                    store,
+                    exercise_id,
+                    max_tokens=max_tokens,
+                    max_chars=max_chars,
+                    cursor=cursor,
+                ),
+                exercise_id=exercise_id,
+                max_tokens=max_tokens,
+                max_chars=max_chars,
+                cursor=cursor,
+            ),
+            label="get_exercise_history_page",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def get_sessions_page(
+        workout_history_ids: list[str] | None = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_chars: int | None = None,
+        cursor: str | None = None,
+        backup: str | None = None,
+    ) -> dict[str, Any]:
+        """Return completed sessions (or the given ids) newest first, sized to max_tokens (or max_chars).
+
+        Recent sessions are rendered in full and older ones as rollup rows; the athlete context appears
+        on the first page only. Pass next_cursor back as cursor to continue; it is null on the last page.
+        On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
+        """
+        return _with_store_dict(
+            cached(
+                "get_sessions_page",
+                lambda store: sessions_page(
+                    store,
+                    workout_history_ids,
+                    max_tokens=max_tokens,
+                    max_chars=max_chars,
+                    cursor=cursor,
+                ),
+                workout_history_ids=workout_history_ids,
+                max_tokens=max_tokens,
+                max_chars=max_chars,
+                cursor=cursor,
+            ),
+            label="get_sessions_page",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def get_training_rollup(
+        period: str = "week",
+        group_by: str = "exercise",
+        start_date: str | None = None,
+        end_date: str | None = None,
+        backup: str | None = None,
+    ) -> dict[str, Any]:
+        """Return volume, reps, top-set load, and session counts per day, week, or month as a compact table.
+
+        group_by is exercise, muscle_group, or workout; workout grouping adds HR zone seconds.
+        Dates are inclusive YYYY-MM-DD bounds on the session date.
+        On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
+        """
+        return _with_store_dict(
+            cached(
+                "get_training_rollup",
+                lambda store: training_rollup_data(
+                    store,
+                    period=period,
+                    group_by=group_by,
+                    start_date=start_date,
+                    end_date=end_date,
+                ),
+                period=period,
+                group_by=group_by,
+                start_date=start_date,
+                end_date=end_date,
+            ),
+            label="get_training_rollup",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def get_personal_records(exercise_id: str | None = None, backup: str | None = None) -> dict[str, Any]:
+        """Return best load, estimated 1RM, and session volume per exercise as a compact table.
+
+        With exercise_id, return that exercise's PR timeline instead: one row per session that set a
+        load, reps-at-load, e1RM, or volume record, plus the current best reps at each load.
+        On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
+        """
+        return _with_store_dict(
+            cached(
+                "get_personal_records",
+                lambda store: personal_records_data(store, exercise_id=exercise_id),
+                exercise_id=exercise_id,
+            ),
+            label="get_personal_records",
+            backup=backup,
+        )
+
+    @mcp.tool()
+    def get_current_training_plan(active_only: bool = True, backup: str | None = None) -> dict[str, Any]:
         """Return current workouts, exercise prescriptions, progression settings, and equipment.
 
         On failure returns a JSON object with ok=false, error, and optional hint instead of raising.
         """
         return _with_store_dict(
-            lambda store: current_training_plan_data(store, active_only=active_only),
+            cached(
+                "get_current_training_plan",
+                lambda store: current_training_plan_data(store, active_only=active_only),
+                active_only=active_only,
+            ),
             label="get_current_training_plan",
+            backup=backup,
         )
 
     return mcp
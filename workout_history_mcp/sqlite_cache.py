@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+from .heart_rate import compact_heart_rate_samples
+from .loader import (
+    SessionAggregate,
+    WorkoutHistoryStore,
+    _EMPTY_SESSION_AGGREGATE,
+    _as_list,
+    _execution_sort_key,
+    _is_active_set,
+    _sort_number,
+)
+
+
+HISTORY_CACHE_PATH_ENV = "MYWORKOUT_HISTORY_CACHE_PATH"
+SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True)
+class _MirroredTable:
+    name: str
+    backup_key: str
+    columns: tuple[str, ...]
+    indexes: tuple[tuple[str, ...], ...]
+
+
+MIRRORED_TABLES = (
+    _MirroredTable(
+        name="workout_histories",
+        backup_key="WorkoutHistories",
+        columns=("workout_id", "date", "is_done"),
+        indexes=(("date",), ("workout_id",)),
+    ),
+    _MirroredTable(
+        name="set_histories",
+        backup_key="SetHistories",
+        columns=("workout_history_id", "exercise_id", "set_type", "is_active"),
+        indexes=(("workout_history_id",), ("exercise_id",)),
+    ),
+    _MirroredTable(
+        name="rest_histories",
+        backup_key="RestHistories",
+        columns=("workout_history_id", "exercise_id"),
+        indexes=(("workout_history_id",), ("exercise_id",)),
+    ),
+    _MirroredTable(
+        name="progressions",
+        backup_key="ExerciseSessionProgressions",
+        columns=("workout_history_id", "exercise_id"),
+        indexes=(("workout_history_id", "exercise_id"), ("exercise_id",)),
+    ),
+)
+
+
+@dataclass
+class IngestStats:
+    inserted: dict[str, int] = field(default_factory=dict)
+    updated: dict[str, int] = field(default_factory=dict)
+    deleted: dict[str, int] = field(default_factory=dict)
+    unchanged: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> int:
+        return sum(self.inserted.values()) + sum(self.updated.values()) + sum(self.deleted.values())
+
+
+def _optional_str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _indexed_values(table: _MirroredTable, record: dict[str, Any]) -> tuple[Any, ...]:
+    if table.name == "workout_histories":
+        return (_optional_str(record.get("workoutId")), _optional_str(record.get("date")), 1 if record.get("isDone") is True else 0)
+    if table.name == "set_histories":
+        return (
+            _optional_str(record.get("workoutHistoryId")),
+            _optional_str(record.get("exerciseId")),
+            (record.get("setData") or {}).get("type"),
+            1 if _is_active_set(record) else 0,
+        )
+    return (_optional_str(record.get("workoutHistoryId")), _optional_str(record.get("exerciseId")))
+
+
+class HistoryDatabase:
+    """SQLite mirror of the AppBackup history arrays, kept current by content-hash upserts."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and int(row[0]) != SCHEMA_VERSION:
+                for table in MIRRORED_TABLES:
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table.name}")
+                self.connection.execute("DELETE FROM meta")
+            for table in MIRRORED_TABLES:
+                columns = ", ".join(f"{column}" for column in table.columns)
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table.name} ("
+                    "id TEXT PRIMARY KEY, position INTEGER NOT NULL, content_hash TEXT NOT NULL, "
+                    f"{columns}, payload TEXT NOT NULL)"
+                )
+                for index_columns in table.indexes:
+                    index_name = f"idx_{table.name}_{'_'.join(index_columns)}"
+                    self.connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON {table.name} ({', '.join(index_columns)})"
+                    )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def meta(self, key: str) -> str | None:
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def ingest(self, backup: dict[str, Any], source_fingerprint: str | None = None) -> IngestStats:
+        """Upsert changed records, delete records missing from the backup, and store WorkoutStore."""
+        stats = IngestStats()
+        with self.lock, self.connection:
+            for table in MIRRORED_TABLES:
+                self._ingest_table(table, _as_list(backup.get(table.backup_key)), stats)
+            self._set_meta("workout_store", _canonical_json(backup.get("WorkoutStore") or {}))
+            if source_fingerprint is not None:
+                self._set_meta("source_fingerprint", source_fingerprint)
+        return stats
+
+    def _ingest_table(self, table: _MirroredTable, records: list[dict[str, Any]], stats: IngestStats) -> None:
+        existing = {
+            row[0]: (row[1], row[2])
+            for row in self.connection.execute(f"SELECT id, content_hash, position FROM {table.name}")
+        }
+        seen: set[str] = set()
+        occurrences: dict[str, int] = {}
+        pending: list[tuple[Any, ...]] = []
+        moved: list[tuple[int, str]] = []
+        inserted = updated = unchanged = 0
+        for position, record in enumerate(records):
+            payload = _canonical_json(record)
+            content_hash = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+            record_id = _optional_str(record.get("id")) or f"sha1:{content_hash}"
+            # The in-memory store keeps every record that repeats an id, so mirror repeats as "<id>#<n>" rows
+            occurrence = occurrences.get(record_id, 0)
+            occurrences[record_id] = occurrence + 1
+            if occurrence:
+                record_id = f"{record_id}#{occurrence}"
+            seen.add(record_id)
+            previous = existing.get(record_id)
+            if previous is not None and previous[0] == content_hash:
+                # Same content shifted by inserts/deletes earlier in the array: only renumber it
+                if previous[1] != position:
+                    moved.append((position, record_id))
+                unchanged += 1
+                continue
+            if previous is None:
+                inserted += 1
+            else:
+                updated += 1
+            pending.append((record_id, position, content_hash, *_indexed_values(table, record), payload))
+        column_names = ("id", "position", "content_hash", *table.columns, "payload")
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in column_names[1:])
+        self.connection.executemany(
+            f"INSERT INTO {table.name} ({', '.join(column_names)}) "
+            f"VALUES ({', '.join('?' for _ in column_names)}) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments}",
+            pending,
+        )
+        self.connection.executemany(f"UPDATE {table.name} SET position = ? WHERE id = ?", moved)
+        removed = [(record_id,) for record_id in existing if record_id not in seen]
+        self.connection.executemany(f"DELETE FROM {table.name} WHERE id = ?", removed)
+        stats.inserted[table.name] = inserted
+        stats.updated[table.name] = updated
+        stats.deleted[table.name] = len(removed)
+        stats.unchanged[table.name] = unchanged
+
+    def payloads(self, table: str, where: str = "", parameters: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        query = f"SELECT payload FROM {table} {where} ORDER BY position"
+        with self.lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def rows(self, query: str, parameters: tuple[Any, ...] = ()) -> list[tuple[Any, ...]]:
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+
+@dataclass(frozen=True)
+class SqliteWorkoutHistoryStore(WorkoutHistoryStore):
+    """WorkoutHistoryStore whose history lookups are indexed SQLite queries.
+
+    Only WorkoutStore and the session list are held in memory; set, rest and progression
+    records are read per query. Bulk list properties still work but load the full table.
+    """
+
+    database: HistoryDatabase | None = None
+
+    index_attributes = (
+        "_workouts_by_id",
+        "_exercises_by_id",
+        "_workout_names_by_exercise",
+        "_equipment_or_accessory_by_id",
+        "_sessions_by_id",
+        "_completed_sessions",
+        "_session_aggregates",
+    )
+
+    @staticmethod
+    def open(database: HistoryDatabase) -> SqliteWorkoutHistoryStore:
+        workout_store = json.loads(database.meta("workout_store") or "{}")
+        return SqliteWorkoutHistoryStore(backup={"WorkoutStore": workout_store}, database=database)
+
+    @property
+    def _db(self) -> HistoryDatabase:
+        if self.database is None:
+            raise RuntimeError("SqliteWorkoutHistoryStore requires a HistoryDatabase")
+        return self.database
+
+    @cached_property
+    def workout_histories(self) -> list[dict[str, Any]]:
+        return self._db.payloads("workout_histories")
+
+    @cached_property
+    def set_histories(self) -> list[dict[str, Any]]:
+        return self._db.payloads("set_histories")
+
+    @cached_property
+    def rest_histories(self) -> list[dict[str, Any]]:
+        return self._db.payloads("rest_histories")
+
+    @cached_property
+    def progressions(self) -> list[dict[str, Any]]:
+        return self._db.payloads("progressions")
+
+    @cached_property
+    def _session_aggregates(self) -> dict[str, SessionAggregate]:
+        recorded_counts: dict[str, int] = defaultdict(int)
+        exercise_ids: dict[str, set[str]] = defaultdict(set)
+        recorded_exercise_ids: dict[str, set[str]] = defaultdict(set)
+        rows = self._db.rows(
+            "SELECT workout_history_id, exercise_id, SUM(is_active) FROM set_histories "
+            "GROUP BY workout_history_id, exercise_id"
+        )
+        for workout_history_id, exercise_id, active_count in rows:
+            session_id = str(workout_history_id)
+            exercise_ids[session_id].add(str(exercise_id))
+            recorded_counts[session_id] += int(active_count or 0)
+            if active_count and exercise_id is not None:
+                recorded_exercise_ids[session_id].add(str(exercise_id))
+        sessions_by_id = self._sessions_by_id
+        aggregates: dict[str, SessionAggregate] = {}
+        for session_id in {*sessions_by_id, *exercise_ids}:
+            samples, invalid_count = compact_heart_rate_samples(
+                (sessions_by_id.get(session_id) or {}).get("heartBeatRecords")
+            )
+            aggregates[session_id] = SessionAggregate(
+                workout_history_id=session_id,
+                recorded_set_count=recorded_counts.get(session_id, 0),
+                exercise_ids=frozenset(exercise_ids.get(session_id, ())),
+                recorded_exercise_ids=frozenset(recorded_exercise_ids.get(session_id, ())),
+                heart_rate_samples=samples,
+                invalid_heart_rate_sample_count=invalid_count,
+            )
+        return aggregates
+
+    def session_aggregate(self, workout_history_id: str) -> SessionAggregate:
+        return self._session_aggregates.get(str(workout_history_id), _EMPTY_SESSION_AGGREGATE)
+
+    def sets_for_session(self, workout_history_id: str) -> list[dict[str, Any]]:
+        sets = self._db.payloads("set_histories", "WHERE workout_history_id = ?", (str(workout_history_id),))
+        return sorted(sets, key=_execution_sort_key)
+
+    def sets_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
+        return self._db.payloads("set_histories", "WHERE exercise_id = ?", (str(exercise_id),))
+
+    def rests_for_session(self, workout_history_id: str, exercise_id: str | None = None) -> list[dict[str, Any]]:
+        if exercise_id is None:
+            rests = self._db.payloads("rest_histories", "WHERE workout_history_id = ?", (str(workout_history_id),))
+        else:
+            rests = self._db.payloads(
+                "rest_histories",
+                "WHERE workout_history_id = ? AND exercise_id = ?",
+                (str(workout_history_id), str(exercise_id)),
+            )
+        return sorted(rests, key=lambda item: (_sort_number(item.get("order")), str(item.get("startTime") or "")))
+
+    def rest_records_for_session(self, workout_history_id: str, exercise_id: str | None = None) -> list[dict[str, Any]]:
+        where = "WHERE workout_history_id = ? AND set_type = 'RestSetData'"
+        parameters: tuple[Any, ...] = (str(workout_history_id),)
+        if exercise_id is not None:
+            where += " AND exercise_id = ?"
+            parameters += (str(exercise_id),)
+        rest_set_histories = self._db.payloads("set_histories", where, parameters)
+        return sorted(
+            [*self.rests_for_session(workout_history_id, exercise_id), *rest_set_histories],
+            key=_execution_sort_key,
+        )
+
+    def progression_for(self, workout_history_id: str, exercise_id: str) -> dict[str, Any] | None:
+        matches = self._db.payloads(
+            "progressions",
+            "WHERE workout_history_id = ? AND exercise_id = ?",
+            (str(workout_history_id), str(exercise_id)),
+        )
+        return matches[0] if matches else None
+
+    def rests_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
+        return self._db.payloads("rest_histories", "WHERE exercise_id = ?", (str(exercise_id),))
+
+    def progressions_for_exercise(self, exercise_id: str) -> list[dict[str, Any]]:
+        return self._db.payloads("progressions", "WHERE exercise_id = ?", (str(exercise_id),))
+
+
+def history_cache_path_from_env() -> Path | None:
+    configured = os.environ.get(HISTORY_CACHE_PATH_ENV)
+    return Path(configured).expanduser() if configured else None
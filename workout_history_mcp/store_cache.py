@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .loader import WorkoutHistoryStore, backup_dir_from_env, load_backup
+from .sqlite_cache import HistoryDatabase, SqliteWorkoutHistoryStore
+from .streaming import load_compact_store
+
+
+STORE_MEMORY_MB_ENV = "MYWORKOUT_STORE_MEMORY_MB"
+DEFAULT_STORE_MEMORY_MB = 1024
+
+
+@dataclass(frozen=True)
+class BackupFingerprint:
+    """Identity of one on-disk backup version; a change means the store must be rebuilt."""
+
+    path: str
+    mtime_ns: int
+    size: int
+
+    def token(self) -> str:
+        return f"{self.path}|{self.mtime_ns}|{self.size}"
+
+
+def backup_fingerprint(path: str | os.PathLike[str]) -> BackupFingerprint:
+    resolved = Path(path).expanduser()
+    stat = resolved.stat()
+    return BackupFingerprint(path=str(resolved), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+
+class StoreCache:
+    """Process-resident store that is parsed and indexed once per backup version.
+
+    The backup is streamed and history records are kept as compact slotted records.
+
+    With `history_cache_path`, records are mirrored into a SQLite database instead and a
+    backup that was already ingested (same path, mtime and size) is not parsed again.
+    """
+
+    def __init__(self, history_cache_path: str | os.PathLike[str] | None = None) -> None:
+        self._lock = threading.Lock()
+        self._fingerprint: BackupFingerprint | None = None
+        self._store: WorkoutHistoryStore | None = None
+        self._history_cache_path = Path(history_cache_path).expanduser() if history_cache_path else None
+        self._database: HistoryDatabase | None = None
+        self.load_count = 0
+
+    def get(self, path: str | os.PathLike[str]) -> WorkoutHistoryStore:
+        fingerprint = backup_fingerprint(path)
+        with self._lock:
+            if self._store is not None and self._fingerprint == fingerprint:
+                return self._store
+            if self._history_cache_path is None:
+                store = load_compact_store(fingerprint.path).build_indexes()
+            else:
+                store = self._load_sqlite_store(fingerprint)
+            self._store = store
+            self._fingerprint = fingerprint
+            self.load_count += 1
+            return store
+
+    def _load_sqlite_store(self, fingerprint: BackupFingerprint) -> WorkoutHistoryStore:
+        if self._database is None:
+            self._database = HistoryDatabase(self._history_cache_path)
+        if self._database.meta("source_fingerprint") != fingerprint.token():
+            self._database.ingest(load_backup(fingerprint.path), source_fingerprint=fingerprint.token())
+        return SqliteWorkoutHistoryStore.open(self._database).build_indexes()
+
+    @property
+    def fingerprint(self) -> BackupFingerprint | None:
+        return self._fingerprint
+
+    def fingerprint_for(self, store: WorkoutHistoryStore) -> BackupFingerprint | None:
+        """Fingerprint of `store` if it is still the current store, else None."""
+        with self._lock:
+            return self._fingerprint if store is self._store else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store = None
+            self._fingerprint = None
+
+
+def store_memory_budget_from_env() -> int:
+    configured = os.environ.get(STORE_MEMORY_MB_ENV)
+    megabytes = float(configured) if configured else DEFAULT_STORE_MEMORY_MB
+    return max(int(megabytes * 1024 * 1024), 0)
+
+
+class StoreRegistry:
+    """One lazily loaded StoreCache per backup file, evicted least recently used first.
+
+    Memory is estimated from each backup's file size. The store just requested is never
+    evicted, so a single backup larger than the budget is still served. When serving a
+    backup directory, each backup gets its own SQLite history cache next to the
+    configured path.
+    """
+
+    def __init__(
+        self,
+        history_cache_path: str | os.PathLike[str] | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._caches: OrderedDict[str, StoreCache] = OrderedDict()
+        self._history_cache_path = Path(history_cache_path).expanduser() if history_cache_path else None
+        self.max_bytes = store_memory_budget_from_env() if max_bytes is None else max_bytes
+        self.evictions = 0
+
+    def _history_cache_for(self, key: str) -> Path | None:
+        if self._history_cache_path is None or backup_dir_from_env() is None:
+            return self._history_cache_path
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return self._history_cache_path.with_name(
+            f"{self._history_cache_path.stem}-{digest}{self._history_cache_path.suffix}"
+        )
+
+    def _cache_for(self, key: str) -> StoreCache:
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = StoreCache(history_cache_path=self._history_cache_for(key))
+            self._caches.move_to_end(key)
+            return cache
+
+    def get(self, path: str | os.PathLike[str]) -> WorkoutHistoryStore:
+        key = str(Path(path).expanduser().resolve())
+        store = self._cache_for(key).get(path)
+        self._evict(keep=key)
+        return store
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            while self.resident_bytes() > self.max_bytes:
+                victim = next((key for key in self._caches if key != keep), None)
+                if victim is None:
+                    return
+                self._caches.pop(victim).clear()
+                self.evictions += 1
+
+    def resident_bytes(self) -> int:
+        return sum(cache.fingerprint.size for cache in self._caches.values() if cache.fingerprint)
+
+    def fingerprint_for(self, store: WorkoutHistoryStore) -> BackupFingerprint | None:
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            fingerprint = cache.fingerprint_for(store)
+            if fingerprint is not None:
+                return fingerprint
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            caches = list(self._caches.items())
+            return {
+                "resident_backups": [
+                    {"path": key, "size_bytes": cache.fingerprint.size if cache.fingerprint else None, "load_count": cache.load_count}
+                    for key, cache in caches
+                ],
+                "resident_bytes": self.resident_bytes(),
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from .heart_rate import MAX_SAMPLE_BPM
+from .loader import WorkoutHistoryStore, backup_path_from_env
+
+
+HISTORY_ARRAY_KEYS = frozenset({
+    "WorkoutHistories",
+    "SetHistories",
+    "RestHistories",
+    "ExerciseSessionProgressions",
+})
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _StreamReader:
+    """Pull JSON values from a text handle one at a time, buffering only what is undecoded."""
+
+    def __init__(self, handle: Any, chunk_size: int) -> None:
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, minimum: int = 0) -> bool:
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._handle.read(max(self._chunk_size, minimum))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it, or "" at end of input."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def consume(self, expected: str) -> None:
+        if self.peek() != expected:
+            raise json.JSONDecodeError(f"Expecting '{expected}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                decoded, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof or not self._read_more(len(self._buffer)):
+                    raise
+                continue
+            # A number or literal that ends exactly at the buffer edge may continue in the next chunk.
+            if end == len(self._buffer) and not self._eof and self._read_more(len(self._buffer)):
+                continue
+            self._pos = end
+            return decoded
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+
+def iter_backup_members(
+    path: str | os.PathLike[str],
+    stream_keys: Iterable[str] = HISTORY_ARRAY_KEYS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[str, Any, bool]]:
+    """Yield `(key, value, is_item)` for a top-level JSON object.
+
+    Arrays under `stream_keys` are yielded one element at a time with `is_item=True`;
+    every other member is decoded whole and yielded once with `is_item=False`.
+    """
+    streamed = frozenset(stream_keys)
+    with Path(path).expanduser().open("r", encoding="utf-8") as handle:
+        reader = _StreamReader(handle, chunk_size)
+        reader.consume("{")
+        if reader.peek() == "}":
+            reader.consume("}")
+        else:
+            while True:
+                key = reader.value()
+                if not isinstance(key, str):
+                    raise reader.error("Expecting property name enclosed in double quotes")
+                reader.consume(":")
+                if key in streamed and reader.peek() == "[":
+                    yield from _iter_array_items(reader, key)
+                else:
+                    yield key, reader.value(), False
+                if reader.peek() == ",":
+                    reader.consume(",")
+                    continue
+                reader.consume("}")
+                break
+        if reader.peek() != "":
+            raise reader.error("Extra data")
+
+
+def _iter_array_items(reader: _StreamReader, key: str) -> Iterator[tuple[str, Any, bool]]:
+    reader.consume("[")
+    if reader.peek() == "]":
+        reader.consume("]")
+        return
+    while True:
+        yield key, reader.value(), True
+        if reader.peek() == ",":
+            reader.consume(",")
+            continue
+        reader.consume("]")
+        return
+
+
+def iter_backup_records(path: str | os.PathLike[str], key: str) -> Iterator[Any]:
+    """Yield the records of one top-level backup array without materializing the others."""
+    for member_key, value, is_item in iter_backup_members(path, stream_keys={key}):
+        if member_key == key and is_item:
+            yield value
+
+
+class CompactRecord:
+    """Slotted projection of one backup record that answers dict-style `get` lookups."""
+
+    __slots__ = ()
+    _fields: frozenset[str] = frozenset()
+
+    def __init__(self, source: dict[str, Any]) -> None:
+        for name in self.__slots__:
+            if name in source:
+                setattr(self, name, self._project(name, source[name]))
+
+    def _project(self, name: str, value: Any) -> Any:
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._fields:
+            return default
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields or not hasattr(self, key):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key in self._fields and hasattr(self, key)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+
+
+SET_DATA_FIELDS = (
+    "type",
+    "subCategory",
+    "actualReps",
+    "actualWeight",
+    "volume",
+    "additionalWeight",
+    "relativeBodyWeightInKg",
+    "bodyWeightPercentageSnapshot",
+    "startTimer",
+    "endTimer",
+)
+_INTERNED_SET_DATA_FIELDS = frozenset({"type", "subCategory"})
+
+
+def _project_set_data(set_data: Any) -> Any:
+    if not isinstance(set_data, dict):
+        return set_data
+    projected: dict[str, Any] = {}
+    for name in SET_DATA_FIELDS:
+        if name in set_data:
+            value = set_data[name]
+            projected[name] = sys.intern(value) if name in _INTERNED_SET_DATA_FIELDS and isinstance(value, str) else value
+    return projected
+
+
+class CompactWorkoutHistory(CompactRecord):
+    """
+    Session record with heartBeatRecords packed into array('q').
+
+    Only integer samples are kept (the only ones heart-rate analytics read), clamped to
+    [-1, MAX_SAMPLE_BPM + 1] so compact_heart_rate_samples classifies them exactly as it
+    does the raw list. heart_rate_count keeps the raw record count for display.
+    """
+
+    __slots__ = ("id", "workoutId", "date", "time", "startTime", "duration", "isDone", "heartBeatRecords", "heart_rate_count")
+
+    def __init__(self, source: dict[str, Any]) -> None:
+        super().__init__(source)
+        records = source.get("heartBeatRecords")
+        if isinstance(records, list):
+            self.heart_rate_count = len(records)
+
+    def _project(self, name: str, value: Any) -> Any:
+        if name == "heartBeatRecords" and isinstance(value, list):
+            return array("q", (min(max(item, -1), MAX_SAMPLE_BPM + 1) for item in value if isinstance(item, int)))
+        return value
+
+
+class CompactSetHistory(CompactRecord):
+    __slots__ = (
+        "id",
+        "workoutHistoryId",
+        "exerciseId",
+        "setId",
+        "order",
+        "executionSequence",
+        "skipped",
+        "startTime",
+        "endTime",
+        "equipmentIdSnapshot",
+        "equipmentNameSnapshot",
+        "setData",
+    )
+
+    def _project(self, name: str, value: Any) -> Any:
+        return _project_set_data(value) if name == "setData" else value
+
+
+class CompactRestHistory(CompactRecord):
+    __slots__ = (
+        "id",
+        "workoutHistoryId",
+        "exerciseId",
+        "order",
+        "executionSequence",
+        "startTime",
+        "endTime",
+        "elapsedSeconds",
+        "durationSeconds",
+        "timeInSeconds",
+        "plannedSeconds",
+        "plannedTimeInSeconds",
+        "setData",
+    )
+
+    def _project(self, name: str, value: Any) -> Any:
+        return _project_set_data(value) if name == "setData" else value
+
+
+class CompactProgression(CompactRecord):
+    __slots__ = (
+        "id",
+        "workoutHistoryId",
+        "exerciseId",
+        "expectedSets",
+        "progressionState",
+        "vsExpected",
+        "vsPrevious",
+        "previousSessionVolume",
+        "expectedVolume",
+        "executedVolume",
+    )
+
+
+COMPACT_RECORD_TYPES: dict[str, type[CompactRecord]] = {
+    "WorkoutHistories": CompactWorkoutHistory,
+    "SetHistories": CompactSetHistory,
+    "RestHistories": CompactRestHistory,
+    "ExerciseSessionProgressions": CompactProgression,
+}
+
+
+def load_compact_backup(path: str | os.PathLike[str] | None = None) -> dict[str, Any]:
+    """Stream a backup, projecting history records into compact slotted records."""
+    backup_path = Path(path).expanduser() if path else backup_path_from_env()
+    backup: dict[str, Any] = {}
+    for key, value, is_item in iter_backup_members(backup_path, stream_keys=COMPACT_RECORD_TYPES):
+        if not is_item:
+            backup[key] = value
+            continue
+        records = backup.get(key)
+        if not isinstance(records, list):
+            records = backup[key] = []
+        record_type = COMPACT_RECORD_TYPES[key]
+        records.append(record_type(value) if isinstance(value, dict) else value)
+    return backup
+
+
+def load_compact_store(path: str | os.PathLike[str] | None = None) -> WorkoutHistoryStore:
+    return WorkoutHistoryStore(load_compact_backup(path))
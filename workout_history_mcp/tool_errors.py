@@ -5,12 +5,18 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from .loader import BackupSelectionError
+
 
 HINT_EXERCISE_ID = (
     "Use `list_exercises` or the `workout-history://exercises` resource for valid `exercise_id` values. "
     "Do not pass `workout_history_id` from `list_workout_sessions` — that identifies a completed session, not an exercise."
 )
 
+HINT_BACKUP = (
+    "Call `list_backups` and pass one of the returned `backup` values."
+)
+
 HINT_SESSION_ID = (
     "Use `list_workout_sessions` and pass the `workout_history_id` field from a returned item."
 )
@@ -38,12 +44,15 @@ class ToolFailure:
     @staticmethod
     def from_load_exception(exc: BaseException, backup_path: Path) -> ToolFailure:
         shown = str(backup_path)
+        if isinstance(exc, BackupSelectionError):
+            return ToolFailure(message=str(exc), hint=HINT_BACKUP)
         if isinstance(exc, FileNotFoundError):
             if "MYWORKOUT_BACKUP_PATH is not set" in str(exc):
                 return ToolFailure(
                     message="Backup path is not configured: MYWORKOUT_BACKUP_PATH is not set.",
                     hint=(
                         "Set MYWORKOUT_BACKUP_PATH to the absolute path of your AppBackup JSON, "
+                        "set MYWORKOUT_BACKUP_DIR to serve a directory of backups, "
                         "or run scripts/setup_workout_history_mcp.ps1 with -BackupPath."
                     ),
                 )